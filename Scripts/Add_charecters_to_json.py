@@ -9,10 +9,25 @@ Scrapes character names from a GitHub repository and populates the characters.js
 
 import json
 import os
-import requests
-from bs4 import BeautifulSoup
-import re
+import sys
 import argparse  # Import the argparse module
+from pathlib import Path
+
+# Shared fetch layer lives in the desktop_creator source tree
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "desktop_creator" / "src"))
+from core.play_fetcher import FetchError, PlayFetcher
+
+CHARACTERS_BASE_URL = "https://raw.githubusercontent.com/TheMITTech/shakespeare/master/characters"
+
+_fetcher = None
+_prefetched = {}
+
+def get_fetcher():
+    """Shared fetcher (created on first use unless configured in __main__)"""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PlayFetcher()
+    return _fetcher
 
 def is_file_empty(file_path):
     """Check if a file is empty"""
@@ -62,18 +77,20 @@ def add_characters_to_json(directory, force):
     else:
         print(f"Characters already exist in {file_path}")
 
+def character_list_url(play_name):
+    """URL of a play's character list"""
+    return f"{CHARACTERS_BASE_URL}/{play_name}.json"
+
 def scrape_character_names(play_name):
     """Scrape character names from the given file"""
-    base_url = "https://raw.githubusercontent.com/TheMITTech/shakespeare/master/characters"
-    url = f"{base_url}/{play_name}.json"
+    url = character_list_url(play_name)
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        response = _prefetched.get(url) or get_fetcher().fetch(url)
         data = response.json()
         character_names = list(data.keys())  # Extract character names from JSON keys
         return character_names
-    except requests.exceptions.RequestException as e:
+    except FetchError as e:
         print(f"Request error: {e}")
         return []
     except json.JSONDecodeError as e:
@@ -87,8 +104,13 @@ if __name__ == "__main__":
     # Create argument parser
     parser = argparse.ArgumentParser(description="Populate characters.json files with character names from a GitHub repository.")
     parser.add_argument("--force", action="store_true", help="Force overwrite existing files.")
+    parser.add_argument("--offline", action="store_true", help="Serve character lists from the mirror/cache only.")
+    parser.add_argument("--mirror", type=Path, help="Local mirror directory (filled online, served offline).")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="Concurrent downloads.")
     args = parser.parse_args()
 
+    _fetcher = PlayFetcher(mirror_dir=args.mirror, offline=args.offline, max_workers=args.jobs)
+
     # List of directories to process
     directories = [
         "C:/Users/ADMIN/Source/Repos/shakespeare_forensics_project/desktop_creator/data/static/plays/Alls_Well_That_Ends_Well",
@@ -131,6 +153,9 @@ if __name__ == "__main__":
         "C:/Users/ADMIN/Source/Repos/shakespeare_forensics_project/desktop_creator/data/static/plays/Two_Gentlemen_of_Verona"
     ]
 
+    # Download every character list concurrently before the per-play pass
+    _prefetched = _fetcher.fetch_many(character_list_url(os.path.basename(d)) for d in directories)
+
     # Process each directory
     for directory in directories:
         add_characters_to_json(directory, args.force)
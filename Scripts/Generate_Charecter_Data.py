@@ -10,11 +10,23 @@ Allows user to select play, city, and generates appropriate modern mappings.
 
 import json
 import logging
+import sys
 from pathlib import Path
 from typing import Dict, List
 import random
 from datetime import datetime
 
+# Shared loaders live in the desktop_creator source tree
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "desktop_creator" / "src"))
+from core.location_catalog import get_catalog
+from utils.mapping_pack import get_pack, load_static_json
+
+# Pack documents holding city records (region -> major_cities trees)
+CITY_DOCUMENTS = (
+    "modern_mappings/cities/major_cities",
+    "modern_mappings/cities/additional_cities"
+)
+
 class CharacterDataGenerator:
     def __init__(self):
         self.base_dir = Path("desktop_creator/data/static/plays")
@@ -70,34 +82,23 @@ class CharacterDataGenerator:
         }
 
     def _load_cities(self) -> List[str]:
-        """Load available cities from static data."""
+        """Load available cities from the flattened city records of the mapping pack."""
         try:
-            cities_file = Path("desktop_creator/data/static/modern_mappings/cities/major_cities.json")
-            if not cities_file.exists():
-                self.logger.warning("Cities file not found. Using default cities.")
+            pack = get_pack()
+            cities = {
+                record["name"]
+                for document in CITY_DOCUMENTS
+                for _, record in pack.records(document)
+                if "state" in record  # skip named corridors and hubs
+            }
+            if not cities:
+                self.logger.warning("No city records found. Using default cities.")
                 return self.default_cities
-                
-            with open(cities_file, 'r') as f:
-                city_data = json.load(f)
-                cities = self._extract_city_names(city_data)
-                return cities if cities else self.default_cities
+            return sorted(cities)
         except Exception as e:
             self.logger.error(f"Error loading cities: {e}")
             return self.default_cities
 
-    def _extract_city_names(self, city_data: Dict) -> List[str]:
-        """Extract city names from city data structure."""
-        cities = []
-        try:
-            regions = city_data.get("data", {}).get("regions", {})
-            for region in regions.values():
-                if "major_cities" in region:
-                    for city_info in region["major_cities"].values():
-                        cities.append(city_info.get("name", ""))
-        except Exception as e:
-            self.logger.error(f"Error extracting city names: {e}")
-        return sorted([city for city in cities if city])
-
     def _load_business_titles(self) -> Dict:
         """Load available business titles."""
         try:
@@ -106,8 +107,7 @@ class CharacterDataGenerator:
                 self.logger.warning("Titles file not found. Using default titles.")
                 return self.default_titles
                 
-            with open(titles_file, 'r') as f:
-                return json.load(f)
+            return load_static_json(titles_file)
         except Exception as e:
             self.logger.error(f"Error loading titles: {e}")
             return self.default_titles
@@ -185,20 +185,24 @@ class CharacterDataGenerator:
             except ValueError:
                 print("Please enter a valid number.")
 
+        catalog = get_catalog()
         characters = {}
         for i in range(num_characters):
             char_name = input(f"\nEnter name for character {i+1}: ").upper()
             role = input(f"Enter original role for {char_name}: ")
             
-            # Randomly assign modern details
-            modern_role = random.choice(self.titles.get("executive", self.default_titles["executive"]))
-            department = random.choice(self.titles.get("department", self.default_titles["department"]))
+            # Randomly assign modern details, preferring the city's own titles and employers
+            titles = self.titles if isinstance(self.titles, dict) else {}
+            modern_role = random.choice(
+                catalog.titles_in(city) or titles.get("executive", self.default_titles["executive"]))
+            department = random.choice(titles.get("department", self.default_titles["department"]))
+            employer = catalog.sample_company(city, random)
             
             characters[char_name] = {
                 "original_role": role,
                 "modern_role": {
                     "title": modern_role,
-                    "organization": f"{city} Global Enterprises",
+                    "organization": employer.name if employer else f"{city} Global Enterprises",
                     "department": department,
                     "location": city
                 },
@@ -15,12 +15,22 @@ This data supports character modernization and scenario generation
 for the Shakespeare Forensics Training Data Generator.
 """
 
+import argparse
 import json
 import random
+import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+# Shared build helpers live in the desktop_creator source tree
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "desktop_creator" / "src"))
+from utils.build_manifest import BuildManifest, data_sha256
+from core.location_catalog import LocationCatalog
+from utils.mapping_pack import DEFAULT_STATIC_PATH, EXPANSION_FILENAME, MappingPack, PackWriter, compile_pack
+from utils.phone_allocator import valid_area_code
+from utils.seeded_rng import SeededRNG
+
 class StaticDataGenerator:
     """Generates and manages static data for the Shakespeare Forensics Project."""
     
@@ -73,6 +83,10 @@ class StaticDataGenerator:
             
         print(f"Generated: {full_path}")
 
+    def _payload_hash(self, data: Dict) -> str:
+        """Hash generated content, ignoring the run timestamp embedded in it"""
+        return data_sha256(json.loads(json.dumps(data).replace(self.timestamp, "")))
+
     def generate_us_cities(self) -> Dict:
         """Generate comprehensive US city data with area codes and business districts."""
         return {
@@ -1023,8 +1037,12 @@ class StaticDataGenerator:
             }
         }
 
-    def generate_all(self):
-        """Generate all static data and save to files."""
+    def generate_all(self, force: bool = False):
+        """Generate all static data and save to files.
+
+        Files whose generated content and on-disk copy match the build
+        manifest are left untouched unless force is set.
+        """
         try:
             # Generate all data
             cities_data = self.generate_us_cities()
@@ -1046,18 +1064,290 @@ class StaticDataGenerator:
                 "relationships/mappings.json": relationships_data
             }
 
+            manifest = BuildManifest(self.base_dir / "manifest.json")
+            rebuilt = 0
+
             for filename, data in data_files.items():
+                params = {
+                    "data_version": self.data_version,
+                    "payload_sha256": self._payload_hash(data)
+                }
+                output_path = self.base_dir / filename
+
+                if not force and manifest.is_fresh(filename, {}, params, [output_path]):
+                    print(f"Unchanged: {output_path}")
+                    continue
+
                 self.write_json_file(data, filename)
+                manifest.record(filename, {}, params, [output_path])
+                rebuilt += 1
 
-            print(f"\nSuccessfully generated all static data files at {self.timestamp}")
+            manifest.save()
+            print(f"\nSuccessfully generated {rebuilt} of {len(data_files)} static data files at {self.timestamp}")
+
+            # Flatten everything into the pack the generators read from
+            counts = compile_pack(self.base_dir.parent)
+            print(f"Compiled mapping pack: {counts['documents']} documents, {counts['records']} records")
             return True
 
         except Exception as e:
             print(f"Error generating static data: {str(e)}")
             return False
 
+# Word lists for the procedural expansion (--expand)
+CITY_STEMS = (
+    "Ash", "Bright", "Cedar", "Clear", "Copper", "Crest", "Deer", "Eagle", "Elm", "Fair",
+    "Fern", "Fox", "Glen", "Gold", "Granite", "Green", "Hazel", "Highland", "Holly", "Iron",
+    "Juniper", "Lake", "Laurel", "Lin", "Maple", "Marsh", "Mill", "North", "Oak", "Pine",
+    "Red", "River", "Rock", "Rose", "Silver", "Spring", "Stone", "Sun", "Willow", "Wolf"
+)
+CITY_SUFFIXES = (
+    "bury", "dale", "field", "ford", "gate", "haven", "hurst", "land", "ley", "mont",
+    "moor", "port", "ridge", "shire", "side", "stead", "ton", "vale", "view", "ville",
+    "wick", "wood", "worth", "brook", "burg", "by", "cliff", "crest", "den", "well"
+)
+CITY_PREFIXES = ("", "North ", "South ", "East ", "West ", "New ", "Port ", "Lake ", "Mount ", "Fort ")
+STATES = (
+    ("AL", "south"), ("AK", "west"), ("AZ", "southwest"), ("AR", "south"), ("CA", "west_coast"),
+    ("CO", "southwest"), ("CT", "northeast"), ("DE", "northeast"), ("FL", "south"), ("GA", "south"),
+    ("HI", "west"), ("ID", "west"), ("IL", "midwest"), ("IN", "midwest"), ("IA", "midwest"),
+    ("KS", "midwest"), ("KY", "south"), ("LA", "south"), ("ME", "northeast"), ("MD", "northeast"),
+    ("MA", "northeast"), ("MI", "midwest"), ("MN", "midwest"), ("MS", "south"), ("MO", "midwest"),
+    ("MT", "west"), ("NE", "midwest"), ("NV", "west"), ("NH", "northeast"), ("NJ", "northeast"),
+    ("NM", "southwest"), ("NY", "northeast"), ("NC", "southeast"), ("ND", "midwest"), ("OH", "midwest"),
+    ("OK", "southwest"), ("OR", "pacific_northwest"), ("PA", "northeast"), ("RI", "northeast"),
+    ("SC", "southeast"), ("SD", "midwest"), ("TN", "southeast"), ("TX", "southwest"), ("UT", "west"),
+    ("VT", "northeast"), ("VA", "southeast"), ("WA", "pacific_northwest"), ("WV", "south"),
+    ("WI", "midwest"), ("WY", "west")
+)
+DISTRICT_NAMES = (
+    "Downtown", "Financial District", "Harbor District", "Old Town", "Tech Park", "Midtown",
+    "Riverside", "University District", "Arts District", "Innovation Quarter", "Market Square",
+    "Uptown", "Civic Center", "Medical District", "Warehouse District", "Lakefront"
+)
+INDUSTRIES = (
+    "Technology", "Finance", "Healthcare", "Energy", "Logistics", "Retail", "Media",
+    "Biotechnology", "Manufacturing", "Insurance", "Hospitality", "Aerospace",
+    "Telecommunications", "Real Estate", "Education", "Legal Services", "Consulting",
+    "Agriculture", "Automotive", "Pharmaceuticals"
+)
+FUNCTIONS = (
+    "Operations", "Finance", "Engineering", "Sales", "Marketing", "Compliance", "Research",
+    "Product", "Security", "Strategy", "Procurement", "Risk", "Data", "Communications",
+    "Human Resources", "Legal", "Customer Success", "Supply Chain", "Quality", "Facilities"
+)
+TITLE_PATTERNS = (
+    "Chief {} Officer", "VP of {}", "Director of {}", "Senior {} Manager", "{} Manager",
+    "{} Lead", "Senior {} Analyst", "{} Analyst", "{} Specialist", "{} Coordinator"
+)
+COMPANY_PREFIXES = (
+    "Apex", "Atlas", "Beacon", "Blue", "Bold", "Cardinal", "Cascade", "Civic", "Cobalt", "Core",
+    "Crown", "Delta", "Ember", "Evergreen", "First", "Frontier", "Global", "Granite", "Harbor", "Horizon",
+    "Keystone", "Liberty", "Lumen", "Meridian", "Metro", "Nova", "Oak", "Orion", "Pacific", "Paragon",
+    "Pinnacle", "Pioneer", "Prime", "Quantum", "Radiant", "Redwood", "Sable", "Sentinel", "Sierra", "Silver",
+    "Sterling", "Summit", "Titan", "Trident", "True", "Union", "Vanguard", "Vertex", "Vista", "Zenith",
+    "Alder", "Arrow", "Aurora", "Bridge", "Canyon", "Compass", "Falcon", "Harvest", "Ironwood", "Northstar"
+)
+COMPANY_CORES = (
+    "Analytics", "Bio", "Capital", "Cloud", "Data", "Dynamics", "Energy", "Freight", "Health", "Labs",
+    "Logic", "Media", "Motors", "Networks", "Pharma", "Power", "Retail", "Robotics", "Signal", "Software",
+    "Solar", "Systems", "Telecom", "Trust", "Ventures", "Works", "Aero", "Agri", "Cyber", "Design",
+    "Foods", "Genomics", "Insight", "Legal", "Logistics", "Materials", "Medical", "Mobility", "Realty", "Water",
+    "Advisory", "Audio", "Cargo", "Chemical", "Clinical", "Credit", "Digital", "Fabrication", "Fiber", "Fleet",
+    "Grid", "Hospitality", "Learning", "Marine", "Metrics", "Optics", "Payments", "Quantum", "Security", "Vision"
+)
+COMPANY_SUFFIXES = (
+    "Inc.", "Corp.", "Group", "Holdings", "Partners", "LLC", "Co.", "International",
+    "Industries", "Enterprises", "Solutions", "Technologies", "Associates", "Worldwide", "Global"
+)
+AGENCY_FUNCTIONS = (
+    "Revenue", "Transit", "Public Safety", "Health", "Housing", "Water", "Licensing", "Planning",
+    "Environmental", "Emergency Management", "Consumer Protection", "Labor", "Ports", "Parks", "Records"
+)
+AGENCY_TYPES = ("Authority", "Commission", "Bureau", "Department", "Office", "Agency", "Board", "Council")
+AGENCY_ROLES = {
+    "Authority": "Executive Director", "Commission": "Chairman", "Bureau": "Chief",
+    "Department": "Commissioner", "Office": "Director", "Agency": "Administrator",
+    "Board": "Chair", "Council": "President"
+}
+
+
+def _slug(name: str) -> str:
+    return "_".join("".join(c if c.isalnum() else " " for c in name.lower()).split())
+
+
+def _mixed_radix(index: int, radices: List[int]) -> List[int]:
+    digits = []
+    for radix in radices:
+        index, digit = divmod(index, radix)
+        digits.append(digit)
+    return digits
+
+
+class StaticDataExpander:
+    """
+    Procedurally synthesizes large, internally consistent catalogs for scale
+    testing: cities with valid NANP area codes and business districts,
+    companies with unique names and domains headquartered in those cities,
+    agencies with offices in them, and per-industry title hierarchies.
+
+    Every record is a pure function of (seed, kind, index): records are
+    generated one at a time and streamed into an expansion pack with
+    PackWriter, so memory stays bounded however many are requested and
+    the same seed always writes the same pack.
+    """
+
+    def __init__(self, seed: int = 0, companies: int = 10000,
+                 cities: Optional[int] = None, agencies: Optional[int] = None,
+                 reserved_codes: Iterable[str] = ()):
+        """
+        Args:
+            seed (int): Seed every record is derived from
+            companies (int): Companies to generate
+            cities (Optional[int]): Cities to generate (default companies // 25,
+                capped at the number of unused area codes)
+            agencies (Optional[int]): Agencies to generate (default companies // 50)
+            reserved_codes (Iterable[str]): Area codes already owned by cities of
+                the base pack; expanded cities never reuse them
+
+        Raises:
+            ValueError: If more cities, or agencies, are requested than can be
+                given distinct names and area codes
+        """
+        self.rng = SeededRNG(seed)
+        self.companies = companies
+
+        # Area codes are dealt out from a seeded shuffle of the valid codes no
+        # base city owns, each to a single city so area_code_city stays exact
+        reserved = set(reserved_codes)
+        self.area_codes = [f"{code}" for code in range(200, 1000)
+                           if valid_area_code(f"{code}") and f"{code}" not in reserved]
+        self.rng.stream(None, None, "expand_area_codes").shuffle(self.area_codes)
+
+        self.cities = cities if cities is not None else min(max(companies // 25, 1), len(self.area_codes))
+        self.agencies = agencies if agencies is not None else max(companies // 50, 1)
+
+        city_names = len(CITY_STEMS) * len(CITY_SUFFIXES) * len(CITY_PREFIXES)
+        agency_names = self.cities * len(AGENCY_FUNCTIONS) * len(AGENCY_TYPES)
+        if self.cities > city_names:
+            raise ValueError(f"At most {city_names} distinct cities can be generated")
+        if self.agencies > agency_names:
+            raise ValueError(f"At most {agency_names} distinct agencies fit {self.cities} cities")
+        if self.cities > len(self.area_codes):
+            raise ValueError(f"At most {len(self.area_codes)} cities fit the unused area codes")
+
+    def city_name(self, index: int) -> str:
+        """Distinct name of city index (stem, suffix and prefix by mixed radix)"""
+        stem, suffix, prefix = _mixed_radix(index, [len(CITY_STEMS), len(CITY_SUFFIXES), len(CITY_PREFIXES)])
+        return f"{CITY_PREFIXES[prefix]}{CITY_STEMS[stem]}{CITY_SUFFIXES[suffix]}"
+
+    def city(self, index: int) -> Tuple[str, Dict]:
+        rng = self.rng.stream(None, None, "expand_city", index)
+        name = self.city_name(index)
+        state, region = STATES[rng.randrange(len(STATES))]
+        # City i owns code i and, while spare codes last, the one self.cities past it
+        area_codes = [self.area_codes[index]]
+        overlay = self.cities + index
+        if rng.random() < 0.4 and overlay < len(self.area_codes):
+            area_codes.append(self.area_codes[overlay])
+        districts = [f"{name} {district}" for district in rng.sample(DISTRICT_NAMES, rng.randint(3, 6))]
+        industries = rng.sample(INDUSTRIES, 3)
+        return f"{region}/major_cities/{_slug(name)}", {
+            "name": name,
+            "state": state,
+            "area_codes": area_codes,
+            "business_districts": districts,
+            "industries": industries
+        }
+
+    def company(self, index: int) -> Tuple[str, Dict]:
+        rng = self.rng.stream(None, None, "expand_company", index)
+        # A stride coprime to the name space spreads neighbouring indices
+        # over different words; past the space a generation number is added
+        space = len(COMPANY_PREFIXES) * len(COMPANY_CORES) * len(COMPANY_SUFFIXES)
+        generation, position = divmod(index, space)
+        prefix, core, suffix = _mixed_radix(position * 7919 % space,
+                                            [len(COMPANY_PREFIXES), len(COMPANY_CORES), len(COMPANY_SUFFIXES)])
+        name = f"{COMPANY_PREFIXES[prefix]} {COMPANY_CORES[core]} {COMPANY_SUFFIXES[suffix]}"
+        if generation:
+            name = f"{name} {generation + 1}"
+        industry = INDUSTRIES[rng.randrange(len(INDUSTRIES))]
+        return f"expanded/{_slug(industry)}/{_slug(name)}", {
+            "name": name,
+            "domain": _slug(name).replace("_", "") + ".com",
+            "headquarters": self.city_name(rng.randrange(self.cities)),
+            "industry": industry,
+            "employees": f"{rng.choice([50, 200, 1000, 5000, 20000]):,}+"
+        }
+
+    def agency(self, index: int) -> Tuple[str, Dict]:
+        rng = self.rng.stream(None, None, "expand_agency", index)
+        function, agency_type, city_index = _mixed_radix(index, [len(AGENCY_FUNCTIONS), len(AGENCY_TYPES), self.cities])
+        city = self.city_name(city_index)
+        name = f"{city} {AGENCY_FUNCTIONS[function]} {AGENCY_TYPES[agency_type]}"
+        offices = sorted({self.city_name(rng.randrange(self.cities)) for _ in range(rng.randint(0, 3))} - {city})
+        return f"expanded/{_slug(city)}/{_slug(name)}", {
+            "name": name,
+            "abbreviation": "".join(word[0] for word in name.split() if word[0].isupper()),
+            "domain": _slug(name).replace("_", "") + ".gov",
+            "headquarters": city,
+            "leadership_role": AGENCY_ROLES[AGENCY_TYPES[agency_type]],
+            "regional_offices": offices
+        }
+
+    def hierarchy(self, index: int) -> Tuple[str, Dict]:
+        rng = self.rng.stream(None, None, "expand_hierarchy", index)
+        industry = INDUSTRIES[index]
+        functions = rng.sample(FUNCTIONS, 5)
+        return f"expanded/{_slug(industry)}", {
+            "name": industry,
+            "titles": [pattern.format(function) for function in functions for pattern in TITLE_PATTERNS]
+        }
+
+    def write(self, pack_path: Path) -> Dict[str, int]:
+        """
+        Stream every generated record into an expansion pack
+
+        Args:
+            pack_path (Path): Pack file to write (replaced atomically)
+
+        Returns:
+            Dict[str, int]: Records written per document
+        """
+        meta = {"kind": "expansion", "seed": self.rng.seed, "companies": self.companies,
+                "cities": self.cities, "agencies": self.agencies}
+        with PackWriter(pack_path, meta) as writer:
+            writer.add_records("modern_mappings/cities/major_cities", map(self.city, range(self.cities)))
+            writer.add_records("modern_mappings/business/companies", map(self.company, range(self.companies)))
+            writer.add_records("modern_mappings/government/agencies", map(self.agency, range(self.agencies)))
+            writer.add_records("modern_mappings/business/hierarchies", map(self.hierarchy, range(len(INDUSTRIES))))
+        return writer.counts
+
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="Generate static modern mapping data.")
+    parser.add_argument("--force", action="store_true", help="Rewrite every file even if unchanged.")
+    parser.add_argument("--expand", type=int, metavar="COMPANIES",
+                        help="Write a procedurally expanded catalog with this many companies "
+                             f"to {EXPANSION_FILENAME} instead.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the expanded catalog (default 0).")
+    args = parser.parse_args()
+
+    if args.expand is not None:
+        base_codes = LocationCatalog(MappingPack.open(DEFAULT_STATIC_PATH)).area_code_city
+        try:
+            expander = StaticDataExpander(args.seed, args.expand, reserved_codes=base_codes)
+        except ValueError as e:
+            parser.error(str(e))
+        pack_path = DEFAULT_STATIC_PATH / EXPANSION_FILENAME
+        started = datetime.now()
+        counts = expander.write(pack_path)
+        print(f"Expanded catalog (seed {args.seed}) written to {pack_path} "
+              f"in {(datetime.now() - started).total_seconds():.1f}s:")
+        for document, count in counts.items():
+            print(f"- {document}: {count} records")
+        return
+
     print("\nStatic Data Generator for Shakespeare Forensics Project")
     print("Created by RSGrizz")
     print(f"Version 1.2 - {datetime.now().strftime('%B %Y')}\n")
@@ -1065,7 +1355,7 @@ def main():
     generator = StaticDataGenerator()
     
     print("Generating static data files...")
-    success = generator.generate_all()
+    success = generator.generate_all(force=args.force)
     
     if success:
         print("\nData generation complete! Files have been created in:")
@@ -1,25 +1,22 @@
 """
-generators/__init__.py
+desktop_creator/src/core/__init__.py
 Created by RSGrizz
 
-Data generation module initialization
+Core play and character management module initialization
 """
 
-from .contact_generator import ContactGenerator
-from .sms_generator import SMSGenerator
-from .call_generator import CallGenerator
-
 __all__ = [
-    'ContactGenerator',
-    'SMSGenerator',
-    'CallGenerator'
+    "PlayManager",
+    "CharacterManager",
+    "PlayHTMLParser",
+    "parse_play_file",
+    "parse_play_html"
 ]
 
-def initialize_generators():
-    """Initialize all generators"""
-    return {
-        'contact': ContactGenerator(),
-        'sms': SMSGenerator(),
-        'call': CallGenerator()
-    }
+from .play_manager import PlayManager
+from .character_manager import CharacterManager
+from .play_parser import PlayHTMLParser, parse_play_file, parse_play_html
 
+import logging
+logger = logging.getLogger(__name__)
+logger.info("core package initialized")
@@ -0,0 +1,144 @@
+"""
+character_classifier.py
+Created by RSGrizz
+
+Keyword-based character type classification (ROYAL, MILITARY, NOBLE, ...).
+The rules table lives in modern_mappings/characters/type_rules.json and is
+compiled into one alternation regex, so a name that matches no rule costs
+a single scan no matter how many keywords the table holds.
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from utils.mapping_pack import load_static_json
+
+DEFAULT_RULES_PATH = Path("desktop_creator/data/static/modern_mappings/characters/type_rules.json")
+
+
+class CharacterType(NamedTuple):
+    """Classification result; keyword is None when the default type applied"""
+    type: str
+    keyword: Optional[str]
+
+
+class CharacterClassifier:
+    """
+    Classifies character names by the first rule whose keyword appears in
+    the upper-cased name.
+
+    Rule order is priority order: a name containing keywords of several
+    types gets the earliest type in the table, and within that type the
+    earliest listed keyword is reported.
+    """
+
+    def __init__(self, rules_path: Path = DEFAULT_RULES_PATH):
+        """
+        Initialize CharacterClassifier
+
+        Args:
+            rules_path (Path): type_rules.json to compile
+        """
+        self.logger = logging.getLogger(__name__)
+        self.rules_path = Path(rules_path)
+
+        rules = load_static_json(self.rules_path)
+        rules = rules.get("data", rules)
+
+        self.default_type: str = rules["default"]
+        self.types: List[str] = []
+        self.keywords: List[str] = []
+        self._keyword_types: List[int] = []
+        self._keyword_ranks: Dict[str, int] = {}
+        for type_rank, rule in enumerate(rules["rules"]):
+            self.types.append(rule["type"])
+            for keyword in rule["keywords"]:
+                keyword = keyword.upper()
+                self._keyword_ranks.setdefault(keyword, len(self.keywords))
+                self.keywords.append(keyword)
+                self._keyword_types.append(type_rank)
+
+        # One pass finds candidate keywords; classify() settles priority
+        alternation = "|".join(re.escape(k) for k in sorted(self._keyword_ranks, key=len, reverse=True))
+        self._pattern = re.compile(alternation) if self.keywords else None
+        self._cache: Dict[str, CharacterType] = {}
+
+    def classify(self, character_name: str) -> CharacterType:
+        """
+        Classify one character name
+
+        Args:
+            character_name (str): Name as it appears in the play
+
+        Returns:
+            CharacterType: (type, matched keyword)
+        """
+        result = self._cache.get(character_name)
+        if result is not None:
+            return result
+
+        best = None
+        name_upper = character_name.upper()
+        found = self._pattern.findall(name_upper) if self._pattern is not None else ()
+        if found:
+            # Keyword index order == (type rank, keyword order) order
+            best = min(self._keyword_ranks[keyword] for keyword in found)
+            # findall skips keywords overlapping an earlier match, so confirm
+            # no higher-priority keyword is hiding inside one
+            for keyword_id in range(best):
+                if self.keywords[keyword_id] in name_upper:
+                    best = keyword_id
+                    break
+
+        if best is None:
+            result = CharacterType(self.default_type, None)
+        else:
+            result = CharacterType(self.types[self._keyword_types[best]], self.keywords[best])
+        self._cache[character_name] = result
+        return result
+
+    def classify_many(self, character_names: Iterable[str]) -> Dict[str, CharacterType]:
+        """
+        Classify a batch of names (repeated names are classified once)
+
+        Args:
+            character_names (Iterable[str]): Names to classify
+
+        Returns:
+            Dict[str, CharacterType]: name -> classification
+        """
+        return {name: self.classify(name) for name in character_names}
+
+    def classify_corpus(self, plays: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, CharacterType]]:
+        """
+        Classify every character of every play in one call
+
+        Args:
+            plays (Dict[str, Iterable[str]]): play name -> character names
+
+        Returns:
+            Dict[str, Dict[str, CharacterType]]: play name -> name -> classification
+        """
+        return {play_name: self.classify_many(names) for play_name, names in plays.items()}
+
+
+def main():
+    """Classify the characters of every parsed play"""
+    from .play_manager import PlayManager
+
+    classifier = CharacterClassifier()
+    pm = PlayManager()
+    plays = {}
+    for play_name in pm.get_available_plays():
+        if pm.load_play(play_name):
+            plays[play_name] = pm.get_characters()
+
+    for play_name, characters in classifier.classify_corpus(plays).items():
+        print(f"\n{play_name}:")
+        for name, result in characters.items():
+            print(f"  {name}: {result.type} ({result.keyword or 'default'})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+character_index.py
+Created by RSGrizz
+
+Per-play speaker index: which lines each character speaks and how many
+scenes every pair of characters share. Built once when a play loads so
+character queries cost O(result) instead of a scan of the dialogue.
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Sequence
+
+
+class CharacterIndex:
+    """
+    Speaker -> line-ID postings and a speaker x speaker scene co-occurrence
+    matrix for one play.
+
+    Lines are numbered in scene order (the corpus.bin numbering), speakers
+    by order of first appearance.
+    """
+
+    def __init__(self,
+                 speakers: List[str],
+                 line_speaker: Sequence[int],
+                 scene_line_offsets: Sequence[int]):
+        self.speakers = speakers
+        self.speaker_ids = {name: i for i, name in enumerate(speakers)}
+        self.line_speaker = line_speaker
+        self.scene_line_offsets = scene_line_offsets
+
+        speaker_count = len(speakers)
+        self.speaker_lines: List[array] = [array("I") for _ in range(speaker_count)]
+        for line_id, speaker_id in enumerate(line_speaker):
+            self.speaker_lines[speaker_id].append(line_id)
+
+        # Scene membership per speaker, then pairwise shared-scene counts
+        self.speaker_scenes: List[array] = [array("I") for _ in range(speaker_count)]
+        self.co_occurrence: List[array] = [array("I", bytes(4 * speaker_count)) for _ in range(speaker_count)]
+        for scene_index in range(len(scene_line_offsets) - 1):
+            present = sorted({
+                line_speaker[line_id]
+                for line_id in range(scene_line_offsets[scene_index], scene_line_offsets[scene_index + 1])
+            })
+            for speaker_id in present:
+                self.speaker_scenes[speaker_id].append(scene_index)
+                row = self.co_occurrence[speaker_id]
+                for other_id in present:
+                    if other_id != speaker_id:
+                        row[other_id] += 1
+
+    @classmethod
+    def from_play_data(cls, play_data: Dict) -> "CharacterIndex":
+        """Build from a play in play_data.json layout"""
+        speaker_ids: Dict[str, int] = {}
+        line_speaker = array("H")
+        scene_line_offsets = array("I", [0])
+        for scene in play_data.get("dialogue", []):
+            for line in scene["lines"]:
+                line_speaker.append(speaker_ids.setdefault(line["speaker"], len(speaker_ids)))
+            scene_line_offsets.append(len(line_speaker))
+        return cls(list(speaker_ids), line_speaker, scene_line_offsets)
+
+    @classmethod
+    def from_corpus_play(cls, play) -> "CharacterIndex":
+        """Build from a CorpusPlay (reads the mapped arrays directly)"""
+        return cls(play.speakers, play.line_speaker, play.scene_line_offsets)
+
+    def scene_of_line(self, line_id: int) -> int:
+        """0-based scene index of a line"""
+        return bisect_right(self.scene_line_offsets, line_id) - 1
+
+    def lines_for(self, character_name: str) -> Sequence[int]:
+        """Line IDs spoken by a character (empty if unknown)"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return ()
+        return self.speaker_lines[speaker_id]
+
+    def scenes_for(self, character_name: str) -> Sequence[int]:
+        """0-based scene indexes a character speaks in"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return ()
+        return self.speaker_scenes[speaker_id]
+
+    def interactions_for(self, character_name: str) -> Dict[str, int]:
+        """Shared-scene counts with every other character (non-zero only)"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return {}
+        row = self.co_occurrence[speaker_id]
+        return {
+            self.speakers[other_id]: count
+            for other_id, count in enumerate(row)
+            if count
+        }
+
+    def interaction_matrix(self) -> Dict[str, Dict[str, int]]:
+        """Shared-scene counts for every character pair"""
+        return {name: self.interactions_for(name) for name in self.speakers}
@@ -7,14 +7,30 @@ Enhanced character modernization with comprehensive mapping rules
 
 import json
 import logging
-import random
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from utils.phone_allocator import PhoneNumberAllocator
+from utils.seeded_rng import SeededRNG
+
+from .modernization import ModernizationTables, modernize_play, modernize_plays, play_key
 
 class CharacterManager:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, phone_state: Optional[Path] = None):
+        """
+        Initialize CharacterManager
+
+        Args:
+            seed (Optional[int]): Scenario seed; the same seed always yields the
+                same personas (default: a random seed, kept in self.rng.seed)
+            phone_state (Optional[Path]): Saved phone allocator state; numbers
+                recorded there are never handed out again and new ones are
+                added after each modernization (default: in-memory only)
+        """
         self.logger = logging.getLogger(__name__)
+        self.rng = SeededRNG(seed)
+        self.phone_state = phone_state
+        self.phones = PhoneNumberAllocator.load(phone_state)
         
         # Load all mapping data
         self.mapping_path = Path("desktop_creator/data/static/modern_mappings")
@@ -23,220 +39,147 @@ class CharacterManager:
         # Initialize character storage
         self.modern_mappings = {}
         self.relationship_graph = {}
-        
-        # Modern context settings
-        self.current_context = None
-        self.current_organization = None
+        self.graph_analytics = {}
 
     def _load_all_mappings(self):
         """Load all mapping files"""
-        # Play-specific mappings
-        self.play_mappings = {
-            "julius_caesar": {
-                "context": "government",
-                "organization": "United States Congress",
-                "location": "Washington DC",
-                "roles": {
-                    "CAESAR": "Speaker of the House",
-                    "BRUTUS": "House Majority Leader",
-                    "CASSIUS": "House Minority Whip",
-                    "ANTONY": "Senior Senator",
-                    "CICERO": "Senate Parliamentarian"
-                }
-            },
-            "hamlet": {
-                "context": "business",
-                "organization": "Denmark Global Enterprises",
-                "location": "New York",
-                "roles": {
-                    "HAMLET": "CEO",
-                    "CLAUDIUS": "Chairman of the Board",
-                    "POLONIUS": "Chief Legal Officer",
-                    "HORATIO": "Chief Operating Officer",
-                    "OPHELIA": "Head of Innovation"
-                }
-            },
-            "othello": {
-                "context": "military_contractor",
-                "organization": "Venice Security Solutions",
-                "location": "Chicago",
-                "roles": {
-                    "OTHELLO": "Chief Executive Officer",
-                    "IAGO": "Chief Operations Officer",
-                    "CASSIO": "Vice President of Operations",
-                    "DESDEMONA": "Chief Innovation Officer",
-                    "RODERIGO": "Regional Director"
-                }
-            },
-            "macbeth": {
-                "context": "politics",
-                "organization": "Scottish National Party",
-                "location": "Edinburgh",
-                "roles": {
-                    "MACBETH": "Party Leader",
-                    "LADY MACBETH": "Campaign Manager",
-                    "BANQUO": "Deputy Leader",
-                    "MACDUFF": "Opposition Leader",
-                    "DUNCAN": "Prime Minister"
-                }
-            },
-            "romeo_and_juliet": {
-                "context": "business_rivalry",
-                "organization": "Tech Industry",
-                "location": "San Francisco",
-                "roles": {
-                    "ROMEO": "CTO, Montague Tech",
-                    "JULIET": "CEO, Capulet Innovations",
-                    "MERCUTIO": "Venture Capitalist",
-                    "TYBALT": "Head of Security",
-                    "FRIAR LAURENCE": "Industry Consultant"
-                }
-            }
-        }
-
-        # Generic role mappings by context
-        self.generic_roles = {
-            "business": {
-                "noble": ["Executive", "Director", "Vice President"],
-                "advisor": ["Consultant", "Analyst", "Advisor"],
-                "servant": ["Assistant", "Coordinator", "Associate"],
-                "soldier": ["Security Officer", "Protection Specialist", "Guard"],
-                "messenger": ["Communications Manager", "PR Representative", "Spokesperson"]
-            },
-            "government": {
-                "noble": ["Senator", "Representative", "Secretary"],
-                "advisor": ["Chief of Staff", "Policy Advisor", "Legislative Director"],
-                "servant": ["Staff Assistant", "Administrative Aide", "Coordinator"],
-                "soldier": ["Security Detail", "Federal Agent", "Protection Officer"],
-                "messenger": ["Press Secretary", "Communications Director", "Media Liaison"]
-            }
-        }
-
-    def _generate_modern_name(self, original_name: str, context: str) -> Dict:
-        """Generate modern name and contact details"""
-        # Clean original name
-        clean_name = original_name.lower().replace(" ", "")
-        
-        # Generate email based on context and organization
-        org_domain = self.current_organization.lower().replace(" ", "")
-        email = f"{clean_name}@{org_domain}.com"
-        
-        # Generate phone number based on location
-        area_codes = {
-            "Washington DC": ["202", "703"],
-            "New York": ["212", "646"],
-            "Chicago": ["312", "773"],
-            "San Francisco": ["415", "628"],
-            "Los Angeles": ["213", "323"]
-        }
-        
-        area_code = random.choice(area_codes.get(self.current_context["location"], ["555"]))
-        phone = f"{area_code}-{random.randint(200,999)}-{random.randint(1000,9999)}"
-        
-        return {
-            "display_name": original_name,
-            "email": email,
-            "phone": phone,
-            "title": self._generate_title(original_name)
-        }
-
-    def _generate_title(self, name: str) -> str:
-        """Generate professional title"""
-        titles = {
-            "business": ["MBA", "PhD", "CPA"],
-            "government": ["JD", "PhD", "MA"],
-            "military_contractor": ["ret.", "MBA", "MS"],
-            "politics": ["MP", "PhD", "JD"]
-        }
-        
-        if random.random() < 0.3:  # 30% chance of having a title
-            return random.choice(titles.get(self.current_context["context"], []))
-        return ""
-    def _create_relationship_mapping(self, play_name: str) -> Dict:
-        """Create modern relationship mappings"""
-        relationships = {
-            "julius_caesar": {
-                "CAESAR": {
-                    "allies": ["ANTONY", "CALPURNIA"],
-                    "opponents": ["BRUTUS", "CASSIUS"],
-                    "subordinates": ["CINNA", "DECIUS"]
-                },
-                "BRUTUS": {
-                    "allies": ["CASSIUS", "CICERO"],
-                    "opponents": ["CAESAR", "ANTONY"],
-                    "subordinates": ["LUCIUS"]
-                }
-            },
-            "hamlet": {
-                "HAMLET": {
-                    "allies": ["HORATIO", "OPHELIA"],
-                    "opponents": ["CLAUDIUS", "POLONIUS"],
-                    "subordinates": ["ROSENCRANTZ", "GUILDENSTERN"]
-                },
-                "CLAUDIUS": {
-                    "allies": ["POLONIUS", "GERTRUDE"],
-                    "opponents": ["HAMLET"],
-                    "subordinates": ["OSRIC"]
-                }
-            }
-        }
-
-        return relationships.get(play_name, {})
-
-    def _modernize_relationships(self, character: str, relationships: Dict) -> Dict:
-        """Convert relationships to modern context"""
-        modern_rels = {
-            "reports_to": [],
-            "supervises": [],
-            "collaborates_with": [],
-            "conflicts_with": []
-        }
-
-        # Convert traditional relationships to modern organizational relationships
-        if "allies" in relationships:
-            modern_rels["collaborates_with"] = relationships["allies"]
-        if "opponents" in relationships:
-            modern_rels["conflicts_with"] = relationships["opponents"]
-        if "subordinates" in relationships:
-            modern_rels["supervises"] = relationships["subordinates"]
-
-        return modern_rels
-    def modernize_play_characters(self, play_name: str) -> Dict:
-        """Modernize all characters for a specific play"""
-        if play_name not in self.play_mappings:
+        self.mappings_file = self.mapping_path / "characters" / "play_mappings.json"
+        self.rules_file = self.mapping_path / "characters" / "type_rules.json"
+        self.tables = ModernizationTables.load(self.mappings_file, self.rules_file)
+
+        # Play-specific mappings and generic role mappings by context
+        self.play_mappings = self.tables.plays
+        self.generic_roles = self.tables.generic_roles
+
+    def modernize_play_characters(self, play_name: str, characters: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Modernize all characters for a specific play
+
+        Args:
+            play_name (str): Play name
+            characters (Optional[Iterable[str]]): Cast, needed for plays without
+                an explicit mapping
+
+        Returns:
+            Dict: character name -> modernized character
+        """
+        if not self.tables.has_mapping(play_name) and characters is None:
             self.logger.error(f"No mapping found for play: {play_name}")
             return {}
 
-        # Set current context
-        self.current_context = self.play_mappings[play_name]
-        self.current_organization = self.current_context["organization"]
-
-        # Get relationship mappings
-        relationships = self._create_relationship_mapping(play_name)
-
-        modernized_characters = {}
-        
-        # Modernize each character
-        for char_name, modern_role in self.current_context["roles"].items():
-            modern_char = {
-                "original_name": char_name,
-                "modern_details": self._generate_modern_name(char_name, self.current_context["context"]),
-                "role": modern_role,
-                "organization": self.current_organization,
-                "location": self.current_context["location"],
-                "relationships": self._modernize_relationships(char_name, relationships.get(char_name, {})),
-                "context": self.current_context["context"],
-                "metadata": {
-                    "modernized_date": datetime.now().isoformat(),
-                    "play": play_name
-                }
-            }
-            
-            modernized_characters[char_name] = modern_char
-
+        modernized_characters = modernize_play(self.tables, play_name, characters, self.rng,
+                                               phones=self.phones,
+                                               relationships=self._graph_for(play_name))
         self.modern_mappings = modernized_characters
+        self._save_phones()
         return modernized_characters
 
+    def modernize_all_plays(self,
+                            play_names: Optional[List[str]] = None,
+                            seed: Optional[int] = None,
+                            workers: int = 1,
+                            use_processes: bool = False) -> Dict[str, Dict]:
+        """
+        Modernize every available play (or a chosen subset) in one call
+
+        Args:
+            play_names (Optional[List[str]]): Plays to modernize (default: all available)
+            seed (Optional[int]): Scenario seed (default: this manager's seed)
+            workers (int): Parallel workers (0 = CPU count)
+            use_processes (bool): Use processes instead of threads
+
+        Returns:
+            Dict[str, Dict]: play name -> modernized characters
+        """
+        from .play_manager import PlayManager
+
+        pm = PlayManager()
+        if play_names is None:
+            play_names = pm.get_available_plays()
+
+        # Unmapped plays are modernized from their cast in play_data.json
+        play_characters = {}
+        for play_name in play_names:
+            if self.tables.has_mapping(play_name):
+                play_characters[play_name] = None
+            elif pm.load_play(play_name):
+                play_characters[play_name] = pm.get_characters()
+            else:
+                play_characters[play_name] = []
+
+        if seed is None:
+            seed = self.rng.seed
+        play_relationships = {play_name: self._graph_for(play_name) for play_name in play_names}
+        results = modernize_plays(self.tables, play_characters, seed, workers, use_processes,
+                                  self.mappings_file, self.rules_file, self.phones, play_relationships)
+        self._save_phones()
+        return results
+
+    def build_relationship_graph(self, play_names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Derive relationships from dialogue for every play (or a chosen subset)
+
+        Fills relationships.json in each play directory and
+        self.relationship_graph; plays whose dialogue is unchanged are
+        read back from their cached relationships.npz.
+
+        Args:
+            play_names (Optional[List[str]]): Plays to analyze (default: all available)
+
+        Returns:
+            Dict[str, Dict]: play name -> character -> {allies, opponents, associates, subordinates}
+        """
+        from .play_manager import PlayManager
+        from .relationship_graph import RelationshipEngine
+
+        engine = RelationshipEngine(PlayManager())
+        for play_name, graph in engine.get_canon_graphs(play_names).items():
+            self.relationship_graph[play_name] = graph.to_dict()
+        self.logger.info(f"Relationship graphs for {len(self.relationship_graph)} plays "
+                         f"({engine.computed} recomputed)")
+        return self.relationship_graph
+
+    def get_graph_analytics(self, play_name: str):
+        """
+        Centrality, communities and shortest paths of a play's relationship graph
+
+        Results are cached per play and recomputed only when that play's
+        entry in relationship_graph changes.
+
+        Args:
+            play_name (str): Play name
+
+        Returns:
+            Optional[PlayAnalytics]: Analytics, None if the play has no graph
+                (see build_relationship_graph)
+        """
+        from utils.build_manifest import data_sha256
+
+        from .graph_analytics import analyze_relationships
+
+        relationships = self._graph_for(play_name)
+        if relationships is None:
+            return None
+        key = play_key(play_name)
+        cached = self.graph_analytics.get(key)
+        if cached is None or cached.fingerprint != data_sha256(relationships):
+            cached = analyze_relationships(play_name, relationships)
+            self.graph_analytics[key] = cached
+        return cached
+
+    def _graph_for(self, play_name: str) -> Optional[Dict]:
+        """Derived relationships of a play, matched on its normalized name"""
+        key = play_key(play_name)
+        for name, relationships in self.relationship_graph.items():
+            if play_key(name) == key:
+                return relationships
+        return None
+
+    def _save_phones(self):
+        """Persist allocated phone numbers so later runs never reuse them"""
+        if self.phone_state is not None:
+            self.phones.save(self.phone_state)
+
 def main():
     # Example usage
     cm = CharacterManager()
@@ -0,0 +1,353 @@
+"""
+dialogue_index.py
+Created by RSGrizz
+
+Inverted index over play dialogue: token -> sorted line postings.
+Supports single-word, prefix and phrase queries across one or many plays,
+and persists next to corpus.bin so queries never rescan the text.
+"""
+
+import json
+import logging
+import mmap
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+INDEX_MAGIC = b"SHKIDX01"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+HEADER = struct.Struct("<8sQQ")
+ALIGNMENT = 8
+
+# Words with inner apostrophes stay whole ("o'er", "tradesman's")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a line"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def intersect_postings(left: Sequence[int], right: Sequence[int]) -> List[int]:
+    """Intersect two sorted postings lists"""
+    if len(left) > len(right):
+        left, right = right, left
+    result = []
+    position = 0
+    for value in left:
+        position = bisect_left(right, value, position)
+        if position == len(right):
+            break
+        if right[position] == value:
+            result.append(value)
+    return result
+
+
+def contains_phrase(tokens: List[str], phrase: List[str], prefix: bool = False) -> bool:
+    """Check whether a token list contains the phrase in order"""
+    size = len(phrase)
+    for start in range(len(tokens) - size + 1):
+        window = tokens[start:start + size]
+        if window[:-1] != phrase[:-1]:
+            continue
+        last = window[-1]
+        if last == phrase[-1] or (prefix and last.startswith(phrase[-1])):
+            return True
+    return False
+
+
+class DialogueIndex:
+    """
+    Token postings for a set of plays.
+
+    Lines are addressed by a global line ID: plays are laid out one after
+    another (play_line_base) and lines within a play follow scene order
+    (scene_line_offsets), the same numbering used by corpus.bin.
+    """
+
+    def __init__(self,
+                 plays: List[str],
+                 play_line_base: Sequence[int],
+                 scene_line_offsets: Dict[str, Sequence[int]],
+                 tokens: List[str],
+                 token_offsets: Sequence[int],
+                 postings: Sequence[int],
+                 source: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.plays = plays
+        self.play_line_base = play_line_base
+        self.scene_line_offsets = scene_line_offsets
+        self.tokens = tokens
+        self.token_offsets = token_offsets
+        self.postings = postings
+        self.source = source or {}
+        self._token_ids = {token: i for i, token in enumerate(tokens)}
+        self._play_ids = {play: i for i, play in enumerate(plays)}
+        self._map = None
+        self._file = None
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls,
+              documents: Iterable[Tuple[str, Sequence[int], Iterable[str]]],
+              source: Optional[Dict] = None) -> "DialogueIndex":
+        """
+        Build an index from (play_name, scene_line_offsets, line_texts) tuples
+
+        Args:
+            documents: Plays in corpus order; line_texts in scene order
+            source (Optional[Dict]): Fingerprint of the data that was indexed
+
+        Returns:
+            DialogueIndex: In-memory index
+        """
+        plays = []
+        play_line_base = [0]
+        scene_offsets = {}
+        token_lines: Dict[str, List[int]] = {}
+
+        line_id = 0
+        for play_name, offsets, line_texts in documents:
+            plays.append(play_name)
+            scene_offsets[play_name] = array("I", offsets)
+            for text in line_texts:
+                for token in set(tokenize(text)):
+                    token_lines.setdefault(token, []).append(line_id)
+                line_id += 1
+            play_line_base.append(line_id)
+
+        tokens = sorted(token_lines)
+        token_offsets = array("I", [0])
+        postings = array("I")
+        for token in tokens:
+            postings.extend(token_lines[token])
+            token_offsets.append(len(postings))
+
+        return cls(plays, array("I", play_line_base), scene_offsets,
+                   tokens, token_offsets, postings, source)
+
+    @classmethod
+    def from_corpus(cls, corpus, source: Optional[Dict] = None) -> "DialogueIndex":
+        """Index every play of a PlayCorpus"""
+        def documents():
+            for play_name in corpus.plays:
+                play = corpus.get_play(play_name)
+                yield (play_name,
+                       play.scene_line_offsets,
+                       (play.line_text(i) for i in range(play.line_count)))
+        return cls.build(documents(), source)
+
+    @classmethod
+    def from_play_data(cls, play_name: str, play_data: Dict) -> "DialogueIndex":
+        """Index a single play in play_data.json layout"""
+        offsets = [0]
+        for scene in play_data.get("dialogue", []):
+            offsets.append(offsets[-1] + len(scene["lines"]))
+        line_texts = (
+            line["text"]
+            for scene in play_data.get("dialogue", [])
+            for line in scene["lines"]
+        )
+        return cls.build([(play_name, offsets, line_texts)])
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _little_endian(values: array) -> bytes:
+        if sys.byteorder != "little":
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.tobytes()
+
+    def save(self, index_path: Path):
+        """Write the index as a memory-mappable file"""
+        index_path = Path(index_path)
+        tmp_path = index_path.with_suffix(index_path.suffix + ".tmp")
+        sections = {}
+
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(INDEX_MAGIC, 0, 0))
+
+            def write_section(name, values):
+                f.write(b"\0" * (-f.tell() % ALIGNMENT))
+                payload = self._little_endian(array("I", values))
+                sections[name] = [f.tell(), len(payload)]
+                f.write(payload)
+
+            write_section("play_line_base", self.play_line_base)
+            write_section("token_offsets", self.token_offsets)
+            write_section("postings", self.postings)
+            for play_name in self.plays:
+                write_section(f"scenes:{play_name}", self.scene_line_offsets[play_name])
+
+            directory = json.dumps({
+                "version": INDEX_VERSION,
+                "plays": self.plays,
+                "tokens": self.tokens,
+                "sections": sections,
+                "source": self.source
+            }, ensure_ascii=False).encode("utf-8")
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            directory_offset = f.tell()
+            f.write(directory)
+            f.seek(0)
+            f.write(HEADER.pack(INDEX_MAGIC, directory_offset, len(directory)))
+
+        tmp_path.replace(index_path)
+
+    @classmethod
+    def load(cls, index_path: Path) -> "DialogueIndex":
+        """Memory-map a saved index"""
+        f = open(index_path, "rb")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, directory_offset, directory_length = HEADER.unpack_from(mapped, 0)
+        if magic != INDEX_MAGIC:
+            mapped.close()
+            f.close()
+            raise ValueError(f"Not a dialogue index file: {index_path}")
+
+        directory = json.loads(mapped[directory_offset:directory_offset + directory_length])
+        if directory.get("version") != INDEX_VERSION:
+            mapped.close()
+            f.close()
+            raise ValueError(f"Unsupported index version in {index_path}")
+
+        buffer = memoryview(mapped)
+        sections = directory["sections"]
+
+        def view(name):
+            offset, length = sections[name]
+            if sys.byteorder != "little":
+                # Stored little-endian: big-endian hosts read a swapped copy
+                values = array("I", buffer[offset:offset + length].tobytes())
+                values.byteswap()
+                return memoryview(values)
+            return buffer[offset:offset + length].cast("I")
+
+        index = cls(
+            directory["plays"],
+            view("play_line_base"),
+            {play: view(f"scenes:{play}") for play in directory["plays"]},
+            directory["tokens"],
+            view("token_offsets"),
+            view("postings"),
+            directory.get("source")
+        )
+        index._map = mapped
+        index._file = f
+        return index
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def token_postings(self, token: str) -> Sequence[int]:
+        """Global line IDs containing an exact token"""
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            return []
+        return self.postings[self.token_offsets[token_id]:self.token_offsets[token_id + 1]]
+
+    def prefix_postings(self, prefix: str) -> List[int]:
+        """Global line IDs containing any token that starts with prefix"""
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + "\uffff", start)
+        if end - start == 1:
+            return list(self.token_postings(self.tokens[start]))
+        merged = set()
+        for token_id in range(start, end):
+            merged.update(self.postings[self.token_offsets[token_id]:self.token_offsets[token_id + 1]])
+        return sorted(merged)
+
+    def locate(self, global_line_id: int) -> Tuple[str, int, int]:
+        """Map a global line ID to (play_name, scene_index, line_id within play)"""
+        play_id = bisect_right(self.play_line_base, global_line_id) - 1
+        play_name = self.plays[play_id]
+        line_id = global_line_id - self.play_line_base[play_id]
+        scene_index = bisect_right(self.scene_line_offsets[play_name], line_id) - 1
+        return play_name, scene_index, line_id
+
+    def _play_range(self, play_name: str) -> Tuple[int, int]:
+        play_id = self._play_ids[play_name]
+        return self.play_line_base[play_id], self.play_line_base[play_id + 1]
+
+    def search(self,
+               query: str,
+               prefix: bool = False,
+               plays: Optional[Iterable[str]] = None,
+               line_text: Optional[Callable[[str, int], str]] = None) -> List[Tuple[str, int, int]]:
+        """
+        Find lines matching a word, prefix or phrase query
+
+        Args:
+            query (str): One or more words; several words form a phrase
+            prefix (bool): Treat the last word as a prefix
+            plays (Optional[Iterable[str]]): Restrict to these plays (default: all)
+            line_text (Optional[Callable]): line_text(play_name, line_id) used to
+                confirm word order for phrase queries
+
+        Returns:
+            List[Tuple[str, int, int]]: (play_name, scene_index, line_id) in corpus order
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Rarest terms first keeps the intersections small
+        term_postings = [self.token_postings(term) for term in terms[:-1]]
+        term_postings.append(
+            self.prefix_postings(terms[-1]) if prefix else self.token_postings(terms[-1])
+        )
+        term_postings.sort(key=len)
+        candidates = term_postings[0]
+        for postings in term_postings[1:]:
+            if not candidates:
+                break
+            candidates = intersect_postings(candidates, postings)
+
+        if plays is not None:
+            ranges = [self._play_range(p) for p in plays if p in self._play_ids]
+            candidates = [
+                line for line in candidates
+                if any(start <= line < end for start, end in ranges)
+            ]
+
+        results = []
+        for global_line_id in candidates:
+            location = self.locate(global_line_id)
+            if len(terms) > 1 and line_text is not None:
+                if not contains_phrase(tokenize(line_text(location[0], location[2])), terms, prefix):
+                    continue
+            results.append(location)
+        return results
+
+    def close(self):
+        """Release the memory map of a loaded index"""
+        if self._map is None:
+            return
+        for view in (self.play_line_base, self.token_offsets, self.postings,
+                     *self.scene_line_offsets.values()):
+            view.release()
+        self._map.close()
+        self._file.close()
+        self._map = None
+        self._file = None
+
+
+def index_path_for(corpus_path: Path) -> Path:
+    """Location of the index that accompanies a corpus file"""
+    return Path(corpus_path).with_suffix(INDEX_SUFFIX)
+
+
+def corpus_fingerprint(corpus_path: Path) -> Dict:
+    """Size and mtime of the corpus an index was built from"""
+    stat = Path(corpus_path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
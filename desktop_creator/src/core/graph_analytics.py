@@ -0,0 +1,409 @@
+"""
+graph_analytics.py
+Created by RSGrizz
+
+Centrality, communities and shortest paths over a play's relationship
+graph, computed with SciPy sparse graph routines and dense NumPy
+broadcasting (casts are small; every pass is vectorized over all pairs).
+Results are cached as graph_analytics.npz and drive how much each pair of
+characters communicates in the generated data.
+
+    degree        weighted degree (tie strength), normalized to [0, 1]
+    betweenness   share of shortest paths through a character (hop metric)
+    communities   label propagation over the weighted ties
+    activity      0.5 * degree + 0.5 * betweenness, used to scale volume
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from utils.build_manifest import data_sha256
+
+from .relationship_graph import RELATION_KINDS, RelationshipEngine, RelationshipGraph
+
+ANALYTICS_FILENAME = "graph_analytics.npz"
+ANALYTICS_VERSION = 1
+
+# Passes of label propagation before giving up on convergence
+MAX_PROPAGATION_ROUNDS = 50
+
+
+def _undirected(adjacency: Mapping[str, sparse.spmatrix], size: int) -> sparse.csr_matrix:
+    """Symmetric tie-strength matrix combining every relationship kind"""
+    combined = sparse.csr_matrix((size, size), dtype=np.float64)
+    for matrix in adjacency.values():
+        combined = combined + matrix.astype(np.float64)
+    combined = combined.maximum(combined.T).tocsr()
+    combined.setdiag(0)
+    combined.eliminate_zeros()
+    return combined
+
+
+def _betweenness(hops: np.ndarray, ties: sparse.csr_matrix) -> np.ndarray:
+    """
+    Normalized betweenness from an all-pairs hop matrix
+
+    Shortest-path counts are accumulated one distance layer at a time, then
+    v lies on an s-t shortest path iff d(s,v) + d(v,t) == d(s,t), carrying
+    sigma(s,v) * sigma(v,t) / sigma(s,t) of the s-t paths.
+    """
+    size = hops.shape[0]
+    if size < 3:
+        return np.zeros(size)
+
+    finite = np.isfinite(hops)
+    reach = np.where(finite, hops, -1).astype(np.int64)
+    binary = (ties > 0).astype(np.float64)
+
+    sigma = np.eye(size)
+    for distance in range(1, int(reach.max()) + 1):
+        previous = np.where(reach == distance - 1, sigma, 0.0)
+        sigma = np.where(reach == distance, np.asarray(previous @ binary), sigma)
+
+    betweenness = np.zeros(size)
+    safe_sigma = np.where(sigma > 0, sigma, 1.0)
+    for v in range(size):
+        through = (finite[:, v, None] & finite[None, v, :]
+                   & (hops[:, v, None] + hops[None, v, :] == hops))
+        through[v, :] = False
+        through[:, v] = False
+        np.fill_diagonal(through, False)
+        betweenness[v] = np.sum(through * sigma[:, v, None] * sigma[None, v, :] / safe_sigma)
+
+    # Each unordered pair was counted twice
+    return betweenness / ((size - 1) * (size - 2))
+
+
+def _communities(ties: sparse.csr_matrix) -> np.ndarray:
+    """
+    Community label per node by weighted label propagation
+
+    Nodes update one at a time in a fixed order (strongest first) straight
+    from the CSR arrays, which converges where synchronous updates oscillate;
+    ties between label scores keep the current label, then take the lowest.
+    """
+    size = ties.shape[0]
+    labels = np.arange(size)
+    if size == 0 or ties.nnz == 0:
+        return labels
+
+    indptr, indices, data = ties.indptr, ties.indices, ties.data
+    order = np.argsort(-np.asarray(ties.sum(axis=1)).ravel(), kind="stable")
+    for _ in range(MAX_PROPAGATION_ROUNDS):
+        changed = False
+        for node in order:
+            start, end = indptr[node], indptr[node + 1]
+            if start == end:
+                continue
+            scores = np.bincount(labels[indices[start:end]], weights=data[start:end], minlength=size)
+            if scores[labels[node]] < scores.max():
+                labels[node] = int(scores.argmax())
+                changed = True
+        if not changed:
+            break
+
+    # Renumber 0..k-1, largest community first
+    unique, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.lexsort((unique, -counts))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return rank[inverse]
+
+
+class PlayAnalytics:
+    """Centrality, communities and shortest paths of one play's graph"""
+
+    def __init__(self,
+                 play_name: str,
+                 speakers: List[str],
+                 ties: sparse.csr_matrix,
+                 degree: np.ndarray,
+                 betweenness: np.ndarray,
+                 communities: np.ndarray,
+                 hops: np.ndarray,
+                 predecessors: np.ndarray,
+                 fingerprint: str):
+        self.play_name = play_name
+        self.speakers = speakers
+        self.speaker_ids = {name: i for i, name in enumerate(speakers)}
+        self.ties = ties
+        self.degree = degree
+        self.betweenness = betweenness
+        self.communities = communities
+        self.hops = hops
+        self.predecessors = predecessors
+        self.fingerprint = fingerprint
+
+    @property
+    def activity(self) -> np.ndarray:
+        """Per-character communication activity in [0, 1]"""
+        return 0.5 * self.degree + 0.5 * self.betweenness_scaled
+
+    @property
+    def betweenness_scaled(self) -> np.ndarray:
+        peak = self.betweenness.max() if self.betweenness.size else 0.0
+        return self.betweenness / peak if peak > 0 else self.betweenness
+
+    def centrality(self, character_name: str) -> Dict[str, float]:
+        """Degree, betweenness and activity of one character ({} if unknown)"""
+        i = self.speaker_ids.get(character_name)
+        if i is None:
+            return {}
+        return {
+            "degree": float(self.degree[i]),
+            "betweenness": float(self.betweenness[i]),
+            "activity": float(self.activity[i])
+        }
+
+    def ranking(self, measure: str = "activity") -> List[Tuple[str, float]]:
+        """Characters ordered by a centrality measure, highest first"""
+        values = getattr(self, measure)
+        order = np.lexsort((np.arange(values.size), -values))
+        return [(self.speakers[i], float(values[i])) for i in order]
+
+    def community_members(self, min_size: int = 1) -> List[List[str]]:
+        """Members of each community (largest first), most active member first"""
+        activity = self.activity
+        groups = []
+        for label in range(int(self.communities.max()) + 1 if self.communities.size else 0):
+            members = np.flatnonzero(self.communities == label)
+            if members.size >= min_size:
+                members = members[np.lexsort((members, -activity[members]))]
+                groups.append([self.speakers[i] for i in members])
+        return groups
+
+    def group_chats(self,
+                    min_size: int = 3,
+                    max_size: int = 12,
+                    characters: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Group chat seeds: one per community of at least min_size members
+
+        Args:
+            min_size (int): Smallest chat
+            max_size (int): Members kept per chat
+            characters (Optional[Sequence[str]]): Cast to draw members from
+                (default: every speaker)
+
+        Returns:
+            List[Dict]: {"name", "members"} with the most active members first
+        """
+        included = set(characters) if characters is not None else None
+        chats = []
+        for members in self.community_members():
+            if included is not None:
+                members = [name for name in members if name in included]
+            if len(members) < min_size:
+                continue
+            members = members[:max_size]
+            chats.append({"name": f"{members[0]} & co", "members": members})
+        return chats
+
+    def shortest_path(self, source: str, target: str) -> List[str]:
+        """Fewest-hops chain of acquaintances from source to target ([] if none)"""
+        i, j = self.speaker_ids.get(source), self.speaker_ids.get(target)
+        if i is None or j is None or not np.isfinite(self.hops[i, j]):
+            return []
+        path = [j]
+        while path[-1] != i:
+            path.append(int(self.predecessors[i, path[-1]]))
+        return [self.speakers[k] for k in reversed(path)]
+
+    def distance(self, source: str, target: str) -> Optional[int]:
+        i, j = self.speaker_ids.get(source), self.speaker_ids.get(target)
+        if i is None or j is None or not np.isfinite(self.hops[i, j]):
+            return None
+        return int(self.hops[i, j])
+
+    def communication_weights(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        How strongly each tied pair should communicate
+
+        weight(i, j) = tie strength * (1 + activity(i) + activity(j)), for
+        i < j, so central characters talk more and strangers not at all.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: rows, cols, weights
+        """
+        upper = sparse.triu(self.ties, k=1).tocoo()
+        activity = self.activity
+        weights = upper.data * (1.0 + activity[upper.row] + activity[upper.col])
+        return upper.row, upper.col, weights
+
+    def save(self, cache_path: Path):
+        """Write the analytics to a single .npz"""
+        np.savez_compressed(
+            cache_path,
+            version=np.array(ANALYTICS_VERSION),
+            fingerprint=np.array(self.fingerprint),
+            speakers=np.array(self.speakers, dtype=str),
+            size=np.array(self.ties.shape[0]),
+            ties_data=self.ties.data,
+            ties_indices=self.ties.indices,
+            ties_indptr=self.ties.indptr,
+            degree=self.degree,
+            betweenness=self.betweenness,
+            communities=self.communities,
+            hops=self.hops,
+            predecessors=self.predecessors
+        )
+
+    @classmethod
+    def load(cls, play_name: str, cache_path: Path) -> Optional["PlayAnalytics"]:
+        """Read a cached .npz, None if missing or from another version"""
+        try:
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if int(cached["version"]) != ANALYTICS_VERSION:
+                    return None
+                size = int(cached["size"])
+                ties = sparse.csr_matrix(
+                    (cached["ties_data"], cached["ties_indices"], cached["ties_indptr"]),
+                    shape=(size, size)
+                )
+                return cls(play_name, [str(name) for name in cached["speakers"]], ties,
+                           cached["degree"], cached["betweenness"], cached["communities"],
+                           cached["hops"], cached["predecessors"], str(cached["fingerprint"]))
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+
+
+def analyze_graph(play_name: str,
+                  speakers: List[str],
+                  adjacency: Mapping[str, sparse.spmatrix],
+                  fingerprint: str) -> PlayAnalytics:
+    """
+    Compute analytics for one play
+
+    Args:
+        play_name (str): Play name
+        speakers (List[str]): Node names by index
+        adjacency (Mapping): relationship kind -> weighted square matrix
+        fingerprint (str): Identity of the input graph, stored with the results
+
+    Returns:
+        PlayAnalytics: Analytics of the play
+    """
+    size = len(speakers)
+    ties = _undirected(adjacency, size)
+
+    strength = np.asarray(ties.sum(axis=1)).ravel()
+    degree = strength / strength.max() if size and strength.max() > 0 else np.zeros(size)
+
+    if size:
+        hops, predecessors = csgraph.shortest_path(ties, method="D", directed=False,
+                                                   unweighted=True, return_predecessors=True)
+    else:
+        hops, predecessors = np.zeros((0, 0)), np.zeros((0, 0), dtype=np.int32)
+
+    return PlayAnalytics(play_name, speakers, ties, degree, _betweenness(hops, ties),
+                         _communities(ties), hops, predecessors.astype(np.int32), fingerprint)
+
+
+def analyze_relationship_graph(graph: RelationshipGraph) -> PlayAnalytics:
+    """Analytics of a RelationshipGraph (tie strength = turns exchanged)"""
+    return analyze_graph(graph.play_name, graph.speakers, graph.adjacency, graph.fingerprint)
+
+
+def analyze_relationships(play_name: str, relationships: Mapping[str, Mapping]) -> PlayAnalytics:
+    """
+    Analytics of a relationships.json-style mapping (e.g. one play of
+    CharacterManager.relationship_graph); every listed tie has weight 1
+
+    Args:
+        play_name (str): Play name
+        relationships (Mapping): character -> {allies, opponents, associates, subordinates}
+
+    Returns:
+        PlayAnalytics: Analytics of the play
+    """
+    names = dict.fromkeys(relationships)
+    for entry in relationships.values():
+        for kind in RELATION_KINDS:
+            names.update(dict.fromkeys(entry.get(kind, ())))
+    speakers = list(names)
+    ids = {name: i for i, name in enumerate(speakers)}
+
+    adjacency = {}
+    for kind in RELATION_KINDS:
+        pairs = [(ids[name], ids[other])
+                 for name, entry in relationships.items()
+                 for other in entry.get(kind, ())]
+        rows = np.array([p[0] for p in pairs], dtype=np.int64)
+        cols = np.array([p[1] for p in pairs], dtype=np.int64)
+        adjacency[kind] = sparse.csr_matrix((np.ones(len(pairs)), (rows, cols)),
+                                            shape=(len(speakers), len(speakers)))
+    return analyze_graph(play_name, speakers, adjacency, data_sha256(relationships))
+
+
+class GraphAnalyzer:
+    """
+    Computes and caches analytics for plays known to a PlayManager.
+
+    Cached graph_analytics.npz files are reused while the relationship
+    graph they were computed from is unchanged.
+    """
+
+    def __init__(self, play_manager, engine: Optional[RelationshipEngine] = None):
+        self.logger = logging.getLogger(__name__)
+        self.play_manager = play_manager
+        self.engine = engine or RelationshipEngine(play_manager)
+        self.cache: Dict[str, PlayAnalytics] = {}
+
+    def get_play_analytics(self, play_name: str) -> Optional[PlayAnalytics]:
+        """
+        Analytics of a play, recomputed only if its relationship graph changed
+
+        Args:
+            play_name (str): Play to analyze
+
+        Returns:
+            Optional[PlayAnalytics]: Analytics, None if the play cannot be loaded
+        """
+        if play_name in self.cache:
+            return self.cache[play_name]
+
+        graph = self.engine.get_play_graph(play_name)
+        if graph is None:
+            return None
+
+        cache_path = self.play_manager.base_path / play_name / ANALYTICS_FILENAME
+        analytics = PlayAnalytics.load(play_name, cache_path)
+        if analytics is None or analytics.fingerprint != graph.fingerprint:
+            analytics = analyze_relationship_graph(graph)
+            try:
+                analytics.save(cache_path)
+            except OSError as e:
+                self.logger.warning(f"Could not cache graph analytics for {play_name}: {e}")
+
+        self.cache[play_name] = analytics
+        return analytics
+
+    def get_canon_analytics(self, plays: Optional[List[str]] = None) -> Dict[str, PlayAnalytics]:
+        """Analytics for every available play (or a chosen subset)"""
+        results = {}
+        for play_name in plays or self.play_manager.get_available_plays():
+            analytics = self.get_play_analytics(play_name)
+            if analytics is not None:
+                results[play_name] = analytics
+        return results
+
+
+def main():
+    """Print the most central characters and communities of every play"""
+    from .play_manager import PlayManager
+
+    logging.basicConfig(level=logging.WARNING)
+    analyzer = GraphAnalyzer(PlayManager())
+    for play_name, analytics in analyzer.get_canon_analytics().items():
+        top = ", ".join(name for name, _ in analytics.ranking()[:3])
+        print(f"{play_name}: central {top}; {len(analytics.community_members(3))} communities")
+        print(json.dumps(analytics.group_chats()[:2], ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+interaction_matrices.py
+Created by RSGrizz
+
+Sparse speaker x speaker interaction matrices for every play, computed with
+vectorized NumPy/SciPy operations on top of PlayManager and cached as
+interactions.npz next to each play's play_data.json.
+
+Three weights are produced per play:
+    copresence       scenes in which both characters speak
+    replies          times column speaker's turn directly follows row speaker's
+    lines_addressed  lines the row speaker spoke in turns answered by column speaker
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+MATRIX_KINDS = ("copresence", "replies", "lines_addressed")
+CACHE_FILENAME = "interactions.npz"
+CACHE_VERSION = 1
+
+
+def dialogue_fingerprint(speakers: List[str],
+                         line_speaker: np.ndarray,
+                         scene_line_offsets: np.ndarray) -> str:
+    """Hash of the dialogue structure the matrices are derived from"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(speakers, ensure_ascii=False).encode("utf-8"))
+    digest.update(np.ascontiguousarray(line_speaker, dtype=np.uint32).tobytes())
+    digest.update(np.ascontiguousarray(scene_line_offsets, dtype=np.uint32).tobytes())
+    return digest.hexdigest()
+
+
+class PlayInteractions:
+    """Interaction matrices for one play (all CSR, speakers x speakers)"""
+
+    def __init__(self,
+                 play_name: str,
+                 speakers: List[str],
+                 matrices: Dict[str, sparse.csr_matrix],
+                 fingerprint: str):
+        self.play_name = play_name
+        self.speakers = speakers
+        self.speaker_ids = {name: i for i, name in enumerate(speakers)}
+        self.matrices = matrices
+        self.fingerprint = fingerprint
+
+    @property
+    def copresence(self) -> sparse.csr_matrix:
+        return self.matrices["copresence"]
+
+    @property
+    def replies(self) -> sparse.csr_matrix:
+        return self.matrices["replies"]
+
+    @property
+    def lines_addressed(self) -> sparse.csr_matrix:
+        return self.matrices["lines_addressed"]
+
+    def weights_for(self, character_name: str, kind: str = "replies") -> Dict[str, int]:
+        """Non-zero row of one matrix as {other character: weight}"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return {}
+        row = self.matrices[kind].getrow(speaker_id)
+        return {self.speakers[j]: int(w) for j, w in zip(row.indices, row.data)}
+
+    def save(self, cache_path: Path):
+        """Write all matrices to a single .npz"""
+        arrays = {
+            "version": np.array(CACHE_VERSION),
+            "fingerprint": np.array(self.fingerprint),
+            "speakers": np.array(self.speakers, dtype=str),
+        }
+        for kind, matrix in self.matrices.items():
+            arrays[f"{kind}_data"] = matrix.data
+            arrays[f"{kind}_indices"] = matrix.indices
+            arrays[f"{kind}_indptr"] = matrix.indptr
+        np.savez_compressed(cache_path, **arrays)
+
+    @classmethod
+    def load(cls, play_name: str, cache_path: Path) -> Optional["PlayInteractions"]:
+        """Read a cached .npz, None if missing or from another cache version"""
+        try:
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if int(cached["version"]) != CACHE_VERSION:
+                    return None
+                speakers = [str(name) for name in cached["speakers"]]
+                size = len(speakers)
+                matrices = {
+                    kind: sparse.csr_matrix(
+                        (cached[f"{kind}_data"], cached[f"{kind}_indices"], cached[f"{kind}_indptr"]),
+                        shape=(size, size)
+                    )
+                    for kind in MATRIX_KINDS
+                }
+                return cls(play_name, speakers, matrices, str(cached["fingerprint"]))
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+
+
+def compute_interactions(play_name: str,
+                         speakers: List[str],
+                         line_speaker: Sequence[int],
+                         scene_line_offsets: Sequence[int],
+                         fingerprint: Optional[str] = None) -> PlayInteractions:
+    """
+    Compute the interaction matrices for one play
+
+    Args:
+        play_name (str): Play name
+        speakers (List[str]): Speaker names by speaker ID
+        line_speaker (Sequence[int]): Speaker ID of every line, in scene order
+        scene_line_offsets (Sequence[int]): First line of each scene (+ total)
+
+    Returns:
+        PlayInteractions: CSR matrices for the play
+    """
+    size = len(speakers)
+    line_speaker = np.asarray(line_speaker, dtype=np.int64)
+    offsets = np.asarray(scene_line_offsets, dtype=np.int64)
+    if fingerprint is None:
+        fingerprint = dialogue_fingerprint(speakers, line_speaker, offsets)
+
+    if line_speaker.size == 0:
+        empty = sparse.csr_matrix((size, size), dtype=np.int32)
+        return PlayInteractions(play_name, speakers, {kind: empty for kind in MATRIX_KINDS}, fingerprint)
+
+    scene_count = offsets.size - 1
+    line_scene = np.repeat(np.arange(scene_count), np.diff(offsets))
+
+    # Scene x speaker presence, then S^T S counts shared scenes
+    presence = sparse.csr_matrix(
+        (np.ones(line_speaker.size, dtype=np.int32), (line_scene, line_speaker)),
+        shape=(scene_count, size)
+    )
+    presence.data[:] = 1  # duplicates were summed; presence is binary
+    copresence = (presence.T @ presence).tocsr()
+    copresence.setdiag(0)
+    copresence.eliminate_zeros()
+
+    # Collapse consecutive lines by the same speaker in a scene into turns
+    boundary = np.empty(line_speaker.size, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (line_speaker[1:] != line_speaker[:-1]) | (line_scene[1:] != line_scene[:-1])
+    turn_starts = np.flatnonzero(boundary)
+    turn_speaker = line_speaker[turn_starts]
+    turn_scene = line_scene[turn_starts]
+    turn_length = np.diff(np.append(turn_starts, line_speaker.size))
+
+    # A turn followed by another speaker's turn in the same scene is a reply
+    follows = turn_scene[1:] == turn_scene[:-1]
+    source = turn_speaker[:-1][follows]
+    target = turn_speaker[1:][follows]
+
+    replies = sparse.csr_matrix(
+        (np.ones(source.size, dtype=np.int32), (source, target)),
+        shape=(size, size)
+    )
+    lines_addressed = sparse.csr_matrix(
+        (turn_length[:-1][follows].astype(np.int32), (source, target)),
+        shape=(size, size)
+    )
+    for matrix in (replies, lines_addressed):
+        matrix.sum_duplicates()
+
+    return PlayInteractions(play_name, speakers, {
+        "copresence": copresence.astype(np.int32),
+        "replies": replies,
+        "lines_addressed": lines_addressed
+    }, fingerprint)
+
+
+class InteractionAnalyzer:
+    """Computes and caches interaction matrices for plays known to a PlayManager"""
+
+    def __init__(self, play_manager):
+        self.logger = logging.getLogger(__name__)
+        self.play_manager = play_manager
+        self.cache: Dict[str, PlayInteractions] = {}
+
+    def _cache_path(self, play_name: str) -> Path:
+        return self.play_manager.base_path / play_name / CACHE_FILENAME
+
+    def get_play_interactions(self, play_name: str) -> Optional[PlayInteractions]:
+        """
+        Get interaction matrices for a play, computing them if the cache is stale
+
+        Args:
+            play_name (str): Play to analyze
+
+        Returns:
+            Optional[PlayInteractions]: Matrices, None if the play cannot be loaded
+        """
+        if play_name in self.cache:
+            return self.cache[play_name]
+
+        # Read through the cache so the manager's current play is left alone
+        entry = self.play_manager.get_play(play_name)
+        if entry is None:
+            return None
+
+        index = entry.character_index
+        line_speaker = np.asarray(index.line_speaker)
+        offsets = np.asarray(index.scene_line_offsets)
+        fingerprint = dialogue_fingerprint(index.speakers, line_speaker, offsets)
+
+        cache_path = self._cache_path(play_name)
+        interactions = PlayInteractions.load(play_name, cache_path)
+        if interactions is None or interactions.fingerprint != fingerprint:
+            interactions = compute_interactions(play_name, index.speakers, line_speaker, offsets, fingerprint)
+            try:
+                interactions.save(cache_path)
+            except OSError as e:
+                self.logger.warning(f"Could not cache interactions for {play_name}: {e}")
+
+        self.cache[play_name] = interactions
+        return interactions
+
+    def get_canon_interactions(self, plays: Optional[List[str]] = None) -> Dict[str, PlayInteractions]:
+        """
+        Interaction matrices for every available play (or a chosen subset)
+
+        Args:
+            plays (Optional[List[str]]): Plays to include (default: all available)
+
+        Returns:
+            Dict[str, PlayInteractions]: play name -> matrices
+        """
+        results = {}
+        for play_name in plays or self.play_manager.get_available_plays():
+            interactions = self.get_play_interactions(play_name)
+            if interactions is not None:
+                results[play_name] = interactions
+        return results
+
+
+def main():
+    """Compute and cache interaction matrices for the whole canon"""
+    from .play_manager import PlayManager
+
+    logging.basicConfig(level=logging.INFO)
+    analyzer = InteractionAnalyzer(PlayManager())
+    for play_name, interactions in analyzer.get_canon_interactions().items():
+        print(f"{play_name}: {len(interactions.speakers)} speakers, "
+              f"{interactions.replies.nnz} reply pairs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+location_catalog.py
+Created by RSGrizz
+
+Indexed location and business catalog built from the static modern
+mappings (cities, area codes, companies, hierarchies, agencies) in the
+mapping pack. Every lookup is a dict probe in either direction:
+
+    area code -> city             "773" -> Chicago
+    city      -> area codes, business districts, companies, agencies, titles
+    industry  -> companies, titles
+
+and draws go through precomputed tables (an alias table for cities,
+tuples for everything else), so generators can keep phone prefixes,
+addresses and employers consistent without walking the nested JSON.
+
+When Scripts/Generate_Static_data.py --expand has written an expansion
+pack next to the mapping pack, its records are added to the same indexes
+(area codes already owned by a hand-written city keep pointing there).
+"""
+
+import random
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.alias_table import AliasTable
+from utils.mapping_pack import DEFAULT_STATIC_PATH, EXPANSION_FILENAME, MappingPack, get_pack
+
+CITY_DOCUMENTS = (
+    "modern_mappings/cities/major_cities",
+    "modern_mappings/cities/additional_cities"
+)
+COMPANY_DOCUMENT = "modern_mappings/business/companies"
+AGENCY_DOCUMENT = "modern_mappings/government/agencies"
+HIERARCHY_DOCUMENT = "modern_mappings/business/hierarchies"
+CITY_LIST_DOCUMENT = "modern_mappings/locations/cities"
+CATALOG_DOCUMENTS = CITY_DOCUMENTS + (COMPANY_DOCUMENT, AGENCY_DOCUMENT, HIERARCHY_DOCUMENT, CITY_LIST_DOCUMENT)
+
+# Keys of hierarchies.json department_structures whose strings are job titles
+TITLE_KEYS = {"leadership", "roles", "hierarchy", "positions"}
+GOVERNMENT = "government"
+
+
+def location_key(name: str) -> str:
+    """Normalized city key: "New York City", "New York" and "new_york" match"""
+    name = name.split(",", 1)[0].replace("_", " ").strip().lower()
+    if name.endswith(" city"):
+        name = name[:-len(" city")]
+    return " ".join(name.split())
+
+
+def industry_key(industry: str) -> str:
+    return " ".join(industry.replace("_", " ").lower().split())
+
+
+class City(NamedTuple):
+    name: str
+    state: Optional[str]
+    region: Optional[str]
+    area_codes: Tuple[str, ...]
+    business_districts: Tuple[str, ...]
+    industries: Tuple[str, ...]
+    major_employers: Tuple[str, ...]
+
+
+class Organization(NamedTuple):
+    """A company or agency; city is the location_key of its headquarters"""
+    name: str
+    industry: str
+    city: Optional[str]
+    domain: str
+
+
+def _domain(name: str) -> str:
+    words = [word for word in "".join(c if c.isalnum() else " " for c in name.lower()).split()
+             if word not in {"inc", "corp", "corporation", "llc", "the", "of"}]
+    return "".join(words) + ".com"
+
+
+def _strings(value) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, dict) and isinstance(item.get("title"), str):
+                yield item["title"]
+
+
+def _department_titles(node, titles: List[str]):
+    """Collect job titles of one department_structures subtree"""
+    if isinstance(node, dict):
+        for key, child in node.items():
+            if key in TITLE_KEYS:
+                titles.extend(_strings(child))
+            _department_titles(child, titles)
+
+
+def _unique(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(value for value in values if value))
+
+
+class LocationCatalog:
+    """
+    Reverse indexes over the static location and business data.
+
+    Usage:
+        catalog = get_catalog()
+        catalog.city_for_area_code("773").name        # "Chicago"
+        catalog.companies_in("Seattle")
+        catalog.sample_title("Technology", rng)
+    """
+
+    def __init__(self, pack: MappingPack, expansion: Optional[MappingPack] = None):
+        """
+        Build the indexes
+
+        Args:
+            pack (MappingPack): Compiled static mappings
+            expansion (Optional[MappingPack]): Procedurally expanded records to add
+        """
+        self.packs = [pack] if expansion is None else [pack, expansion]
+        self.cities: Dict[str, City] = {}
+        self.city_titles: Dict[str, Tuple[str, ...]] = {}
+        self.area_code_city: Dict[str, str] = {}
+        self.city_organizations: Dict[str, Tuple[Organization, ...]] = {}
+        self.industry_organizations: Dict[str, Tuple[Organization, ...]] = {}
+        self.industry_titles: Dict[str, Tuple[str, ...]] = {}
+
+        self._load_cities(pack)
+        organizations = self._load_organizations()
+        self._load_titles(pack)
+
+        by_city: Dict[str, List[Organization]] = {}
+        by_industry: Dict[str, List[Organization]] = {}
+        for organization, offices in organizations:
+            by_industry.setdefault(industry_key(organization.industry), []).append(organization)
+            for office in offices:
+                by_city.setdefault(office, []).append(organization)
+        self.city_organizations = {key: tuple(values) for key, values in by_city.items()}
+        self.industry_organizations = {key: tuple(values) for key, values in by_industry.items()}
+
+        for key, city in self.cities.items():
+            for area_code in city.area_codes:
+                self.area_code_city.setdefault(area_code, key)
+
+        # Cities drawn in proportion to their area codes (a rough size proxy)
+        self._city_keys = tuple(self.cities)
+        self._city_table = AliasTable([max(len(self.cities[key].area_codes), 1) for key in self._city_keys])
+
+    def _records(self, document: str) -> Iterator[Tuple[str, Dict]]:
+        for pack in self.packs:
+            yield from pack.records(document)
+
+    def _load_cities(self, pack: MappingPack):
+        """City records of the region trees merged with the flat cities.json list"""
+        for document in CITY_DOCUMENTS:
+            for path, record in self._records(document):
+                if "state" not in record:
+                    continue  # named corridors and hubs, not cities
+                key = location_key(record["name"])
+                parts = path.split("/")
+                region = parts[-3] if len(parts) >= 3 else None
+                self._merge_city(key, City(
+                    name=record["name"],
+                    state=record.get("state"),
+                    region=region,
+                    area_codes=tuple(record.get("area_codes", ())),
+                    business_districts=tuple(record.get("business_districts", ())),
+                    industries=tuple(record.get("industries", ())),
+                    major_employers=tuple(record.get("major_employers", ()))
+                ))
+
+        for entry in pack.document(CITY_LIST_DOCUMENT, []):
+            key = location_key(entry["city"])
+            self._merge_city(key, City(entry["city"], None, None, tuple(entry.get("area_codes", ())), (), (), ()))
+            self.city_titles[key] = _unique(self.city_titles.get(key, ()) + tuple(entry.get("titles", ())))
+
+    def _merge_city(self, key: str, city: City):
+        known = self.cities.get(key)
+        if known is None:
+            self.cities[key] = city
+            return
+        self.cities[key] = City(
+            name=known.name,
+            state=known.state or city.state,
+            region=known.region or city.region,
+            area_codes=_unique(known.area_codes + city.area_codes),
+            business_districts=_unique(known.business_districts + city.business_districts),
+            industries=_unique(known.industries + city.industries),
+            major_employers=_unique(known.major_employers + city.major_employers)
+        )
+
+    def _load_organizations(self) -> List[Tuple[Organization, Tuple[str, ...]]]:
+        """Companies and agencies with the cities they have offices in"""
+        organizations = []
+        for _, record in self._records(COMPANY_DOCUMENT):
+            city = location_key(record["headquarters"]) if record.get("headquarters") else None
+            organization = Organization(record["name"], record.get("industry", "Business"), city,
+                                        record.get("domain") or _domain(record["name"]))
+            organizations.append((organization, (city,) if city else ()))
+
+        for _, record in self._records(AGENCY_DOCUMENT):
+            city = location_key(record["headquarters"]) if record.get("headquarters") else None
+            offices = [city] if city else []
+            for key in ("regional_offices", "field_offices"):
+                offices.extend(location_key(office) for office in record.get(key, ()))
+            domain = record.get("domain")
+            if not domain:
+                domain = f"{record['abbreviation'].lower()}.gov" if record.get("abbreviation") else _domain(record["name"])
+            organization = Organization(record["name"], GOVERNMENT, city, domain)
+            organizations.append((organization, _unique(offices)))
+
+        # Major employers named in the city records count as local companies
+        # (their industry is not recorded)
+        named = {organization.name for organization, _ in organizations}
+        for key, city in self.cities.items():
+            for employer in city.major_employers:
+                if employer not in named:
+                    organizations.append((Organization(employer, "Business", key, _domain(employer)), (key,)))
+        return organizations
+
+    def _load_titles(self, pack: MappingPack):
+        """Industry -> titles from the department structures and agency leadership roles"""
+        titles: Dict[str, List[str]] = {}
+        hierarchies = pack.document(HIERARCHY_DOCUMENT, {})
+        departments = hierarchies.get("data", hierarchies).get("department_structures", {})
+        for industry, structure in departments.items():
+            _department_titles(structure, titles.setdefault(industry_key(industry), []))
+        # Expanded hierarchies are flat records: {"name": industry, "titles": [...]}
+        for _, record in self._records(HIERARCHY_DOCUMENT):
+            titles.setdefault(industry_key(record["name"]), []).extend(_strings(record.get("titles", [])))
+        for _, record in self._records(AGENCY_DOCUMENT):
+            if record.get("leadership_role"):
+                titles.setdefault(GOVERNMENT, []).append(record["leadership_role"])
+        self.industry_titles = {key: _unique(values) for key, values in titles.items() if values}
+
+    def city(self, name: str) -> Optional[City]:
+        """City by any spelling of its name, None if unknown"""
+        return self.cities.get(location_key(name))
+
+    def city_for_area_code(self, area_code: str) -> Optional[City]:
+        """City an area code belongs to, None if no city uses it"""
+        key = self.area_code_city.get(str(area_code))
+        return self.cities[key] if key is not None else None
+
+    def area_codes(self, city: str) -> Tuple[str, ...]:
+        known = self.city(city)
+        return known.area_codes if known else ()
+
+    def companies_in(self, city: str) -> Tuple[Organization, ...]:
+        """Companies and agencies with an office in a city"""
+        return self.city_organizations.get(location_key(city), ())
+
+    def companies_in_industry(self, industry: str) -> Tuple[Organization, ...]:
+        return self.industry_organizations.get(industry_key(industry), ())
+
+    def titles_for(self, industry: str) -> Tuple[str, ...]:
+        return self.industry_titles.get(industry_key(industry), ())
+
+    def titles_in(self, city: str) -> Tuple[str, ...]:
+        """Typical job titles of a city (cities.json)"""
+        return self.city_titles.get(location_key(city), ())
+
+    def sample_city(self, rng: random.Random = random) -> City:
+        return self.cities[self._city_keys[self._city_table.sample(rng)]]
+
+    def sample_area_code(self, city: str, rng: random.Random = random) -> Optional[str]:
+        codes = self.area_codes(city)
+        return rng.choice(codes) if codes else None
+
+    def sample_company(self, city: str, rng: random.Random = random,
+                       industry: Optional[str] = None) -> Optional[Organization]:
+        """Employer with an office in the city, from the industry when one matches"""
+        local = self.companies_in(city)
+        if industry is not None:
+            matching = tuple(org for org in local if industry_key(org.industry) == industry_key(industry))
+            local = matching or local
+        return rng.choice(local) if local else None
+
+    def sample_title(self, industry: str, rng: random.Random = random) -> Optional[str]:
+        titles = self.titles_for(industry)
+        return rng.choice(titles) if titles else None
+
+    def address(self, city: str, rng: random.Random = random) -> str:
+        """Business address line for a city: "district, City, ST" where known"""
+        known = self.city(city)
+        if known is None:
+            return city
+        parts = [rng.choice(known.business_districts)] if known.business_districts else []
+        parts.append(known.name)
+        if known.state:
+            parts.append(known.state)
+        return ", ".join(parts)
+
+
+_catalogs: Dict[Path, LocationCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(static_path=DEFAULT_STATIC_PATH) -> LocationCatalog:
+    """
+    Shared catalog for this process, built from the mapping pack on first use
+
+    Includes the expansion pack (mapping_pack.expanded.db) when one exists.
+    """
+    key = Path(static_path).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            expansion_path = Path(static_path) / EXPANSION_FILENAME
+            expansion = MappingPack.open_file(expansion_path, static_path) if expansion_path.exists() else None
+            catalog = _catalogs[key] = LocationCatalog(get_pack(static_path), expansion)
+        return catalog
@@ -0,0 +1,314 @@
+"""
+modernization.py
+Created by RSGrizz
+
+Data-driven character modernization. Play contexts, role mappings and
+fallback rules are read once from modern_mappings/characters into
+immutable lookup tables; modernize_play is a pure function of those
+tables, the play and a scenario seed, so any number of plays can be
+modernized in parallel threads or processes.
+"""
+
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from utils.mapping_pack import load_static_json
+from utils.phone_allocator import PhoneNumberAllocator, random_number
+from utils.seeded_rng import SeededRNG
+
+from .character_classifier import DEFAULT_RULES_PATH, CharacterClassifier
+
+DEFAULT_MAPPINGS_PATH = Path("desktop_creator/data/static/modern_mappings/characters/play_mappings.json")
+
+
+def play_key(play_name: str) -> str:
+    """Normalized lookup key ("Julius_Caesar", "julius caesar" -> "julius_caesar")"""
+    return play_name.strip().lower().replace(" ", "_")
+
+
+class PlayContext(NamedTuple):
+    """Modern setting of one play"""
+    context: str
+    organization: str
+    org_domain: str
+    location: str
+    area_codes: Tuple[str, ...]
+    credentials: Tuple[str, ...]
+    roles: Mapping[str, str]
+    relationships: Mapping[str, Mapping]
+    mapped: bool
+
+
+class ModernizationTables:
+    """
+    Precompiled lookup tables for modernization (read-only after loading).
+
+    Explicitly mapped plays keep their hand-written roles; every other play
+    gets the default context and generic roles chosen by character type.
+    """
+
+    def __init__(self,
+                 mappings: Dict,
+                 classifier: CharacterClassifier):
+        mappings = mappings.get("data", mappings)
+        self.classifier = classifier
+        self.generic_roles = MappingProxyType({
+            context: MappingProxyType({category: tuple(roles) for category, roles in categories.items()})
+            for context, categories in mappings["generic_roles"].items()
+        })
+        self.type_categories = MappingProxyType(dict(mappings["type_categories"]))
+        self.default_context = MappingProxyType(dict(mappings["default_context"]))
+        self.location_area_codes = MappingProxyType({
+            location: tuple(codes) for location, codes in mappings["location_area_codes"].items()
+        })
+        self.default_area_codes = tuple(mappings["default_area_codes"])
+        self.credentials = MappingProxyType({
+            context: tuple(values) for context, values in mappings["credentials"].items()
+        })
+        self.credential_rate = mappings["credential_rate"]
+
+        relationships = mappings.get("relationships", {})
+        self.plays = MappingProxyType({
+            play_key(name): self._compile_context(
+                context, MappingProxyType(relationships.get(name, {})), mapped=True)
+            for name, context in mappings["plays"].items()
+        })
+
+    @classmethod
+    def load(cls,
+             mappings_path: Path = DEFAULT_MAPPINGS_PATH,
+             rules_path: Path = DEFAULT_RULES_PATH) -> "ModernizationTables":
+        """
+        Load and compile the mapping tables
+
+        Args:
+            mappings_path (Path): play_mappings.json
+            rules_path (Path): type_rules.json for character classification
+
+        Returns:
+            ModernizationTables: Compiled tables
+        """
+        return cls(load_static_json(mappings_path), CharacterClassifier(rules_path))
+
+    def _compile_context(self, context: Dict, relationships: Mapping, mapped: bool) -> PlayContext:
+        organization = context["organization"]
+        return PlayContext(
+            context=context["context"],
+            organization=organization,
+            org_domain=organization.lower().replace(" ", ""),
+            location=context["location"],
+            area_codes=self.location_area_codes.get(context["location"], self.default_area_codes),
+            credentials=self.credentials.get(context["context"], ()),
+            roles=MappingProxyType(dict(context.get("roles", {}))),
+            relationships=relationships,
+            mapped=mapped
+        )
+
+    def has_mapping(self, play_name: str) -> bool:
+        return play_key(play_name) in self.plays
+
+    def context_for(self, play_name: str) -> PlayContext:
+        """Mapped context of a play, or the default context filled in for it"""
+        context = self.plays.get(play_key(play_name))
+        if context is not None:
+            return context
+        title = play_name.replace("_", " ")
+        default = dict(self.default_context)
+        default["organization"] = default["organization"].format(title=title)
+        return self._compile_context(default, MappingProxyType({}), mapped=False)
+
+    def generic_role(self, context: str, character_name: str, rng: random.Random) -> str:
+        """Generic role for a character of an unmapped play, by character type"""
+        roles = self.generic_roles.get(context) or self.generic_roles[self.default_context["context"]]
+        category = self.type_categories.get(self.classifier.classify(character_name).type, "servant")
+        return rng.choice(roles[category])
+
+
+def _modern_relationships(relationships: Mapping) -> Dict:
+    """Convert traditional relationships to modern organizational relationships"""
+    return {
+        "reports_to": [],
+        "supervises": list(relationships.get("subordinates", [])),
+        "collaborates_with": list(relationships.get("allies", [])),
+        "conflicts_with": list(relationships.get("opponents", []))
+    }
+
+
+def _modern_details(character_name: str, context: PlayContext, credential_rate: float,
+                    rng: random.Random) -> Dict:
+    """Modern name, contact details and professional title"""
+    clean_name = character_name.lower().replace(" ", "")
+    phone = random_number(rng.choice(context.area_codes), rng)
+
+    title = ""
+    if rng.random() < credential_rate and context.credentials:
+        title = rng.choice(context.credentials)
+
+    return {
+        "display_name": character_name,
+        "email": f"{clean_name}@{context.org_domain}.com",
+        "phone": phone,
+        "title": title
+    }
+
+
+def modernize_play(tables: ModernizationTables,
+                   play_name: str,
+                   characters: Optional[Iterable[str]] = None,
+                   rng: Optional[SeededRNG] = None,
+                   modernized_date: Optional[str] = None,
+                   phones: Optional[PhoneNumberAllocator] = None,
+                   relationships: Optional[Mapping[str, Mapping]] = None) -> Dict:
+    """
+    Modernize the characters of one play
+
+    Args:
+        tables (ModernizationTables): Compiled mapping tables
+        play_name (str): Play name (any casing, spaces or underscores)
+        characters (Optional[Iterable[str]]): Cast for plays without an explicit
+            mapping (mapped plays use their mapped roles)
+        rng (Optional[SeededRNG]): Scenario RNG; each character draws from its
+            own (play, character, "persona") stream (default: random seed)
+        modernized_date (Optional[str]): Timestamp recorded in metadata (default: now)
+        phones (Optional[PhoneNumberAllocator]): Allocator that makes every
+            phone number unique (default: numbers are not deduplicated)
+        relationships (Optional[Mapping]): Dialogue-derived relationships
+            (relationships.json layout) for characters without mapped ones
+
+    Returns:
+        Dict: character name -> modernized character ({} if nothing to modernize)
+    """
+    rng = rng or SeededRNG()
+    modernized_date = modernized_date or datetime.now().isoformat()
+    context = tables.context_for(play_name)
+    key = play_key(play_name)
+    relationships = relationships or {}
+
+    if context.mapped:
+        cast = list(context.roles)
+    else:
+        cast = list(characters or ())
+
+    modernized = {}
+    for char_name in cast:
+        persona_rng = rng.stream(key, char_name, "persona")
+        if context.mapped:
+            modern_role = context.roles[char_name]
+        else:
+            modern_role = tables.generic_role(context.context, char_name, persona_rng)
+        modernized[char_name] = {
+            "original_name": char_name,
+            "modern_details": _modern_details(char_name, context, tables.credential_rate, persona_rng),
+            "role": modern_role,
+            "organization": context.organization,
+            "location": context.location,
+            "relationships": _modern_relationships(
+                context.relationships.get(char_name) or relationships.get(char_name, {})),
+            "context": context.context,
+            "metadata": {
+                "modernized_date": modernized_date,
+                "play": play_name
+            }
+        }
+    if phones is not None:
+        _claim_phones(modernized, phones)
+    return modernized
+
+
+def _claim_phones(modernized: Dict, phones: PhoneNumberAllocator):
+    """Replace every drawn phone number with a unique one (kept when free)"""
+    for character in modernized.values():
+        details = character["modern_details"]
+        details["phone"] = phones.claim(details["phone"])
+
+
+# Per-process tables for the process-pool path
+_worker_tables: Optional[ModernizationTables] = None
+
+
+def _init_worker(mappings_path: Path, rules_path: Path):
+    global _worker_tables
+    _worker_tables = ModernizationTables.load(mappings_path, rules_path)
+
+
+def _modernize_in_worker(play_name: str, characters: Optional[List[str]], seed: int, modernized_date: str,
+                         relationships: Optional[Mapping[str, Mapping]]) -> Dict:
+    return modernize_play(_worker_tables, play_name, characters, SeededRNG(seed), modernized_date,
+                          relationships=relationships)
+
+
+def modernize_plays(tables: ModernizationTables,
+                    play_characters: Mapping[str, Optional[Iterable[str]]],
+                    seed: Optional[int] = None,
+                    workers: int = 1,
+                    use_processes: bool = False,
+                    mappings_path: Path = DEFAULT_MAPPINGS_PATH,
+                    rules_path: Path = DEFAULT_RULES_PATH,
+                    phones: Optional[PhoneNumberAllocator] = None,
+                    play_relationships: Optional[Mapping[str, Mapping]] = None) -> Dict[str, Dict]:
+    """
+    Modernize many plays in one call
+
+    Every character draws from a stream keyed by (seed, play, character),
+    so results do not depend on worker count or scheduling order. Phone
+    numbers are made unique afterwards, play by play in input order, for
+    the same reason.
+
+    Args:
+        tables (ModernizationTables): Compiled mapping tables
+        play_characters (Mapping): play name -> cast (None for mapped plays)
+        seed (Optional[int]): Scenario seed (None draws a random one)
+        workers (int): Parallel workers (0 = CPU count)
+        use_processes (bool): Use a process pool instead of threads; workers
+            load their own tables from mappings_path/rules_path
+        phones (Optional[PhoneNumberAllocator]): Allocator that makes phone
+            numbers unique across all plays
+        play_relationships (Optional[Mapping]): play name -> dialogue-derived
+            relationships, used where play_mappings.json has none
+
+    Returns:
+        Dict[str, Dict]: play name -> modernized characters
+    """
+    logger = logging.getLogger(__name__)
+    rng = SeededRNG(seed)
+    modernized_date = datetime.now().isoformat()
+    workers = workers or os.cpu_count() or 1
+    play_relationships = play_relationships or {}
+    jobs = [(play_name, list(characters) if characters is not None else None)
+            for play_name, characters in play_characters.items()]
+
+    def run(play_name, characters):
+        return modernize_play(tables, play_name, characters, rng, modernized_date,
+                              relationships=play_relationships.get(play_name))
+
+    if workers == 1 or len(jobs) <= 1:
+        results = {play_name: run(play_name, characters) for play_name, characters in jobs}
+    elif use_processes:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mappings_path, rules_path)) as executor:
+            futures = {
+                play_name: executor.submit(_modernize_in_worker, play_name, characters, rng.seed, modernized_date,
+                                           play_relationships.get(play_name))
+                for play_name, characters in jobs
+            }
+            results = {play_name: future.result() for play_name, future in futures.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                play_name: executor.submit(run, play_name, characters)
+                for play_name, characters in jobs
+            }
+            results = {play_name: future.result() for play_name, future in futures.items()}
+
+    if phones is not None:
+        for play_name, _ in jobs:
+            _claim_phones(results[play_name], phones)
+
+    logger.info(f"Modernized {len(results)} plays (seed {rng.seed})")
+    return results
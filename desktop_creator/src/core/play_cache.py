@@ -0,0 +1,278 @@
+"""
+play_cache.py
+Created by RSGrizz
+
+Bounded LRU cache of loaded plays for PlayManager. Each cached play loads
+its sections (play data, relationships, generated data) and derived indexes
+on first access, and the cache evicts least recently used plays once the
+estimated memory of everything loaded exceeds the budget.
+"""
+
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .character_index import CharacterIndex
+from .dialogue_index import DialogueIndex
+from .play_corpus import CorpusPlay
+from .play_parser import parse_play_file
+
+# Files behind each lazily loaded section, relative to the play directory
+SECTION_FILES = {
+    "play": "play_data.json",
+    "relationships": "relationships.json",
+    "generated": "data/data.json"
+}
+
+# Source parsed when play_data.json holds no dialogue yet
+HTML_FILE = "full.html"
+
+# Parsed JSON takes roughly three times its file size in memory
+JSON_MEMORY_FACTOR = 3
+
+DEFAULT_BUDGET_MB = 256
+
+
+class CachedPlay:
+    """
+    One play and everything derived from it, loaded on first use.
+
+    JSON-backed plays read their section files from the play directory
+    (parsing full.html when play_data.json is still unpopulated);
+    corpus-backed plays take dialogue and characters from a mapped CorpusPlay
+    and only read relationships/generated data from disk.
+    """
+
+    def __init__(self,
+                 name: str,
+                 play_dir: Path,
+                 corpus_play: Optional[CorpusPlay] = None):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.play_dir = play_dir
+        self.corpus_play = corpus_play
+        self.on_resize: Optional[Callable[["CachedPlay", int], None]] = None
+        self.size = 0
+
+        self.sections: Dict[str, Dict] = {}
+        self._play_data: Optional[Dict] = None
+        self._character_index: Optional[CharacterIndex] = None
+        self._scene_numbers: Optional[List[int]] = None
+        self._dialogue_index: Optional[DialogueIndex] = None
+        self._lines: Optional[List[Dict]] = None
+
+    def _grow(self, nbytes: int):
+        """Account memory for something that was just loaded"""
+        self.size += nbytes
+        if self.on_resize is not None:
+            self.on_resize(self, nbytes)
+
+    def section(self, section_name: str) -> Dict:
+        """
+        Get a section, reading its file on first access
+
+        Args:
+            section_name (str): One of SECTION_FILES
+
+        Returns:
+            Dict: Section contents ({} if the file is missing or invalid)
+        """
+        if section_name not in self.sections:
+            path = self.play_dir / SECTION_FILES[section_name]
+            try:
+                with open(path) as f:
+                    self.sections[section_name] = json.load(f)
+                self._grow(path.stat().st_size * JSON_MEMORY_FACTOR)
+            except FileNotFoundError:
+                self.logger.debug(f"No {section_name} data for {self.name}")
+                self.sections[section_name] = {}
+            except json.JSONDecodeError:
+                self.logger.error(f"Invalid {section_name} data format for: {self.name}")
+                self.sections[section_name] = {}
+        return self.sections[section_name]
+
+    @property
+    def play_data(self) -> Dict:
+        """Play data (title, description, characters, acts, dialogue)"""
+        if self._play_data is None:
+            if self.corpus_play is not None:
+                # Only the small header fields are materialized; dialogue stays mapped
+                self._play_data = {
+                    "title": self.corpus_play.title,
+                    "description": self.corpus_play.description
+                }
+            else:
+                self._play_data = self.section("play")
+                if not self._play_data.get("dialogue"):
+                    self._play_data = self._parse_html() or self._play_data
+        return self._play_data
+
+    def _parse_html(self) -> Optional[Dict]:
+        """Play data parsed from full.html, None if there is none"""
+        html_path = self.play_dir / HTML_FILE
+        if not html_path.is_file():
+            return None
+        self.logger.debug(f"Parsing {html_path} (play_data.json not populated)")
+        play_data = parse_play_file(html_path, title=self.name)
+        # Parsed dicts are about the size of the HTML they came from
+        self._grow(html_path.stat().st_size)
+        return play_data
+
+    @property
+    def characters(self) -> Dict:
+        """Characters section"""
+        play_data = self.play_data
+        if self.corpus_play is not None and "characters" not in play_data:
+            play_data["characters"] = self.corpus_play.get_characters()
+            self._grow(len(json.dumps(play_data["characters"])) * JSON_MEMORY_FACTOR)
+        return play_data.get("characters", {})
+
+    @property
+    def relationships(self) -> Dict:
+        """Relationships section (relationships.json)"""
+        return self.section("relationships")
+
+    @property
+    def generated(self) -> Dict:
+        """Generated contact/call data (data/data.json)"""
+        return self.section("generated")
+
+    @property
+    def scene_count(self) -> int:
+        if self.corpus_play is not None:
+            return self.corpus_play.scene_count
+        return len(self.play_data.get("dialogue", []))
+
+    @property
+    def scene_numbers(self) -> List[int]:
+        """Scene number of each scene, by 0-based scene index"""
+        if self._scene_numbers is None:
+            if self.corpus_play is not None:
+                play = self.corpus_play
+                self._scene_numbers = [play.scene_number(i) for i in range(play.scene_count)]
+            else:
+                self._scene_numbers = [scene["scene_number"] for scene in self.play_data.get("dialogue", [])]
+        return self._scene_numbers
+
+    @property
+    def character_index(self) -> CharacterIndex:
+        """Speaker index, built on first use"""
+        if self._character_index is None:
+            if self.corpus_play is not None:
+                index = CharacterIndex.from_corpus_play(self.corpus_play)
+            else:
+                index = CharacterIndex.from_play_data(self.play_data)
+            speakers = len(index.speakers)
+            self._character_index = index
+            self._grow(8 * len(index.line_speaker) + 4 * speakers * speakers)
+        return self._character_index
+
+    @property
+    def lines(self) -> List[Dict]:
+        """Flat list of {speaker, text} lines in scene order (JSON plays)"""
+        if self._lines is None:
+            self._lines = [
+                line
+                for scene in self.play_data.get("dialogue", [])
+                for line in scene["lines"]
+            ]
+            self._grow(8 * len(self._lines))
+        return self._lines
+
+    @property
+    def dialogue_index(self) -> DialogueIndex:
+        """Search index over this play's dialogue (JSON plays)"""
+        if self._dialogue_index is None:
+            index = DialogueIndex.from_play_data(self.name, self.play_data)
+            self._dialogue_index = index
+            self._grow(4 * (len(index.postings) + len(index.token_offsets)) + 64 * len(index.tokens))
+        return self._dialogue_index
+
+    def line_text(self, line_id: int) -> str:
+        """Text of a line by line ID"""
+        if self.corpus_play is not None:
+            return self.corpus_play.line_text(line_id)
+        return self.lines[line_id]["text"]
+
+
+class PlayCache:
+    """Least recently used cache of CachedPlay objects with a memory budget"""
+
+    def __init__(self, budget_mb: float = DEFAULT_BUDGET_MB):
+        """
+        Initialize PlayCache
+
+        Args:
+            budget_mb (float): Estimated memory allowed for all cached plays
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = int(budget_mb * 1024 * 1024)
+        self.entries: "OrderedDict[str, CachedPlay]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, play_name: str) -> bool:
+        return play_name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, play_name: str) -> Optional[CachedPlay]:
+        """Get a cached play and mark it most recently used"""
+        entry = self.entries.get(play_name)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(play_name)
+        return entry
+
+    def put(self, entry: CachedPlay):
+        """Add a play as most recently used, evicting others if over budget"""
+        self.discard(entry.name)
+        self.entries[entry.name] = entry
+        self.total_bytes += entry.size
+        entry.on_resize = self._resized
+        self._evict(keep=entry.name)
+
+    def discard(self, play_name: str):
+        """Drop a play from the cache"""
+        entry = self.entries.pop(play_name, None)
+        if entry is not None:
+            entry.on_resize = None
+            self.total_bytes -= entry.size
+
+    def clear(self):
+        for play_name in list(self.entries):
+            self.discard(play_name)
+
+    def _resized(self, entry: CachedPlay, nbytes: int):
+        self.total_bytes += nbytes
+        self._evict(keep=entry.name)
+
+    def _evict(self, keep: str):
+        """Evict least recently used plays until the budget is met"""
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            play_name = next(iter(self.entries))
+            if play_name == keep:
+                # The play being loaded is never evicted by its own growth
+                self.entries.move_to_end(play_name)
+                play_name = next(iter(self.entries))
+            self.discard(play_name)
+            self.evictions += 1
+            self.logger.debug(f"Evicted {play_name} from play cache")
+
+    def stats(self) -> Dict:
+        """Cache size and hit/miss counters"""
+        return {
+            "plays": len(self.entries),
+            "estimated_bytes": self.total_bytes,
+            "budget_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
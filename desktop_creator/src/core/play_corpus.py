@@ -0,0 +1,365 @@
+"""
+play_corpus.py
+Created by RSGrizz
+
+Compact columnar corpus for play dialogue. Every play is packed into one
+memory-mapped file (corpus.bin) so a process can hold the whole canon
+without parsing JSON or materializing per-line dicts.
+
+File layout (all integers little-endian):
+
+    magic            8 bytes   b"SHKCORP1"
+    directory_offset uint64
+    directory_length uint64
+    ...array and text sections, each 8-byte aligned...
+    directory        UTF-8 JSON describing every play's sections
+
+Per play the directory stores speaker/scene metadata and the location of:
+
+    line_speaker        uint16[lines]       speaker ID of each line
+    line_offsets        uint32[lines + 1]   byte offsets into the text blob
+    scene_line_offsets  uint32[scenes + 1]  first line of each scene
+    scene_act           uint16[scenes]      act number of each scene
+    scene_in_act        uint16[scenes]      scene number within its act
+    act_scene_offsets   uint32[acts + 1]    first scene of each act
+    text                bytes               all line text, UTF-8
+"""
+
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .dialogue_index import DialogueIndex, corpus_fingerprint, index_path_for
+from .play_parser import parse_play_file
+
+CORPUS_MAGIC = b"SHKCORP1"
+CORPUS_VERSION = 1
+CORPUS_FILENAME = "corpus.bin"
+
+HEADER = struct.Struct("<8sQQ")
+ALIGNMENT = 8
+
+
+class CorpusPlay:
+    """Zero-copy view of one play inside a mapped corpus"""
+
+    def __init__(self, name: str, entry: Dict, buffer: memoryview):
+        self.name = name
+        self.title = entry["title"]
+        self.description = entry.get("description", "")
+        self.speakers: List[str] = entry["speakers"]
+        self.scene_titles: List[str] = entry["scene_titles"]
+        self.scene_locations: List[str] = entry["scene_locations"]
+        self.act_numbers: List[int] = entry["act_numbers"]
+        self.act_titles: List[str] = entry["act_titles"]
+        self.speaker_ids = {name: i for i, name in enumerate(self.speakers)}
+
+        sections = entry["sections"]
+        self.line_speaker = self._view(buffer, sections["line_speaker"])
+        self.line_offsets = self._view(buffer, sections["line_offsets"])
+        self.scene_line_offsets = self._view(buffer, sections["scene_line_offsets"])
+        self.scene_act = self._view(buffer, sections["scene_act"])
+        self.scene_in_act = self._view(buffer, sections["scene_in_act"])
+        self.act_scene_offsets = self._view(buffer, sections["act_scene_offsets"])
+        text_offset, text_length = sections["text"][:2]
+        self.text = buffer[text_offset:text_offset + text_length]
+
+    @staticmethod
+    def _view(buffer: memoryview, section: List) -> memoryview:
+        offset, length, typecode = section
+        view = buffer[offset:offset + length]
+        if sys.byteorder != "little":
+            # Arrays are stored little-endian: big-endian hosts read a swapped copy
+            values = array(typecode, view.tobytes())
+            values.byteswap()
+            return memoryview(values)
+        return view.cast(typecode)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_speaker)
+
+    @property
+    def scene_count(self) -> int:
+        return len(self.scene_act)
+
+    def line_text(self, line_id: int) -> str:
+        """Decode the text of a single line"""
+        start = self.line_offsets[line_id]
+        end = self.line_offsets[line_id + 1]
+        return str(self.text[start:end], "utf-8")
+
+    def line_speaker_name(self, line_id: int) -> str:
+        return self.speakers[self.line_speaker[line_id]]
+
+    def scene_line_range(self, scene_index: int) -> range:
+        """Line IDs belonging to a scene (0-based scene index)"""
+        return range(self.scene_line_offsets[scene_index],
+                     self.scene_line_offsets[scene_index + 1])
+
+    def scene_number(self, scene_index: int) -> int:
+        """Sequential scene number as used in play_data.json"""
+        return scene_index + 1
+
+    def scene_speaker_ids(self, scene_index: int) -> List[int]:
+        """Speaker IDs in order of first appearance within a scene"""
+        seen = []
+        for line_id in self.scene_line_range(scene_index):
+            speaker_id = self.line_speaker[line_id]
+            if speaker_id not in seen:
+                seen.append(speaker_id)
+        return seen
+
+    def scene_speakers(self, scene_index: int) -> List[str]:
+        return [self.speakers[i] for i in self.scene_speaker_ids(scene_index)]
+
+    def iter_scene_index(self) -> Iterator[Tuple[int, range]]:
+        """Yield (scene_index, line_range) for every scene"""
+        for scene_index in range(self.scene_count):
+            yield scene_index, self.scene_line_range(scene_index)
+
+    def get_characters(self) -> Dict:
+        """Character table equivalent to play_data.json's characters section"""
+        characters = {name: {"description": "", "lines": 0, "scenes": []} for name in self.speakers}
+        for scene_index, lines in self.iter_scene_index():
+            for line_id in lines:
+                character = characters[self.speakers[self.line_speaker[line_id]]]
+                character["lines"] += 1
+                scene_number = self.scene_number(scene_index)
+                if not character["scenes"] or character["scenes"][-1] != scene_number:
+                    character["scenes"].append(scene_number)
+        return characters
+
+    def release(self):
+        """Release the memoryviews so the underlying map can be closed"""
+        for view in (self.line_speaker, self.line_offsets, self.scene_line_offsets,
+                     self.scene_act, self.scene_in_act, self.act_scene_offsets, self.text):
+            view.release()
+
+
+class PlayCorpus:
+    """Read-only, memory-mapped access to corpus.bin"""
+
+    def __init__(self, corpus_path: Path):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(corpus_path)
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._map)
+        self._plays: Dict[str, CorpusPlay] = {}
+
+        magic, directory_offset, directory_length = HEADER.unpack_from(self._map, 0)
+        if magic != CORPUS_MAGIC:
+            self.close()
+            raise ValueError(f"Not a play corpus file: {self.path}")
+
+        directory = json.loads(
+            bytes(self._buffer[directory_offset:directory_offset + directory_length])
+        )
+        if directory.get("version") != CORPUS_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported corpus version in {self.path}")
+        self.directory: Dict[str, Dict] = directory["plays"]
+
+    @property
+    def plays(self) -> List[str]:
+        return list(self.directory)
+
+    def get_play(self, play_name: str) -> Optional[CorpusPlay]:
+        """Get a (cached) view of a play, None if it is not in the corpus"""
+        if play_name not in self.directory:
+            return None
+        if play_name not in self._plays:
+            self._plays[play_name] = CorpusPlay(play_name, self.directory[play_name], self._buffer)
+        return self._plays[play_name]
+
+    def close(self):
+        for play in self._plays.values():
+            play.release()
+        self._plays = {}
+        if getattr(self, "_buffer", None) is not None:
+            self._buffer.release()
+            self._buffer = None
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CorpusWriter:
+    """Packs parsed plays into the columnar corpus layout"""
+
+    def __init__(self, corpus_path: Path):
+        self.path = Path(corpus_path)
+        self.directory: Dict[str, Dict] = {}
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        # Header is rewritten once the directory offset is known
+        self._file.write(HEADER.pack(CORPUS_MAGIC, 0, 0))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._finish()
+        else:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+    def _write_section(self, payload: bytes, typecode: Optional[str] = None) -> List:
+        padding = -self._file.tell() % ALIGNMENT
+        if padding:
+            self._file.write(b"\0" * padding)
+        offset = self._file.tell()
+        self._file.write(payload)
+        return [offset, len(payload), typecode]
+
+    def _write_array(self, typecode: str, values) -> List:
+        data = array(typecode, values)
+        if sys.byteorder != "little":
+            data.byteswap()
+        return self._write_section(data.tobytes(), typecode)
+
+    def add_play(self, play_name: str, play_data: Dict):
+        """
+        Append one play in play_data.json layout to the corpus
+
+        Args:
+            play_name (str): Play directory name
+            play_data (Dict): Parsed play (see play_parser.get_play_data)
+        """
+        speaker_ids: Dict[str, int] = {}
+        line_speaker = []
+        line_offsets = [0]
+        scene_line_offsets = [0]
+        scene_act = []
+        scene_in_act = []
+        text = bytearray()
+
+        for scene in play_data.get("dialogue", []):
+            for line in scene["lines"]:
+                speaker_id = speaker_ids.setdefault(line["speaker"], len(speaker_ids))
+                line_speaker.append(speaker_id)
+                text += line["text"].encode("utf-8")
+                line_offsets.append(len(text))
+            scene_line_offsets.append(len(line_speaker))
+            scene_act.append(scene.get("act", 0))
+            scene_in_act.append(scene.get("scene", 0))
+
+        # Acts are stored as contiguous scene ranges
+        act_numbers = []
+        act_titles = []
+        act_scene_offsets = [0]
+        for scene_index, act in enumerate(scene_act):
+            if not act_numbers or act_numbers[-1] != act:
+                if act_numbers:
+                    act_scene_offsets.append(scene_index)
+                act_numbers.append(act)
+                act_titles.append(next(
+                    (a["title"] for a in play_data.get("acts", []) if a["act"] == act),
+                    f"ACT {act}"
+                ))
+        act_scene_offsets.append(len(scene_act))
+
+        self.directory[play_name] = {
+            "title": play_data.get("title", play_name),
+            "description": play_data.get("description", ""),
+            "speakers": list(speaker_ids),
+            "scene_titles": [scene.get("title", "") for scene in play_data.get("dialogue", [])],
+            "scene_locations": [scene.get("location", "") for scene in play_data.get("dialogue", [])],
+            "act_numbers": act_numbers,
+            "act_titles": act_titles,
+            "sections": {
+                "line_speaker": self._write_array("H", line_speaker),
+                "line_offsets": self._write_array("I", line_offsets),
+                "scene_line_offsets": self._write_array("I", scene_line_offsets),
+                "scene_act": self._write_array("H", scene_act),
+                "scene_in_act": self._write_array("H", scene_in_act),
+                "act_scene_offsets": self._write_array("I", act_scene_offsets),
+                "text": self._write_section(bytes(text))
+            }
+        }
+
+    def _finish(self):
+        directory = json.dumps(
+            {"version": CORPUS_VERSION, "plays": self.directory},
+            ensure_ascii=False
+        ).encode("utf-8")
+        directory_section = self._write_section(directory)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(CORPUS_MAGIC, directory_section[0], directory_section[1]))
+        self._file.close()
+        self._tmp_path.replace(self.path)
+
+
+def load_play_source(play_dir: Path) -> Optional[Dict]:
+    """Parsed play for a directory: play_data.json if populated, else full.html"""
+    data_file = play_dir / "play_data.json"
+    if data_file.exists():
+        with open(data_file, encoding="utf-8") as f:
+            play_data = json.load(f)
+        if play_data.get("dialogue"):
+            return play_data
+
+    html_file = play_dir / "full.html"
+    if html_file.exists():
+        return parse_play_file(html_file, title=play_dir.name)
+    return None
+
+
+def build_corpus(plays_dir: Path, corpus_path: Optional[Path] = None) -> Path:
+    """
+    Pack every play under plays_dir into a single corpus file
+
+    Args:
+        plays_dir (Path): Directory containing one folder per play
+        corpus_path (Optional[Path]): Output file (defaults to plays_dir/corpus.bin)
+
+    Returns:
+        Path: Written corpus file
+    """
+    logger = logging.getLogger(__name__)
+    plays_dir = Path(plays_dir)
+    corpus_path = Path(corpus_path) if corpus_path else plays_dir / CORPUS_FILENAME
+
+    with CorpusWriter(corpus_path) as writer:
+        for play_dir in sorted(plays_dir.iterdir()):
+            if not play_dir.is_dir():
+                continue
+            play_data = load_play_source(play_dir)
+            if play_data is None:
+                continue
+            writer.add_play(play_dir.name, play_data)
+
+    logger.info(f"Wrote {len(writer.directory)} plays to {corpus_path}")
+
+    # The search index is rebuilt with the corpus so the two never drift
+    with PlayCorpus(corpus_path) as corpus:
+        index = DialogueIndex.from_corpus(corpus, source=corpus_fingerprint(corpus_path))
+    index.save(index_path_for(corpus_path))
+    logger.info(f"Wrote dialogue index ({len(index.tokens)} tokens) to {index_path_for(corpus_path)}")
+    return corpus_path
+
+
+def main():
+    """Build corpus.bin for the bundled plays"""
+    logging.basicConfig(level=logging.INFO)
+    plays_dir = Path(__file__).resolve().parents[2] / "data" / "static" / "plays"
+    corpus_path = build_corpus(plays_dir)
+    print(f"Corpus written to {corpus_path} ({corpus_path.stat().st_size / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+play_fetcher.py
+Created by RSGrizz
+
+Shared fetch layer for play sources (MIT Shakespeare pages, TheMITTech
+character lists). One pooled requests session with retries, bounded
+concurrency for batch downloads, an on-disk HTTP cache revalidated with
+ETag/Last-Modified, and an offline mode that serves from a local mirror.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CACHE_DIR = Path("desktop_creator/data/cache/http")
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 30
+USER_AGENT = "shakespeare-forensics-fetcher/1.0"
+
+
+class FetchError(Exception):
+    """A URL could not be fetched online, from the cache or from the mirror"""
+
+
+class FetchResult:
+    """Body and metadata of a fetched URL"""
+
+    def __init__(self,
+                 url: str,
+                 content: bytes,
+                 source: str,
+                 encoding: Optional[str] = None,
+                 status: int = 200):
+        self.url = url
+        self.content = content
+        self.source = source  # "network", "cache" (304 or offline) or "mirror"
+        self.encoding = encoding
+        self.status = status
+
+    @property
+    def from_cache(self) -> bool:
+        return self.source != "network"
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the served charset (UTF-8, then Latin-1, if unknown)"""
+        if self.encoding:
+            return self.content.decode(self.encoding, errors="replace")
+        try:
+            return self.content.decode("utf-8")
+        except UnicodeDecodeError:
+            return self.content.decode("latin-1")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def mirror_path_for(mirror_dir: Path, url: str) -> Path:
+    """
+    Location of a URL inside a mirror directory: <host>/<path>, with
+    directory URLs stored as index.html (the layout of wget --mirror)
+    """
+    parts = urlsplit(url)
+    path = parts.path.lstrip("/")
+    if not path or path.endswith("/"):
+        path += "index.html"
+    return Path(mirror_dir) / parts.netloc / path
+
+
+class PlayFetcher:
+    """
+    Fetches URLs through a shared session and an on-disk HTTP cache.
+
+    Online, a cached URL is revalidated with If-None-Match/If-Modified-Since
+    and a 304 is served from the cache. Offline, the mirror directory is
+    used first and the HTTP cache second; the network is never touched.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+                 mirror_dir: Optional[Path] = None,
+                 offline: bool = False,
+                 max_workers: int = DEFAULT_WORKERS,
+                 retries: int = 3,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initialize PlayFetcher
+
+        Args:
+            cache_dir (Optional[Path]): HTTP cache directory (None disables caching)
+            mirror_dir (Optional[Path]): Local mirror; served offline, filled online
+            offline (bool): Never use the network
+            max_workers (int): Concurrent requests for fetch_many
+            retries (int): Retries for connection errors and 429/5xx responses
+            timeout (float): Per-request timeout in seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.mirror_dir = Path(mirror_dir) if mirror_dir else None
+        self.offline = offline
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.stats = {"network": 0, "cache": 0, "mirror": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+        if offline and not (self.mirror_dir or self.cache_dir):
+            raise ValueError("Offline mode needs a mirror or cache directory")
+
+        self.session = None
+        if not offline:
+            retry = Retry(total=retries, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=self.max_workers,
+                                  pool_maxsize=self.max_workers,
+                                  max_retries=retry)
+            self.session = requests.Session()
+            self.session.headers["User-Agent"] = USER_AGENT
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+    # ------------------------------------------------------------------
+    # HTTP cache
+    # ------------------------------------------------------------------
+    def _cache_paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def _read_cache(self, url: str):
+        """(metadata, body) of a cached URL, None if not cached"""
+        if self.cache_dir is None:
+            return None
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return meta, body_path.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _write_atomic(path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(payload)
+        tmp_path.replace(path)
+
+    def _write_cache(self, url: str, response: requests.Response):
+        if self.cache_dir is None:
+            return
+        body_path, meta_path = self._cache_paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "fetched": datetime.now().isoformat()
+        }
+        # Body first so metadata never points at a missing body
+        self._write_atomic(body_path, response.content)
+        self._write_atomic(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    def _count(self, source: str):
+        with self._stats_lock:
+            self.stats[source] += 1
+
+    def _fetch_offline(self, url: str) -> FetchResult:
+        if self.mirror_dir is not None:
+            path = mirror_path_for(self.mirror_dir, url)
+            if path.is_file():
+                return FetchResult(url, path.read_bytes(), "mirror")
+        cached = self._read_cache(url)
+        if cached is not None:
+            meta, body = cached
+            return FetchResult(url, body, "cache", meta.get("encoding"))
+        raise FetchError(f"{url} is not in the mirror or cache (offline)")
+
+    def _fetch_online(self, url: str) -> FetchResult:
+        cached = self._read_cache(url)
+        headers = {}
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached is not None:
+                meta, body = cached
+                return FetchResult(url, body, "cache", meta.get("encoding"), 304)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise FetchError(f"Request error for {url}: {e}") from e
+
+        self._write_cache(url, response)
+        if self.mirror_dir is not None:
+            self._write_atomic(mirror_path_for(self.mirror_dir, url), response.content)
+        return FetchResult(url, response.content, "network", response.encoding, response.status_code)
+
+    def fetch(self, url: str) -> FetchResult:
+        """
+        Fetch one URL
+
+        Args:
+            url (str): URL to fetch
+
+        Returns:
+            FetchResult: Body and where it came from
+
+        Raises:
+            FetchError: If the URL is unavailable
+        """
+        try:
+            result = self._fetch_offline(url) if self.offline else self._fetch_online(url)
+        except FetchError:
+            self._count("failed")
+            raise
+        self._count(result.source)
+        return result
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[FetchResult]]:
+        """
+        Fetch several URLs with at most max_workers requests in flight
+
+        Args:
+            urls (Iterable[str]): URLs to fetch
+
+        Returns:
+            Dict[str, Optional[FetchResult]]: url -> result (None if it failed), in input order
+        """
+        urls = list(dict.fromkeys(urls))
+
+        def fetch_or_none(url):
+            try:
+                return self.fetch(url)
+            except FetchError as e:
+                self.logger.error(str(e))
+                return None
+
+        if len(urls) <= 1 or self.max_workers == 1:
+            return {url: fetch_or_none(url) for url in urls}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return dict(zip(urls, executor.map(fetch_or_none, urls)))
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """Fetch URLs into the cache/mirror and report throughput"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Fetch play sources through the shared cache")
+    parser.add_argument("urls", nargs="+", help="URLs to fetch")
+    parser.add_argument("--mirror", type=Path, help="Mirror directory (filled online, served offline)")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="HTTP cache directory")
+    parser.add_argument("--offline", action="store_true", help="Serve only from the mirror/cache")
+    parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_WORKERS, help="Concurrent requests")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with PlayFetcher(args.cache_dir, args.mirror, args.offline, args.jobs) as fetcher:
+        start = time.perf_counter()
+        results = fetcher.fetch_many(args.urls)
+        elapsed = time.perf_counter() - start
+        total_bytes = sum(len(r.content) for r in results.values() if r is not None)
+        print(f"Fetched {len(results)} URLs ({total_bytes / 1024:.0f} KB) in {elapsed:.2f}s: {fetcher.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,51 @@ Created by RSGrizz
 Manages play data, selection, and basic play information
 """
 
-import json
 import logging
+import os
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .character_index import CharacterIndex
+from .dialogue_index import DialogueIndex, corpus_fingerprint, index_path_for
+from .play_cache import DEFAULT_BUDGET_MB, HTML_FILE, SECTION_FILES, CachedPlay, PlayCache
+from .play_corpus import CORPUS_FILENAME, CorpusPlay, PlayCorpus
+
+BACKENDS = ("json", "corpus")
+
 class PlayManager:
-    def __init__(self):
-        """Initialize PlayManager"""
+    def __init__(self, backend: str = "json", cache_budget_mb: float = DEFAULT_BUDGET_MB):
+        """
+        Initialize PlayManager
+
+        Args:
+            backend (str): "json" reads each play's play_data.json (parsing
+                full.html while it is unpopulated), "corpus" memory-maps the
+                packed corpus.bin
+            cache_budget_mb (float): Estimated memory for recently used plays
+        """
         # Setup logging
         self.logger = logging.getLogger(__name__)
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
         
         # Set paths
         self.base_path = Path("desktop_creator/data/static/plays")
+        self.corpus_path = self.base_path / CORPUS_FILENAME
         
         # Initialize storage
         self.current_play = None
+        self.current: Optional[CachedPlay] = None
         self.available_plays = []
-        self.play_data = {}
+        self.corpus: Optional[PlayCorpus] = None
+
+        # Recently used plays; sections and indexes load on first access
+        self.play_cache = PlayCache(cache_budget_mb)
+
+        # Corpus-wide search index (JSON plays keep theirs in the cache)
+        self.corpus_index: Optional[DialogueIndex] = None
         
         # Load available plays on initialization
         self.refresh_available_plays()
@@ -35,11 +62,19 @@ class PlayManager:
             List[str]: List of available play names
         """
         try:
-            # Get all directories in plays folder that contain play_data.json
-            self.available_plays = [
-                d.name for d in self.base_path.iterdir()
-                if d.is_dir() and (d / "play_data.json").exists()
-            ]
+            if self.backend == "corpus":
+                if self.corpus is None:
+                    self.corpus = PlayCorpus(self.corpus_path)
+                self.available_plays = self.corpus.plays
+                self.logger.info(f"Found {len(self.available_plays)} plays")
+                return self.available_plays
+
+            # Play directories only; play files are not touched until a play is used
+            with os.scandir(self.base_path) as entries:
+                self.available_plays = sorted(
+                    entry.name for entry in entries
+                    if entry.is_dir() and not entry.name.startswith(("_", "."))
+                )
             self.logger.info(f"Found {len(self.available_plays)} plays")
             return self.available_plays
         except Exception as e:
@@ -58,6 +93,9 @@ class PlayManager:
     def load_play(self, play_name: str) -> bool:
         """
         Load a specific play's data
+
+        Plays come from the LRU cache when recently used; otherwise only the
+        play is located here and its sections are read on first access.
         
         Args:
             play_name (str): Name of play to load
@@ -65,27 +103,96 @@ class PlayManager:
         Returns:
             bool: Success status
         """
-        play_dir = self.base_path / play_name
-        
-        try:
-            # Load main play data
-            with open(play_dir / "play_data.json") as f:
-                self.play_data = json.load(f)
-                
-            self.current_play = play_name
-            self.logger.info(f"Successfully loaded play: {play_name}")
-            return True
-            
-        except FileNotFoundError:
-            self.logger.error(f"Play data not found for: {play_name}")
-            return False
-        except json.JSONDecodeError:
-            self.logger.error(f"Invalid play data format for: {play_name}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error loading play {play_name}: {e}")
+        entry = self._get_entry(play_name)
+        if entry is None:
             return False
 
+        self.current = entry
+        self.current_play = play_name
+        self.logger.info(f"Successfully loaded play: {play_name}")
+        return True
+
+    def get_play(self, play_name: str) -> Optional[CachedPlay]:
+        """
+        Get a play's cached data without making it the current play
+
+        Args:
+            play_name (str): Name of play
+
+        Returns:
+            Optional[CachedPlay]: Cached play, None if it does not exist
+        """
+        return self._get_entry(play_name)
+
+    def _get_entry(self, play_name: str) -> Optional[CachedPlay]:
+        """Cached play, created (without reading any files) on a miss"""
+        entry = self.play_cache.get(play_name)
+        if entry is not None:
+            return entry
+
+        play_dir = self.base_path / play_name
+        if self.backend == "corpus":
+            if self.corpus is None:
+                self.logger.error(f"Corpus not available at {self.corpus_path}")
+                return None
+            play = self.corpus.get_play(play_name)
+            if play is None:
+                self.logger.error(f"Play data not found for: {play_name}")
+                return None
+            entry = CachedPlay(play_name, play_dir, corpus_play=play)
+        else:
+            if not ((play_dir / SECTION_FILES["play"]).is_file() or (play_dir / HTML_FILE).is_file()):
+                self.logger.error(f"Play data not found for: {play_name}")
+                return None
+            entry = CachedPlay(play_name, play_dir)
+
+        self.play_cache.put(entry)
+        return entry
+
+    @property
+    def play_data(self) -> Dict:
+        """Play data of the current play ({} if none is loaded)"""
+        return self.current.play_data if self.current else {}
+
+    @property
+    def corpus_play(self) -> Optional[CorpusPlay]:
+        return self.current.corpus_play if self.current else None
+
+    @property
+    def character_index(self) -> Optional[CharacterIndex]:
+        """Speaker index of the current play"""
+        return self.current.character_index if self.current else None
+
+    @property
+    def scene_numbers(self) -> List[int]:
+        return self.current.scene_numbers if self.current else []
+
+    def _get_characters_section(self) -> Dict:
+        """Characters section of the current play"""
+        return self.current.characters
+
+    def get_relationships(self) -> Dict:
+        """
+        Get the relationships section of the current play
+
+        Returns:
+            Dict: Contents of relationships.json ({} if missing)
+        """
+        if not self.current_play:
+            return {}
+        return self.current.relationships
+
+    def get_generated_data(self) -> Dict:
+        """
+        Get generated contact and call data for the current play
+
+        Returns:
+            Dict: Contents of data/data.json ({} if not generated yet)
+        """
+        if not self.current_play:
+            return {}
+        return self.current.generated
+
     def get_characters(self) -> List[str]:
         """
         Get list of characters in current play
@@ -97,7 +204,7 @@ class PlayManager:
             self.logger.warning("No play currently loaded")
             return []
         
-        return list(self.play_data.get("characters", {}).keys())
+        return list(self._get_characters_section().keys())
 
     def get_character_info(self, character_name: str) -> Dict:
         """
@@ -109,10 +216,10 @@ class PlayManager:
         Returns:
             Dict: Character information
         """
-        if not self.play_:
+        if not self.current_play:
             return {}
             
-        return self.play_data.get("characters", {}).get(character_name, {})
+        return self._get_characters_section().get(character_name, {})
 
     def get_play_summary(self) -> Dict:
         """
@@ -121,13 +228,13 @@ class PlayManager:
         Returns:
             Dict: Play summary
         """
-        if not self.play_:
+        if not self.current_play:
             return {"error": "No play loaded"}
-            
+
         return {
             "title": self.play_data.get("title", "Unknown"),
             "character_count": len(self.get_characters()),
-            "scenes": len(self.play_data.get("dialogue", [])),
+            "scenes": self.current.scene_count,
             "loaded": bool(self.current_play)
         }
 
@@ -141,22 +248,17 @@ class PlayManager:
         Returns:
             List[Dict]: List of character's lines with scene info
         """
-        if not self.play_:
+        if not self.current_play:
             return []
-            
-        lines = []
-        for scene in self.play_data.get("dialogue", []):
-            scene_lines = [
-                {
-                    "text": line["text"],
-                    "scene": scene["scene_number"]
-                }
-                for line in scene["lines"]
-                if line["speaker"] == character_name
-            ]
-            lines.extend(scene_lines)
-            
-        return lines
+
+        index = self.character_index
+        return [
+            {
+                "text": self._line_text(line_id),
+                "scene": self.scene_numbers[index.scene_of_line(line_id)]
+            }
+            for line_id in index.lines_for(character_name)
+        ]
 
     def get_character_interactions(self, character_name: str) -> Dict:
         """
@@ -166,43 +268,105 @@ class PlayManager:
             character_name (str): Name of character
             
         Returns:
-            Dict: Dictionary of interactions
+            Dict: Dictionary of interactions (shared scene counts)
         """
-        if not self.play_:
+        if not self.current_play:
             return {}
-            
-        interactions = {}
-        
-        for scene in self.play_data.get("dialogue", []):
-            if character_name in scene["speakers"]:
-                for speaker in scene["speakers"]:
-                    if speaker != character_name:
-                        interactions[speaker] = interactions.get(speaker, 0) + 1
-                        
-        return interactions
 
-    def search_dialogue(self, keyword: str) -> List[Dict]:
+        return self.character_index.interactions_for(character_name)
+
+    def get_interaction_matrix(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get shared-scene counts for every pair of characters in the current play
+
+        Returns:
+            Dict[str, Dict[str, int]]: character -> {other character: scenes shared}
+        """
+        if not self.current_play:
+            return {}
+
+        return self.character_index.interaction_matrix()
+
+    def _line_text(self, line_id: int) -> str:
+        """Text of a line in the current play by line ID"""
+        return self.current.line_text(line_id)
+
+    def _get_corpus_index(self) -> DialogueIndex:
+        """Corpus-wide index, loaded from disk when it matches corpus.bin"""
+        if self.corpus_index is None:
+            index_path = index_path_for(self.corpus_path)
+            try:
+                index = DialogueIndex.load(index_path)
+                if index.source == corpus_fingerprint(self.corpus_path):
+                    self.corpus_index = index
+                else:
+                    index.close()
+                    self.logger.warning(f"Dialogue index {index_path} is stale, rebuilding in memory")
+            except (FileNotFoundError, ValueError) as e:
+                self.logger.warning(f"Dialogue index unavailable ({e}), rebuilding in memory")
+            if self.corpus_index is None:
+                self.corpus_index = DialogueIndex.from_corpus(self.corpus)
+        return self.corpus_index
+
+    def search_dialogue(self,
+                        keyword: str,
+                        prefix: bool = False,
+                        plays: Optional[List[str]] = None) -> List[Dict]:
         """
-        Search play dialogue for keyword
+        Search play dialogue using the inverted index
         
         Args:
-            keyword (str): Keyword to search for
+            keyword (str): Word, or several words to match as a phrase
+            prefix (bool): Match the last word as a prefix ("conspir" finds "conspirators")
+            plays (Optional[List[str]]): Plays to search (default: current play,
+                "all" for every available play)
             
         Returns:
             List[Dict]: Matching lines with context
         """
-        if not self.play_:
-            return []
-            
+        if plays is None:
+            if not self.current_play:
+                return []
+            plays = [self.current_play]
+        elif plays == "all":
+            plays = list(self.available_plays)
+
         matches = []
-        for scene in self.play_data.get("dialogue", []):
-            for line in scene["lines"]:
-                if keyword.lower() in line["text"].lower():
-                    matches.append({
-                        "speaker": line["speaker"],
-                        "text": line["text"],
-                        "scene": scene["scene_number"]
-                    })
+
+        if self.backend == "corpus":
+            index = self._get_corpus_index()
+            corpus = self.corpus
+
+            def line_text(play_name, line_id):
+                return corpus.get_play(play_name).line_text(line_id)
+
+            for play_name, scene_index, line_id in index.search(keyword, prefix, plays, line_text):
+                play = corpus.get_play(play_name)
+                matches.append({
+                    "play": play_name,
+                    "speaker": play.line_speaker_name(line_id),
+                    "text": play.line_text(line_id),
+                    "scene": play.scene_number(scene_index)
+                })
+            return matches
+
+        for play_name in plays:
+            entry = self._get_entry(play_name)
+            if entry is None:
+                continue
+            index = entry.dialogue_index
+            lines = entry.lines
+
+            def line_text(_play_name, line_id):
+                return lines[line_id]["text"]
+
+            for _, scene_index, line_id in index.search(keyword, prefix, None, line_text):
+                matches.append({
+                    "play": play_name,
+                    "speaker": lines[line_id]["speaker"],
+                    "text": lines[line_id]["text"],
+                    "scene": scene_index + 1
+                })
                     
         return matches
 
@@ -0,0 +1,279 @@
+"""
+play_parser.py
+Created by RSGrizz
+
+Streaming parser that turns the MIT Shakespeare full.html pages into
+structured play data (acts, scenes, speakers and lines)
+"""
+
+import json
+import logging
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Read size used when streaming full.html into the tokenizer
+CHUNK_SIZE = 64 * 1024
+
+# Line anchors look like <A NAME=1.2.34> (act.scene.line)
+LINE_ANCHOR = re.compile(r"^\d+\.\d+\.\d+$")
+
+ACT_HEADING = re.compile(r"^ACT\s+([IVXLC]+)\b", re.IGNORECASE)
+SCENE_HEADING = re.compile(r"^SCENE\s+([IVXLC]+)\.?\s*(.*)$", re.IGNORECASE)
+
+ROMAN_VALUES = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+
+def roman_to_int(numeral: str) -> int:
+    """Convert a roman numeral (as used in act/scene headings) to an int"""
+    total = 0
+    previous = 0
+    for char in reversed(numeral.upper()):
+        value = ROMAN_VALUES.get(char, 0)
+        if value < previous:
+            total -= value
+        else:
+            total += value
+            previous = value
+    return total
+
+
+class PlayHTMLParser(HTMLParser):
+    """
+    Single-pass tokenizer for the MIT full.html layout.
+
+    The page is a flat sequence of <h3> headings, <b> speaker names and
+    <A NAME=act.scene.line> anchors, so the play can be rebuilt from the
+    token stream without ever holding a document tree in memory.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.acts: List[Dict] = []
+        self.dialogue: List[Dict] = []
+
+        self._current_act = 0
+        self._current_scene: Optional[Dict] = None
+        self._current_speaker: Optional[str] = None
+
+        # Text capture state
+        self._capture: Optional[str] = None
+        self._buffer: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Tokenizer callbacks
+    # ------------------------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._start_capture("title")
+        elif tag == "h3":
+            self._start_capture("heading")
+        elif tag == "b":
+            self._start_capture("speaker")
+        elif tag == "a":
+            name = dict(attrs).get("name") or ""
+            if LINE_ANCHOR.match(name):
+                self._start_capture("line")
+
+    def handle_endtag(self, tag):
+        if self._capture is None:
+            return
+
+        if tag == "title" and self._capture == "title":
+            self.title = self._finish_capture().replace(": Entire Play", "")
+        elif tag == "h3" and self._capture == "heading":
+            self._handle_heading(self._finish_capture())
+        elif tag == "b" and self._capture == "speaker":
+            self._current_speaker = self._finish_capture() or None
+        elif tag == "a" and self._capture == "line":
+            self._handle_line(self._finish_capture())
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    # ------------------------------------------------------------------
+    # Structure building
+    # ------------------------------------------------------------------
+    def _start_capture(self, kind: str):
+        self._capture = kind
+        self._buffer = []
+
+    def _finish_capture(self) -> str:
+        text = " ".join("".join(self._buffer).split())
+        self._capture = None
+        self._buffer = []
+        return text
+
+    def _handle_heading(self, heading: str):
+        act_match = ACT_HEADING.match(heading)
+        if act_match:
+            self._current_act = roman_to_int(act_match.group(1))
+            self.acts.append({
+                "act": self._current_act,
+                "title": heading,
+                "scenes": []
+            })
+            return
+
+        # Anything else (SCENE, PROLOGUE, induction) opens a new scene
+        scene_match = SCENE_HEADING.match(heading)
+        if scene_match:
+            scene_in_act = roman_to_int(scene_match.group(1))
+            location = scene_match.group(2).strip()
+        else:
+            scene_in_act = 0
+            location = heading if heading != "None" else ""
+
+        self._current_scene = {
+            "scene_number": len(self.dialogue) + 1,
+            "act": self._current_act,
+            "scene": scene_in_act,
+            "title": heading,
+            "location": location,
+            "speakers": [],
+            "lines": []
+        }
+        self._current_speaker = None
+        self.dialogue.append(self._current_scene)
+
+        # Scenes ahead of the first ACT heading (inductions) live in act 0
+        if not self.acts or self.acts[-1]["act"] != self._current_act:
+            self.acts.append({
+                "act": self._current_act,
+                "title": "INDUCTION",
+                "scenes": []
+            })
+        self.acts[-1]["scenes"].append(self._current_scene["scene_number"])
+
+    def _handle_line(self, text: str):
+        if not text or not self._current_speaker:
+            return
+        if self._current_scene is None:
+            # Text before the first heading: treat as an untitled opening scene
+            self._handle_heading("None")
+
+        scene = self._current_scene
+        if self._current_speaker not in scene["speakers"]:
+            scene["speakers"].append(self._current_speaker)
+        scene["lines"].append({
+            "speaker": self._current_speaker,
+            "text": text
+        })
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+    def build_characters(self) -> Dict:
+        """Character table with line counts and scene appearances"""
+        characters: Dict[str, Dict] = {}
+        for scene in self.dialogue:
+            for line in scene["lines"]:
+                character = characters.setdefault(line["speaker"], {
+                    "description": "",
+                    "lines": 0,
+                    "scenes": []
+                })
+                character["lines"] += 1
+                if not character["scenes"] or character["scenes"][-1] != scene["scene_number"]:
+                    character["scenes"].append(scene["scene_number"])
+        return characters
+
+    def get_play_data(self, title: Optional[str] = None) -> Dict:
+        """
+        Get parsed play in the play_data.json layout used by PlayManager
+
+        Args:
+            title (Optional[str]): Title override (defaults to the page title)
+
+        Returns:
+            Dict: Play data with characters, acts and dialogue
+        """
+        return {
+            "title": title or self.title,
+            "description": self.title,
+            "characters": self.build_characters(),
+            "acts": self.acts,
+            "dialogue": self.dialogue
+        }
+
+
+def parse_play_html(html: str, title: Optional[str] = None) -> Dict:
+    """
+    Parse an already downloaded full.html page
+
+    Args:
+        html (str): Page source
+        title (Optional[str]): Title override
+
+    Returns:
+        Dict: Play data
+    """
+    parser = PlayHTMLParser()
+    parser.feed(html)
+    parser.close()
+    return parser.get_play_data(title)
+
+
+def parse_play_file(html_path: Path, title: Optional[str] = None) -> Dict:
+    """
+    Stream a full.html file from disk through the parser
+
+    Args:
+        html_path (Path): Path to full.html
+        title (Optional[str]): Title override
+
+    Returns:
+        Dict: Play data
+    """
+    parser = PlayHTMLParser()
+    with open(html_path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser.get_play_data(title)
+
+
+def write_play_data(play_dir: Path) -> Optional[Dict]:
+    """
+    Parse <play_dir>/full.html and write <play_dir>/play_data.json
+
+    Args:
+        play_dir (Path): Play directory
+
+    Returns:
+        Optional[Dict]: Written play data, None if there was no full.html
+    """
+    logger = logging.getLogger(__name__)
+    html_path = play_dir / "full.html"
+    if not html_path.exists():
+        logger.warning(f"No full.html found in {play_dir}")
+        return None
+
+    play_data = parse_play_file(html_path, title=play_dir.name)
+    with open(play_dir / "play_data.json", "w", encoding="utf-8") as f:
+        json.dump(play_data, f, indent=2, ensure_ascii=False)
+
+    logger.info(
+        f"Parsed {play_dir.name}: {len(play_data['dialogue'])} scenes, "
+        f"{len(play_data['characters'])} speakers"
+    )
+    return play_data
+
+
+def main():
+    """Rebuild play_data.json for every play directory"""
+    logging.basicConfig(level=logging.INFO)
+    plays_dir = Path(__file__).resolve().parents[2] / "data" / "static" / "plays"
+
+    for play_dir in sorted(plays_dir.iterdir()):
+        if play_dir.is_dir() and (play_dir / "full.html").exists():
+            write_play_data(play_dir)
+
+if __name__ == "__main__":
+    main()
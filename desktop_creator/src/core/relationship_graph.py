@@ -0,0 +1,429 @@
+"""
+relationship_graph.py
+Created by RSGrizz
+
+Relationship graphs (allies, opponents, subordinates) derived from each
+play's dialogue. Built from the interaction matrices with vectorized
+SciPy operations, stored as CSR adjacency arrays in relationships.npz and
+written out as relationships.json next to each play's play_data.json.
+
+Turn-taking alone cannot tell friends from enemies (replies are nearly
+symmetric for every pair), so the derivation also reads how characters
+address each other: the first and last lines of every turn are taken as
+spoken to the neighbouring turn's speaker (address_tone), and insults,
+warm words and deferential forms of address are counted per pair.
+
+Derivation, for every pair with at least min_exchanges turns between them:
+    opponents     at least min_insults insults between them, and no more
+                  than warmth_per_insult warm words per insult
+    allies        otherwise, warm words in both directions and at least
+                  min_warmth in total
+    associates    everyone else who talks: a tie without a clear label
+    subordinates  (alongside the above) j reports to i when j addresses i
+                  deferentially ("my lord", "your grace") at least
+                  min_deference times and deference_ratio times more
+                  often than the other way round
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .interaction_matrices import InteractionAnalyzer, PlayInteractions
+
+RELATION_KINDS = ("allies", "opponents", "associates", "subordinates")
+TONE_KINDS = ("insults", "warmth", "deference")
+GRAPH_FILENAME = "relationships.npz"
+RELATIONSHIPS_FILENAME = "relationships.json"
+GRAPH_VERSION = 2
+
+# Lines at each end of a turn taken as addressed to the neighbouring speaker
+EDGE_LINES = 2
+
+INSULT_WORDS = frozenset((
+    "villain", "villains", "traitor", "traitors", "slave", "slaves", "devil", "devils",
+    "damned", "damn'd", "rogue", "rogues", "knave", "knaves", "coward", "cowards",
+    "liar", "dog", "cur", "wretch", "fiend", "viper", "strumpet", "whore"
+))
+WARM_WORDS = frozenset((
+    "love", "dear", "friend", "friends", "sweet", "gentle", "brother", "kind",
+    "noble", "honest", "worthy", "thanks", "thank"
+))
+SECOND_PERSON = frozenset(("thou", "thee", "thy", "thine", "you", "your", "ye"))
+DEFERENCE = re.compile(
+    r"\b(?:my (?:good |dear |noble |gracious |dread |most )?(?:lord|liege|sovereign|master)"
+    r"|your (?:majesty|grace|highness|honour|lordship|worship)|good sir|madam)\b"
+)
+_WORD = re.compile(r"[a-z']+")
+
+
+class GraphParams(NamedTuple):
+    """Thresholds of the derivation (recorded with each cached graph)"""
+    min_exchanges: int = 3
+    min_insults: int = 2
+    warmth_per_insult: float = 4.0
+    min_warmth: int = 3
+    min_deference: int = 3
+    deference_ratio: float = 3.0
+
+    def fingerprint(self) -> str:
+        """Hash of the thresholds, the lexicons and the graph version"""
+        lexicon = [EDGE_LINES, sorted(INSULT_WORDS), sorted(WARM_WORDS), sorted(SECOND_PERSON), DEFERENCE.pattern]
+        payload = json.dumps([GRAPH_VERSION, list(self), lexicon], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+DEFAULT_PARAMS = GraphParams()
+
+
+class RelationshipGraph:
+    """
+    Relationship adjacency of one play.
+
+    Each kind is a speakers x speakers CSR matrix whose stored values are the
+    number of turns exchanged, so neighbours can be listed strongest first.
+    allies, opponents and associates are symmetric and disjoint;
+    subordinates[i, j] means j reports to i.
+    """
+
+    def __init__(self,
+                 play_name: str,
+                 speakers: List[str],
+                 adjacency: Dict[str, sparse.csr_matrix],
+                 fingerprint: str):
+        self.play_name = play_name
+        self.speakers = speakers
+        self.speaker_ids = {name: i for i, name in enumerate(speakers)}
+        self.adjacency = adjacency
+        self.fingerprint = fingerprint
+
+    def neighbours(self, character_name: str, kind: str) -> List[str]:
+        """Related characters of one kind, strongest tie first"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return []
+        matrix = self.adjacency[kind]
+        start, end = matrix.indptr[speaker_id], matrix.indptr[speaker_id + 1]
+        indices = matrix.indices[start:end]
+        order = np.lexsort((indices, -matrix.data[start:end]))
+        return [self.speakers[j] for j in indices[order]]
+
+    def superiors(self, character_name: str) -> List[str]:
+        """Characters this character reports to"""
+        speaker_id = self.speaker_ids.get(character_name)
+        if speaker_id is None:
+            return []
+        column = self.adjacency["subordinates"].getcol(speaker_id).tocoo()
+        return [self.speakers[i] for i in column.row[np.argsort(-column.data, kind="stable")]]
+
+    def to_dict(self) -> Dict[str, Dict[str, List[str]]]:
+        """relationships.json layout: character -> {kind: [characters]}"""
+        relationships = {}
+        for name in self.speakers:
+            entry = {kind: self.neighbours(name, kind) for kind in RELATION_KINDS}
+            if any(entry.values()):
+                relationships[name] = entry
+        return relationships
+
+    def save(self, cache_path: Path):
+        """Write the adjacency arrays to a single .npz"""
+        arrays = {
+            "version": np.array(GRAPH_VERSION),
+            "fingerprint": np.array(self.fingerprint),
+            "speakers": np.array(self.speakers, dtype=str),
+        }
+        for kind, matrix in self.adjacency.items():
+            arrays[f"{kind}_data"] = matrix.data
+            arrays[f"{kind}_indices"] = matrix.indices
+            arrays[f"{kind}_indptr"] = matrix.indptr
+        np.savez_compressed(cache_path, **arrays)
+
+    @classmethod
+    def load(cls, play_name: str, cache_path: Path) -> Optional["RelationshipGraph"]:
+        """Read a cached .npz, None if missing or from another graph version"""
+        try:
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if int(cached["version"]) != GRAPH_VERSION:
+                    return None
+                speakers = [str(name) for name in cached["speakers"]]
+                size = len(speakers)
+                adjacency = {
+                    kind: sparse.csr_matrix(
+                        (cached[f"{kind}_data"], cached[f"{kind}_indices"], cached[f"{kind}_indptr"]),
+                        shape=(size, size)
+                    )
+                    for kind in RELATION_KINDS
+                }
+                return cls(play_name, speakers, adjacency, str(cached["fingerprint"]))
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+
+
+def graph_fingerprint(interactions: PlayInteractions, params: GraphParams = DEFAULT_PARAMS) -> str:
+    """Dialogue fingerprint combined with the derivation parameters"""
+    return f"{interactions.fingerprint}:{params.fingerprint()}"
+
+
+def _tone_counts(lines: Sequence[str]):
+    """Insults, warm words and deferential addresses in some lines of a turn"""
+    insults = warmth = deference = 0
+    for text in lines:
+        text = text.lower()
+        deference += len(DEFERENCE.findall(text))
+        words = _WORD.findall(text)
+        # Insults and warmth only count when the line speaks to someone
+        if words and (words[0] == "o" or words[0] in INSULT_WORDS
+                      or not SECOND_PERSON.isdisjoint(words)):
+            insults += sum(word in INSULT_WORDS for word in words)
+            warmth += sum(word in WARM_WORDS for word in words)
+    return insults, warmth, deference
+
+
+def address_tone(speakers: List[str],
+                 line_speaker: Sequence[int],
+                 scene_line_offsets: Sequence[int],
+                 line_text: Callable[[int], str],
+                 edge_lines: int = EDGE_LINES) -> Dict[str, sparse.csr_matrix]:
+    """
+    How characters address each other, from the lines at turn boundaries
+
+    The first edge_lines of a turn answer the previous speaker and the last
+    edge_lines lead into the next one, so they are counted as spoken to
+    that character.
+
+    Args:
+        speakers (List[str]): Speaker names by speaker ID
+        line_speaker (Sequence[int]): Speaker ID of every line, in scene order
+        scene_line_offsets (Sequence[int]): First line of each scene (+ total)
+        line_text (Callable[[int], str]): Text of a line by line ID
+        edge_lines (int): Lines at each end of a turn to read
+
+    Returns:
+        Dict[str, sparse.csr_matrix]: TONE_KINDS counts, [i, j] = i to j
+    """
+    size = len(speakers)
+    line_speaker = np.asarray(line_speaker, dtype=np.int64)
+    offsets = np.asarray(scene_line_offsets, dtype=np.int64)
+    if line_speaker.size == 0:
+        empty = sparse.csr_matrix((size, size), dtype=np.int32)
+        return {kind: empty for kind in TONE_KINDS}
+
+    line_scene = np.repeat(np.arange(offsets.size - 1), np.diff(offsets))
+    boundary = np.empty(line_speaker.size, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (line_speaker[1:] != line_speaker[:-1]) | (line_scene[1:] != line_scene[:-1])
+    turn_starts = np.flatnonzero(boundary)
+    turn_ends = np.append(turn_starts[1:], line_speaker.size)
+    turn_speaker = line_speaker[turn_starts]
+    turn_scene = line_scene[turn_starts]
+
+    # Every pair of adjacent turns in a scene, read from both sides
+    follows = np.flatnonzero(turn_scene[1:] == turn_scene[:-1])
+    sources, targets, counts = [], [], []
+    for turn in follows:
+        answer = turn + 1
+        closing = range(max(turn_starts[turn], turn_ends[turn] - edge_lines), turn_ends[turn])
+        opening = range(turn_starts[answer], min(turn_starts[answer] + edge_lines, turn_ends[answer]))
+        sources.extend((turn_speaker[turn], turn_speaker[answer]))
+        targets.extend((turn_speaker[answer], turn_speaker[turn]))
+        counts.append(_tone_counts([line_text(line_id) for line_id in closing]))
+        counts.append(_tone_counts([line_text(line_id) for line_id in opening]))
+
+    if not counts:
+        empty = sparse.csr_matrix((size, size), dtype=np.int32)
+        return {kind: empty for kind in TONE_KINDS}
+    values = np.asarray(counts, dtype=np.int32)
+    tone = {}
+    for column, kind in enumerate(TONE_KINDS):
+        matrix = sparse.csr_matrix((values[:, column], (sources, targets)), shape=(size, size))
+        matrix.sum_duplicates()
+        matrix.eliminate_zeros()
+        tone[kind] = matrix
+    return tone
+
+
+def derive_relationships(interactions: PlayInteractions,
+                         tone: Dict[str, sparse.csr_matrix],
+                         params: GraphParams = DEFAULT_PARAMS) -> RelationshipGraph:
+    """
+    Derive the relationship graph of one play
+
+    Args:
+        interactions (PlayInteractions): Copresence/reply/line matrices
+        tone (Dict[str, sparse.csr_matrix]): address_tone counts for the same speakers
+        params (GraphParams): Derivation thresholds
+
+    Returns:
+        RelationshipGraph: CSR adjacency per relationship kind
+    """
+    size = len(interactions.speakers)
+    fingerprint = graph_fingerprint(interactions, params)
+    replies = interactions.replies.astype(np.int32)
+
+    # Upper-triangle pairs with enough turns exchanged in either direction
+    exchanges = sparse.triu(replies + replies.T, k=1).tocoo()
+    keep = exchanges.data >= params.min_exchanges
+    rows, cols, weight = exchanges.row[keep], exchanges.col[keep], exchanges.data[keep]
+
+    if rows.size == 0:
+        empty = sparse.csr_matrix((size, size), dtype=np.int32)
+        return RelationshipGraph(interactions.play_name, interactions.speakers,
+                                 {kind: empty for kind in RELATION_KINDS}, fingerprint)
+
+    def directed(kind):
+        matrix = tone[kind]
+        return np.asarray(matrix[rows, cols]).ravel(), np.asarray(matrix[cols, rows]).ravel()
+
+    insults_rc, insults_cr = directed("insults")
+    warmth_rc, warmth_cr = directed("warmth")
+    defer_rc, defer_cr = directed("deference")
+
+    insults = insults_rc + insults_cr
+    warmth = warmth_rc + warmth_cr
+    opposed = (insults >= params.min_insults) & (warmth <= params.warmth_per_insult * insults)
+    allied = (~opposed & (warmth_rc > 0) & (warmth_cr > 0) & (warmth >= params.min_warmth))
+    associated = ~(opposed | allied)
+
+    # row_over: the column character defers to the row character
+    row_over = (defer_cr >= params.min_deference) & (defer_cr >= params.deference_ratio * defer_rc)
+    col_over = (defer_rc >= params.min_deference) & (defer_rc >= params.deference_ratio * defer_cr)
+
+    def symmetric(mask):
+        r, c, w = rows[mask], cols[mask], weight[mask]
+        return sparse.csr_matrix((np.concatenate([w, w]), (np.concatenate([r, c]), np.concatenate([c, r]))),
+                                 shape=(size, size), dtype=np.int32)
+
+    superior = np.concatenate([rows[row_over], cols[col_over]])
+    subordinate = np.concatenate([cols[row_over], rows[col_over]])
+    subordinates = sparse.csr_matrix(
+        (np.concatenate([weight[row_over], weight[col_over]]), (superior, subordinate)),
+        shape=(size, size), dtype=np.int32
+    )
+
+    return RelationshipGraph(interactions.play_name, interactions.speakers, {
+        "allies": symmetric(allied),
+        "opponents": symmetric(opposed),
+        "associates": symmetric(associated),
+        "subordinates": subordinates
+    }, fingerprint)
+
+
+class RelationshipEngine:
+    """
+    Derives and caches relationship graphs for plays known to a PlayManager.
+
+    A play is recomputed only when its dialogue fingerprint (or the
+    derivation parameters) differ from those recorded in relationships.npz.
+    """
+
+    def __init__(self,
+                 play_manager,
+                 params: GraphParams = DEFAULT_PARAMS,
+                 analyzer: Optional[InteractionAnalyzer] = None):
+        self.logger = logging.getLogger(__name__)
+        self.play_manager = play_manager
+        self.params = params
+        self.analyzer = analyzer or InteractionAnalyzer(play_manager)
+        self.cache: Dict[str, RelationshipGraph] = {}
+        self.computed = 0
+
+    def _play_dir(self, play_name: str) -> Path:
+        return self.play_manager.base_path / play_name
+
+    def get_play_graph(self, play_name: str) -> Optional[RelationshipGraph]:
+        """
+        Relationship graph of a play, recomputed only if its dialogue changed
+
+        Args:
+            play_name (str): Play to analyze
+
+        Returns:
+            Optional[RelationshipGraph]: Graph, None if the play cannot be loaded
+        """
+        if play_name in self.cache:
+            return self.cache[play_name]
+
+        interactions = self.analyzer.get_play_interactions(play_name)
+        if interactions is None:
+            return None
+
+        play_dir = self._play_dir(play_name)
+        fingerprint = graph_fingerprint(interactions, self.params)
+        graph = RelationshipGraph.load(play_name, play_dir / GRAPH_FILENAME)
+        if graph is None or graph.fingerprint != fingerprint:
+            graph = derive_relationships(interactions, self._tone(play_name), self.params)
+            self.computed += 1
+            try:
+                graph.save(play_dir / GRAPH_FILENAME)
+            except OSError as e:
+                self.logger.warning(f"Could not cache relationships for {play_name}: {e}")
+        try:
+            self._write_relationships(play_name, graph)
+        except OSError as e:
+            self.logger.warning(f"Could not save relationships for {play_name}: {e}")
+
+        self.cache[play_name] = graph
+        return graph
+
+    def _tone(self, play_name: str) -> Dict[str, sparse.csr_matrix]:
+        """address_tone of a play, read through the manager's cache"""
+        entry = self.play_manager.get_play(play_name)
+        index = entry.character_index
+        return address_tone(index.speakers, index.line_speaker, index.scene_line_offsets, entry.line_text)
+
+    def _write_relationships(self, play_name: str, graph: RelationshipGraph):
+        """Write relationships.json (if it changed) and refresh the play's cached section"""
+        relationships = graph.to_dict()
+        path = self._play_dir(play_name) / RELATIONSHIPS_FILENAME
+        contents = json.dumps(relationships, indent=2, ensure_ascii=False) + "\n"
+        try:
+            unchanged = path.read_text(encoding="utf-8") == contents
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            path.write_text(contents, encoding="utf-8")
+        entry = self.play_manager.play_cache.get(play_name)
+        if entry is not None:
+            entry.sections["relationships"] = relationships
+
+    def get_canon_graphs(self, plays: Optional[List[str]] = None) -> Dict[str, RelationshipGraph]:
+        """
+        Relationship graphs for every available play (or a chosen subset)
+
+        Args:
+            plays (Optional[List[str]]): Plays to include (default: all available)
+
+        Returns:
+            Dict[str, RelationshipGraph]: play name -> graph
+        """
+        results = {}
+        for play_name in plays or self.play_manager.get_available_plays():
+            graph = self.get_play_graph(play_name)
+            if graph is not None:
+                results[play_name] = graph
+        return results
+
+
+def main():
+    """Derive relationships.json for the whole canon"""
+    import time
+
+    from .play_manager import PlayManager
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    engine = RelationshipEngine(PlayManager())
+    graphs = engine.get_canon_graphs()
+    for play_name, graph in graphs.items():
+        counts = ", ".join(f"{graph.adjacency[kind].nnz} {kind}" for kind in RELATION_KINDS)
+        print(f"{play_name}: {counts}")
+    print(f"{len(graphs)} plays ({engine.computed} recomputed) in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,31 @@ Created by RSGrizz
 Scrapes play data from MIT Shakespeare website
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
-import re
 from pathlib import Path
+from typing import Dict, List, Optional
+
+from .play_fetcher import FetchError, PlayFetcher
+from .play_parser import parse_play_html
 
 class ShakespeareScraper:
-    def __init__(self):
+    def __init__(self, fetcher: Optional[PlayFetcher] = None):
+        """
+        Initialize ShakespeareScraper
+
+        Args:
+            fetcher (Optional[PlayFetcher]): Shared fetch layer (default: cached, online)
+        """
         self.base_url = "http://shakespeare.mit.edu/"
         self.output_dir = Path("desktop_creator/data/static/plays")
+        self.fetcher = fetcher or PlayFetcher()
+
+    def play_url(self, play_name: str) -> str:
+        """URL of a play's full text"""
+        # Create URL-friendly name
+        play_url = play_name.lower().replace(" ", "")
+        return f"{self.base_url}{play_url}/full.html"
 
     def scrape_play(self, play_name):
         """
@@ -24,27 +39,43 @@ class ShakespeareScraper:
         - Scene information
         """
         print(f"Scraping {play_name}...")
-        
-        # Create URL-friendly name
-        play_url = play_name.lower().replace(" ", "")
-        url = f"{self.base_url}{play_url}/full.html"
 
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self.fetcher.fetch(self.play_url(play_name))
+            return self._process_play(play_name, response.text)
 
-            # Get character list
-            characters = self._extract_characters(soup)
-            
-            # Get dialogue
-            dialogue = self._extract_dialogue(soup)
+        except FetchError as e:
+            print(f"Error scraping {play_name}: {e}")
+            return None
+
+    def scrape_plays(self, play_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Scrape several plays, downloading them concurrently
 
-            # Create play data structure
-            play_data = {
-                "title": play_name,
-                "characters": characters,
-                "dialogue": dialogue
-            }
+        Args:
+            play_names (List[str]): Plays to scrape
+
+        Returns:
+            Dict[str, Optional[Dict]]: play name -> play data (None on failure)
+        """
+        urls = {play_name: self.play_url(play_name) for play_name in play_names}
+        responses = self.fetcher.fetch_many(urls.values())
+
+        results = {}
+        for play_name, url in urls.items():
+            response = responses[url]
+            if response is None:
+                print(f"Error scraping {play_name}: could not fetch {url}")
+                results[play_name] = None
+                continue
+            results[play_name] = self._process_play(play_name, response.text)
+        return results
+
+    def _process_play(self, play_name: str, html: str) -> Optional[Dict]:
+        """Parse a downloaded play and save it"""
+        try:
+            # Single streaming pass gives characters, acts and dialogue
+            play_data = parse_play_html(html, title=play_name)
 
             # Save to JSON
             self._save_play_data(play_name, play_data)
@@ -56,57 +87,6 @@ class ShakespeareScraper:
             print(f"Error scraping {play_name}: {e}")
             return None
 
-    def _extract_characters(self, soup):
-        """Extract character list from play"""
-        characters = {}
-        dramatis_personae = soup.find('blockquote')
-        
-        if dramatis_personae:
-            for line in dramatis_personae.text.split('\n'):
-                if line.strip():
-                    # Usually characters are in CAPS
-                    match = re.match(r'^([A-Z][A-Z\s]+)', line)
-                    if match:
-                        char_name = match.group(1).strip()
-                        characters[char_name] = {
-                            "description": line.replace(char_name, '').strip(),
-                            "lines": 0,  # Will count later
-                            "scenes": []  # Will fill later
-                        }
-        
-        return characters
-
-    def _extract_dialogue(self, soup):
-        """Extract all dialogue from play"""
-        dialogue = []
-        scenes = soup.find_all('scene')
-        
-        for scene in scenes:
-            scene_data = {
-                "scene_number": len(dialogue) + 1,
-                "speakers": [],
-                "lines": []
-            }
-            
-            # Find all dialogue
-            speeches = scene.find_all('speech')
-            for speech in speeches:
-                speaker = speech.find('speaker')
-                if speaker:
-                    speaker_name = speaker.text.strip()
-                    scene_data["speakers"].append(speaker_name)
-                    
-                    lines = speech.find_all('line')
-                    for line in lines:
-                        scene_data["lines"].append({
-                            "speaker": speaker_name,
-                            "text": line.text.strip()
-                        })
-            
-            dialogue.append(scene_data)
-        
-        return dialogue
-
     def _save_play_data(self, play_name, data):
         """Save play data to JSON files"""
         play_dir = self.output_dir / play_name.lower().replace(" ", "_")
@@ -121,7 +101,13 @@ class ShakespeareScraper:
             json.dump(data["characters"], f, indent=4)
 
 def main():
-    scraper = ShakespeareScraper()
+    parser = argparse.ArgumentParser(description="Scrape full play texts from the MIT Shakespeare site.")
+    parser.add_argument("--offline", action="store_true", help="Serve plays from the mirror/cache only.")
+    parser.add_argument("--mirror", type=Path, help="Local mirror directory (filled online, served offline).")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="Concurrent downloads.")
+    args = parser.parse_args()
+
+    scraper = ShakespeareScraper(PlayFetcher(mirror_dir=args.mirror, offline=args.offline, max_workers=args.jobs))
     
     # List of plays to scrape
     plays = [
@@ -131,8 +117,7 @@ def main():
         "Macbeth"
     ]
     
-    for play in plays:
-        scraper.scrape_play(play)
+    scraper.scrape_plays(plays)
 
 if __name__ == "__main__":
     main()
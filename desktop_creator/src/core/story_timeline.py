@@ -0,0 +1,296 @@
+"""
+story_timeline.py
+Created by RSGrizz
+
+Scene-anchored story timeline. The act/scene order of a parsed play is
+laid out over STORY_DAYS of calendar time (longer scenes get longer
+windows, acts are separated by a pause), and every scene turns into an
+activity kernel over the hours of the story:
+
+    lead-up     activity ramps up in the LEAD_HOURS before the scene
+    scene       full activity while it plays
+    aftermath   a burst (AFTERMATH_PEAK) that decays over AFTERMATH_HOURS
+
+A pair's hourly weights are the kernels of the scenes it speaks in,
+weighted by the lines the two speak there, so the conspirators text each
+other before the assassination scene and the calls flood in after it.
+
+The layout is computed once per play and cached as story_timeline.json in
+the play directory (keyed by a fingerprint of the scene structure); pair
+weights are cached per timeline, so per-event use is a lookup.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+CACHE_FILENAME = "story_timeline.json"
+CACHE_VERSION = 1
+
+# Calendar days the whole play is spread over
+STORY_DAYS = 28
+
+# Pause between acts, in mean scene lengths
+ACT_GAP_SCENES = 1.5
+
+# Scene kernel shape
+LEAD_HOURS = 48.0
+AFTERMATH_HOURS = 24.0
+AFTERMATH_PEAK = 1.5
+
+# Weight of a scene for a pair when only one of the two speaks in it
+ONE_SIDED_WEIGHT = 0.25
+
+# Background activity relative to the busiest hour, so quiet stretches are not empty
+BACKGROUND_WEIGHT = 0.02
+
+
+class SceneWindow(NamedTuple):
+    """A scene and its window, in hours after the story start"""
+    scene_number: int
+    act: int
+    scene: int
+    title: str
+    location: str
+    start_hour: float
+    end_hour: float
+
+
+def story_fingerprint(play_data: Dict, days: float) -> str:
+    """Hash of the scene structure (and story length) a layout is derived from"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([CACHE_VERSION, days], ensure_ascii=False).encode("utf-8"))
+    for scene in play_data.get("dialogue", []):
+        digest.update(json.dumps([scene.get("title"), scene.get("act"), len(scene.get("lines", []))],
+                                 ensure_ascii=False).encode("utf-8"))
+        for line in scene.get("lines", []):
+            digest.update(line["speaker"].encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class StoryTimeline:
+    """
+    Scene windows of one play and the hourly activity they imply.
+
+    Usage:
+        story = get_story_timeline("Julius_Caesar", play_dir, play_data)
+        weights = story.pair_bins("BRUTUS", "CASSIUS")     # one weight per story hour
+        story.scene_at(when, start)                        # scene playing at a datetime
+    """
+
+    def __init__(self,
+                 play_name: str,
+                 scenes: List[SceneWindow],
+                 scene_lines: List[Dict[str, int]],
+                 days: float,
+                 fingerprint: str = ""):
+        """
+        Initialize StoryTimeline
+
+        Args:
+            play_name (str): Play name
+            scenes (List[SceneWindow]): Scene windows in play order
+            scene_lines (List[Dict[str, int]]): Lines per speaker of each scene
+            days (float): Story length in days
+            fingerprint (str): Fingerprint of the play structure
+        """
+        self.play_name = play_name
+        self.scenes = scenes
+        self.scene_lines = scene_lines
+        self.days = days
+        self.span_hours = int(round(days * 24))
+        self.fingerprint = fingerprint
+        self._starts = [scene.start_hour for scene in scenes]
+        self._kernels: Optional[np.ndarray] = None
+        self._pair_bins: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def from_play_data(cls, play_name: str, play_data: Dict, days: float = STORY_DAYS) -> "StoryTimeline":
+        """
+        Lay a parsed play's scenes out over the story
+
+        Args:
+            play_name (str): Play name
+            play_data (Dict): Parsed play (play_parser layout)
+            days (float): Story length in days
+
+        Returns:
+            StoryTimeline: Scene windows proportional to sqrt(lines) + 1,
+                with ACT_GAP_SCENES mean scene lengths between acts
+        """
+        dialogue = play_data.get("dialogue", [])
+        scene_lines = []
+        for scene in dialogue:
+            counts: Dict[str, int] = {}
+            for line in scene.get("lines", []):
+                counts[line["speaker"]] = counts.get(line["speaker"], 0) + 1
+            scene_lines.append(counts)
+
+        units = [math.sqrt(sum(counts.values())) + 1.0 for counts in scene_lines]
+        gap = ACT_GAP_SCENES * (sum(units) / len(units)) if units else 0.0
+        act_breaks = sum(1 for previous, scene in zip(dialogue, dialogue[1:]) if scene.get("act") != previous.get("act"))
+        total = sum(units) + gap * act_breaks
+        hours_per_unit = days * 24 / total if total else 0.0
+
+        scenes = []
+        position = 0.0
+        for i, (scene, size) in enumerate(zip(dialogue, units)):
+            if i and scene.get("act") != dialogue[i - 1].get("act"):
+                position += gap
+            start = position * hours_per_unit
+            position += size
+            scenes.append(SceneWindow(
+                scene_number=scene.get("scene_number", i + 1),
+                act=scene.get("act", 0),
+                scene=scene.get("scene", 0),
+                title=scene.get("title", ""),
+                location=scene.get("location", ""),
+                start_hour=start,
+                end_hour=position * hours_per_unit
+            ))
+        return cls(play_name, scenes, scene_lines, days, story_fingerprint(play_data, days))
+
+    def save(self, cache_path: Path):
+        """Write the layout as JSON"""
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "fingerprint": self.fingerprint,
+                "play": self.play_name,
+                "days": self.days,
+                "scenes": [dict(scene._asdict(), lines=lines)
+                           for scene, lines in zip(self.scenes, self.scene_lines)]
+            }, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, cache_path: Path) -> Optional["StoryTimeline"]:
+        """Read a cached layout, None if missing, unreadable or from another cache version"""
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("version") != CACHE_VERSION:
+                return None
+            scenes = [SceneWindow(**{field: entry[field] for field in SceneWindow._fields})
+                      for entry in cached["scenes"]]
+            scene_lines = [entry["lines"] for entry in cached["scenes"]]
+            return cls(cached["play"], scenes, scene_lines, cached["days"], cached["fingerprint"])
+        except (FileNotFoundError, KeyError, TypeError, ValueError, OSError):
+            return None
+
+    def scene_at_hour(self, hour: float) -> Optional[SceneWindow]:
+        """Scene playing at an hour of the story, None between scenes or outside it"""
+        i = bisect.bisect_right(self._starts, hour) - 1
+        if i < 0 or hour >= self.scenes[i].end_hour:
+            return None
+        return self.scenes[i]
+
+    def scene_at(self, when: datetime, start: datetime) -> Optional[SceneWindow]:
+        """Scene playing at a datetime for a story starting at start"""
+        return self.scene_at_hour((when - start) / timedelta(hours=1))
+
+    def scene_window(self, scene_number: int, start: datetime) -> Tuple[datetime, datetime]:
+        """
+        Calendar window of a scene
+
+        Raises:
+            KeyError: No scene with this number
+        """
+        for scene in self.scenes:
+            if scene.scene_number == scene_number:
+                return start + timedelta(hours=scene.start_hour), start + timedelta(hours=scene.end_hour)
+        raise KeyError(f"{self.play_name} has no scene {scene_number}")
+
+    @property
+    def kernels(self) -> np.ndarray:
+        """Scene x hour activity kernels (lead-up ramp, scene, decaying aftermath)"""
+        if self._kernels is None:
+            hours = np.arange(self.span_hours, dtype=np.float64) + 0.5
+            starts = np.array(self._starts, dtype=np.float64)[:, None]
+            ends = np.array([scene.end_hour for scene in self.scenes], dtype=np.float64)[:, None]
+            lead = np.clip(1.0 - (starts - hours) / LEAD_HOURS, 0.0, 1.0)
+            after = AFTERMATH_PEAK * np.exp(-np.maximum(hours - ends, 0.0) / AFTERMATH_HOURS)
+            self._kernels = np.where(hours < starts, lead, np.where(hours < ends, 1.0, after))
+        return self._kernels
+
+    def scene_weights(self, first: str, second: str) -> np.ndarray:
+        """Weight of every scene for a pair: the lines the two speak in it"""
+        weights = np.zeros(len(self.scenes), dtype=np.float64)
+        for i, counts in enumerate(self.scene_lines):
+            spoken = counts.get(first, 0) + counts.get(second, 0)
+            if spoken:
+                both = first in counts and second in counts
+                weights[i] = spoken if both else ONE_SIDED_WEIGHT * spoken
+        return weights
+
+    def pair_bins(self, first: str, second: str) -> np.ndarray:
+        """
+        Hourly story activity of a pair (cached per pair)
+
+        Args:
+            first (str): One character
+            second (str): The other character
+
+        Returns:
+            np.ndarray: span_hours weights; flat when the pair never speaks
+        """
+        key = (first, second) if first <= second else (second, first)
+        bins = self._pair_bins.get(key)
+        if bins is None:
+            if not self.scenes or self.span_hours == 0:
+                bins = np.ones(self.span_hours, dtype=np.float64)
+            else:
+                bins = self.scene_weights(*key) @ self.kernels
+                peak = bins.max()
+                bins = bins / peak + BACKGROUND_WEIGHT if peak > 0 else np.ones(self.span_hours)
+            self._pair_bins[key] = bins
+        return bins
+
+
+_timelines: Dict[Tuple[Path, float], StoryTimeline] = {}
+_timelines_lock = threading.Lock()
+
+
+def get_story_timeline(play_name: str,
+                       play_dir: Path,
+                       play_data: Dict,
+                       days: float = STORY_DAYS) -> StoryTimeline:
+    """
+    Story timeline of a play, from this process, the play's cache file, or computed
+
+    Args:
+        play_name (str): Play name
+        play_dir (Path): Play directory (holds story_timeline.json)
+        play_data (Dict): Parsed play
+        days (float): Story length in days
+
+    Returns:
+        StoryTimeline: Layout for the play
+    """
+    key = (Path(play_dir).resolve(), float(days))
+    fingerprint = story_fingerprint(play_data, days)
+    with _timelines_lock:
+        story = _timelines.get(key)
+        if story is not None and story.fingerprint == fingerprint:
+            return story
+
+    cache_path = Path(play_dir) / CACHE_FILENAME
+    story = StoryTimeline.load(cache_path)
+    if story is None or story.fingerprint != fingerprint:
+        story = StoryTimeline.from_play_data(play_name, play_data, days)
+        try:
+            story.save(cache_path)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not cache story timeline for {play_name}: {e}")
+
+    with _timelines_lock:
+        _timelines[key] = story
+    return story
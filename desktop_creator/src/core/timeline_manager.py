@@ -1,50 +1,291 @@
-    def _create_relationship_mapping(self, play_name: str) -> Dict:
-        """Create modern relationship mappings"""
-        relationships = {
-            "julius_caesar": {
-                "CAESAR": {
-                    "allies": ["ANTONY", "CALPURNIA"],
-                    "opponents": ["BRUTUS", "CASSIUS"],
-                    "subordinates": ["CINNA", "DECIUS"]
-                },
-                "BRUTUS": {
-                    "allies": ["CASSIUS", "CICERO"],
-                    "opponents": ["CAESAR", "ANTONY"],
-                    "subordinates": ["LUCIUS"]
-                }
-            },
-            "hamlet": {
-                "HAMLET": {
-                    "allies": ["HORATIO", "OPHELIA"],
-                    "opponents": ["CLAUDIUS", "POLONIUS"],
-                    "subordinates": ["ROSENCRANTZ", "GUILDENSTERN"]
-                },
-                "CLAUDIUS": {
-                    "allies": ["POLONIUS", "GERTRUDE"],
-                    "opponents": ["HAMLET"],
-                    "subordinates": ["OSRIC"]
-                }
-            }
-        }
+"""
+timeline_manager.py
+Created by RSGrizz
+
+Lazy communication timeline for a play. Every character pair is an
+independent Poisson arrival process (calls and texts at its own daily
+rate, shaped by both characters' waking-hour and weekday profiles); the
+pair processes are merged with a heap into one time-ordered stream of
+events, the `timeline` that CallGenerator.generate_call_logs and
+SMSGenerator.generate_sms_messages consume.
+
+With a StoryTimeline the timeline covers the story only, and each pair's
+arrivals also follow the scenes the two speak in (see story_timeline.py).
+
+Only the next pending arrival of each pair is held, so streaming months of
+history costs memory proportional to the number of pairs, not of events.
+A pair's arrivals in one week are drawn in bulk (utils.timestamp_engine)
+from a stream keyed by (seed, play, pair, "timeline", week), so any window
+of the timeline can be produced on its own and matches the same window of
+a full run.
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from utils.seeded_rng import SeededRNG
+from utils.timestamp_engine import (ActivityProfile, IntensityTable, TimestampEngine, character_profile,
+                                    pair_weights, week_table)
+
+from .story_timeline import StoryTimeline
+
+EVENT_TYPES = ("call", "sms")
+BLOCK_SECONDS = 7 * 24 * 3600
+DAY_SECONDS = 24 * 3600
+
+# Share of a pair's events that are texts rather than calls
+DEFAULT_SMS_SHARE = 0.7
+
+# Events per character per day spread over a play's ties by from_analytics
+DEFAULT_EVENTS_PER_CHARACTER = 2.0
+
+
+class PairProcess(NamedTuple):
+    """Arrival process of one pair; rate counts both directions and both types"""
+    first: str
+    second: str
+    rate: float
+    sms_share: float
+    context: str
+
+
+# Pending arrival: (seconds after start, pair index, reversed direction, is text)
+Arrival = Tuple[float, int, bool, bool]
+
+
+class TimelineManager:
+    """
+    Time-ordered event stream for the pairs of one play.
+
+    Usage:
+        timeline = TimelineManager.from_analytics("Hamlet", analytics, seed=7, characters=cast)
+        for event in timeline.events(end=timeline.start + timedelta(days=90)):
+            ...
+    """
 
-        return relationships.get(play_name, {})
+    def __init__(self,
+                 play_name: str,
+                 seed: Optional[int] = None,
+                 start: Optional[datetime] = None,
+                 profiles: Optional[Mapping[str, ActivityProfile]] = None,
+                 story: Optional[StoryTimeline] = None):
+        """
+        Initialize TimelineManager
 
-    def _modernize_relationships(self, character: str, relationships: Dict) -> Dict:
-        """Convert relationships to modern context"""
-        modern_rels = {
-            "reports_to": [],
-            "supervises": [],
-            "collaborates_with": [],
-            "conflicts_with": []
+        Args:
+            play_name (str): Play the events belong to (part of every stream key)
+            seed (Optional[int]): Scenario seed (default: a random seed, kept in self.rng.seed)
+            start (Optional[datetime]): Beginning of the timeline (default: today at midnight)
+            profiles (Optional[Mapping[str, ActivityProfile]]): Activity profile per
+                character (default: a stable per-character profile from the seed)
+            story (Optional[StoryTimeline]): Scene layout of the play; the
+                timeline then ends with the story
+        """
+        self.play_name = play_name
+        self.rng = SeededRNG(seed)
+        if start is None:
+            start = datetime.combine(datetime.now().date(), datetime.min.time())
+        self.start = start
+        self.pairs: List[PairProcess] = []
+        self.profiles: Dict[str, ActivityProfile] = dict(profiles or {})
+        self._tables: Dict[int, IntensityTable] = {}
+        self.story = story
+        self._story_engine: Optional[TimestampEngine] = None
+        if story is not None:
+            self._story_engine = TimestampEngine(start, self.end, self.rng)
+
+    @property
+    def end(self) -> Optional[datetime]:
+        """End of the story, None when the timeline runs on forever"""
+        return self.start + timedelta(hours=self.story.span_hours) if self.story is not None else None
+
+    def profile(self, character: str) -> ActivityProfile:
+        """Activity profile of a character"""
+        profile = self.profiles.get(character)
+        if profile is None:
+            profile = self.profiles[character] = character_profile(self.rng, self.play_name, character)
+        return profile
+
+    def _pair_table(self, pair_index: int) -> IntensityTable:
+        """CDF table of a pair: one week phased to the timeline start, or the whole story"""
+        table = self._tables.get(pair_index)
+        if table is None:
+            pair = self.pairs[pair_index]
+            weights = pair_weights(self.profile(pair.first), self.profile(pair.second))
+            if self.story is None:
+                table = week_table(weights, self.start)
+            else:
+                engine = self._story_engine
+                table = engine.bin_table(engine.span_weights(weights) * self.story.pair_bins(pair.first, pair.second))
+            self._tables[pair_index] = table
+        return table
+
+    def add_pair(self,
+                 first: str,
+                 second: str,
+                 rate: float,
+                 sms_share: float = DEFAULT_SMS_SHARE,
+                 context: str = "general"):
+        """
+        Add the arrival process of one pair
+
+        Args:
+            first (str): One character
+            second (str): The other character
+            rate (float): Mean events per day between the two
+            sms_share (float): Probability that an event is a text
+            context (str): Event context passed on to the generators
+
+        Raises:
+            ValueError: Same character twice, negative rate or share outside [0, 1]
+        """
+        if first == second:
+            raise ValueError(f"A pair needs two different characters, got {first} twice")
+        if rate < 0 or not 0.0 <= sms_share <= 1.0:
+            raise ValueError(f"Invalid rate {rate} or sms_share {sms_share} for {first}/{second}")
+        self.pairs.append(PairProcess(first, second, rate, sms_share, context))
+
+    @classmethod
+    def from_analytics(cls,
+                       play_name: str,
+                       analytics,
+                       seed: Optional[int] = None,
+                       start: Optional[datetime] = None,
+                       events_per_day: Optional[float] = None,
+                       sms_share: float = DEFAULT_SMS_SHARE,
+                       story: Optional[StoryTimeline] = None,
+                       characters: Optional[Iterable[str]] = None) -> "TimelineManager":
+        """
+        Timeline whose pair rates follow a play's graph analytics
+
+        Args:
+            play_name (str): Play name
+            analytics (PlayAnalytics): Relationship graph analytics of the play
+            seed (Optional[int]): Scenario seed
+            start (Optional[datetime]): Beginning of the timeline
+            events_per_day (Optional[float]): Total daily events of the cast
+                (default: DEFAULT_EVENTS_PER_CHARACTER per speaker)
+            sms_share (float): Probability that an event is a text
+            story (Optional[StoryTimeline]): Scene layout to anchor events to
+            characters (Optional[Iterable[str]]): Cast with phones (data.json);
+                ties to any other speaker (chorus, "All", numbered extras)
+                are dropped. Default: every speaker
+
+        Returns:
+            TimelineManager: One pair process per tie, rate proportional to
+                its communication weight
+        """
+        timeline = cls(play_name, seed, start, story=story)
+        speakers = analytics.speakers
+        rows, cols, weights = analytics.communication_weights()
+        if characters is not None:
+            cast = set(characters)
+            keep = [index for index, (i, j) in enumerate(zip(rows, cols))
+                    if speakers[i] in cast and speakers[j] in cast]
+            rows, cols, weights = rows[keep], cols[keep], weights[keep]
+            speakers_in_cast = sum(1 for speaker in speakers if speaker in cast)
+        else:
+            speakers_in_cast = len(speakers)
+        total = float(weights.sum())
+        if total <= 0:
+            return timeline
+        if events_per_day is None:
+            events_per_day = DEFAULT_EVENTS_PER_CHARACTER * speakers_in_cast
+        for i, j, weight in zip(rows, cols, weights):
+            timeline.add_pair(speakers[i], speakers[j], events_per_day * float(weight) / total, sms_share)
+        return timeline
+
+    def _arrivals(self, pair_index: int, start_offset: float, end_offset: Optional[float]) -> Iterator[Arrival]:
+        """Arrivals of one pair from start_offset on, one keyed stream per week"""
+        pair = self.pairs[pair_index]
+        if pair.rate <= 0:
+            return
+        table = self._pair_table(pair_index)
+        key = (pair.first, pair.second)
+        if self.story is not None:
+            # The whole story is a single block
+            generator = self.rng.numpy_stream(self.play_name, key, "story_timeline")
+            yield from self._block(pair_index, 0.0, table.arrivals(generator, pair.rate * self.story.days),
+                                   generator, start_offset)
+            return
+
+        expected = pair.rate * BLOCK_SECONDS / DAY_SECONDS
+        block = int(start_offset // BLOCK_SECONDS)
+        while end_offset is None or block * BLOCK_SECONDS < end_offset:
+            generator = self.rng.numpy_stream(self.play_name, key, "timeline", block)
+            yield from self._block(pair_index, block * BLOCK_SECONDS, table.arrivals(generator, expected),
+                                   generator, start_offset)
+            block += 1
+
+    def _block(self, pair_index: int, block_offset: float, hours, generator, start_offset: float) -> Iterator[Arrival]:
+        """Arrivals of one drawn block (hours after block_offset seconds)"""
+        sms_share = self.pairs[pair_index].sms_share
+        offsets = (block_offset + hours * 3600.0).tolist()
+        # One uniform per event decides both direction and type
+        splits = (generator.random(len(offsets)) * 2.0).tolist()
+        for offset, split in zip(offsets, splits):
+            if offset >= start_offset:
+                yield offset, pair_index, split >= 1.0, split % 1.0 < sms_share
+
+    def _event(self, arrival: Arrival) -> Dict:
+        offset, pair_index, reverse, is_sms = arrival
+        pair = self.pairs[pair_index]
+        sender, recipient = (pair.second, pair.first) if reverse else (pair.first, pair.second)
+        return {
+            "type": "sms" if is_sms else "call",
+            "from": sender,
+            "to": recipient,
+            "timestamp": self.start + timedelta(seconds=offset),
+            "context": pair.context,
+            "play": self.play_name
         }
 
-        # Convert traditional relationships to modern organizational relationships
-        if "allies" in relationships:
-            modern_rels["collaborates_with"] = relationships["allies"]
-        if "opponents" in relationships:
-            modern_rels["conflicts_with"] = relationships["opponents"]
-        if "subordinates" in relationships:
-            modern_rels["supervises"] = relationships["subordinates"]
+    def events(self,
+               start: Optional[datetime] = None,
+               end: Optional[datetime] = None,
+               types: Iterable[str] = EVENT_TYPES) -> Iterator[Dict]:
+        """
+        Stream events in time order
+
+        Args:
+            start (Optional[datetime]): First instant to include (default: self.start)
+            end (Optional[datetime]): Instant to stop before (default: never stop)
+            types (Iterable[str]): Event types to yield ("call", "sms")
+
+        Yields:
+            Dict: Event with type, from, to, timestamp, context and play
+        """
+        start_offset = max((start - self.start).total_seconds(), 0.0) if start else 0.0
+        end_offset = (end - self.start).total_seconds() if end else None
+        wanted = set(types)
+
+        # One pending arrival per pair; the heap always pops the earliest
+        streams: List[Iterator[Arrival]] = []
+        heap: List[Arrival] = []
+        for pair_index in range(len(self.pairs)):
+            arrivals = self._arrivals(pair_index, start_offset, end_offset)
+            streams.append(arrivals)
+            first = next(arrivals, None)
+            if first is not None:
+                heap.append(first)
+        heapq.heapify(heap)
+
+        while heap:
+            arrival = heap[0]
+            if end_offset is not None and arrival[0] >= end_offset:
+                return
+            if ("sms" if arrival[3] else "call") in wanted:
+                yield self._event(arrival)
+            following = next(streams[arrival[1]], None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, following)
 
-        return modern_rels
+    def __iter__(self) -> Iterator[Dict]:
+        return self.events()
 
+    def expected_events(self, days: float) -> float:
+        """Mean number of events in a window of this many days"""
+        return days * sum(pair.rate for pair in self.pairs)
@@ -0,0 +1,372 @@
+"""
+timeline_store.py
+Created by RSGrizz
+
+Persistent ground-truth timeline: every generated call and text of a play
+in an SQLite file (WAL journal) next to its data.json, so instructors can
+ask questions like "all events involving BRUTUS between Mar 14 and Mar 16"
+and export answer keys without re-running the generator.
+
+Layout:
+    meta     key -> value (store version, time zone of ts)
+    events   one row per event: play, type, ts (epoch ms, UTC), duration_ms,
+             sender, recipient, context and the remaining fields of the
+             generated record as JSON
+    timeline view of events with readable UTC times, for ad hoc SQL
+
+Generated timestamps are naive story times; they are stored as if they were
+UTC, so the same timeline gives the same ts on every host and reads back
+unchanged. Aware datetimes are converted to UTC.
+
+Indexes on (ts), (type, ts), (sender, ts) and (recipient, ts) keep range,
+type and participant queries to index scans. Events are written with
+executemany in batches, so a generator can stream a timeline of any length
+into the store. add_events commits every batch; replace_play swaps a play
+in a single transaction, so readers (and a crashed run) see either the old
+events of the play or all of the new ones.
+
+Command line:
+    python -m core.timeline_store <timeline.db> --participant BRUTUS \\
+        --start 2026-03-14 --end 2026-03-17 [--type call] [--export key.csv]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from utils.timestamp_engine import ms_to_datetime, to_ms
+
+PathLike = Union[str, Path]
+
+STORE_VERSION = 2
+STORE_TIMEZONE = "UTC"
+TIMELINE_FILENAME = "timeline.db"
+DEFAULT_BATCH_SIZE = 10000
+
+# Event fields stored in their own columns; everything else goes to data
+EVENT_FIELDS = ("type", "from", "to", "timestamp", "duration", "context", "play")
+ANSWER_KEY_FIELDS = ("timestamp", "type", "from", "to", "duration", "context", "play")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        play TEXT,
+        type TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        duration_ms INTEGER NOT NULL DEFAULT 0,
+        sender TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        context TEXT,
+        data TEXT
+    );
+    CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+    CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+    CREATE INDEX IF NOT EXISTS events_sender_ts ON events (sender, ts);
+    CREATE INDEX IF NOT EXISTS events_recipient_ts ON events (recipient, ts);
+    CREATE VIEW IF NOT EXISTS timeline AS
+        SELECT id, play, type, datetime(ts / 1000, 'unixepoch') AS time,
+               duration_ms / 1000 AS duration, sender, recipient, context
+        FROM events;
+"""
+
+Row = Tuple[Optional[str], str, int, int, str, str, Optional[str], Optional[str]]
+
+
+def _row(event: Dict, play: Optional[str]) -> Row:
+    """events row of a generated record (call_data entry or TimelineManager event)"""
+    extra = {key: value for key, value in event.items() if key not in EVENT_FIELDS}
+    return (
+        event.get("play", play),
+        event.get("type", "call"),
+        to_ms(event["timestamp"]),
+        int(event.get("duration", 0) * 1000),
+        event["from"],
+        event["to"],
+        event.get("context"),
+        json.dumps(extra, ensure_ascii=False, separators=(",", ":"), default=str) if extra else None
+    )
+
+
+def _event(row: Tuple) -> Dict:
+    play, event_type, ts, duration_ms, sender, recipient, context, data = row
+    event = {
+        "timestamp": ms_to_datetime(ts).isoformat(),
+        "type": event_type,
+        "from": sender,
+        "to": recipient,
+        "duration": duration_ms // 1000,
+        "context": context,
+        "play": play
+    }
+    if data:
+        event.update(json.loads(data))
+    return event
+
+
+class TimelineStore:
+    """
+    Events of one or more plays in an SQLite file.
+
+    Usage:
+        with TimelineStore(path) as store:
+            store.replace_play("Julius_Caesar", events)
+            for event in store.query(participant="BRUTUS", start=march_14, end=march_17):
+                ...
+    """
+
+    def __init__(self, path: PathLike, read_only: bool = False, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Open (and create) a store
+
+        Args:
+            path (PathLike): Store file
+            read_only (bool): Open for queries only
+            batch_size (int): Events per insert transaction
+
+        Raises:
+            FileNotFoundError: read_only and the store does not exist
+            ValueError: read_only and the store was written by another
+                STORE_VERSION (a writable open rebuilds such a store empty)
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.read_only = read_only
+        if read_only:
+            if not self.path.exists():
+                raise FileNotFoundError(f"No timeline store at {self.path}")
+            self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+            if self._version() not in (None, str(STORE_VERSION)):
+                # Events are rebuilt with data.json, so an old layout is dropped
+                logging.getLogger(__name__).warning(f"Discarding outdated timeline store {self.path}")
+                self.connection.executescript(
+                    "DROP VIEW IF EXISTS timeline; DROP TABLE IF EXISTS events; DROP TABLE meta;")
+            self.connection.executescript(SCHEMA)
+            with self.connection:
+                self.connection.executemany("INSERT OR IGNORE INTO meta VALUES (?, ?)",
+                                            [("version", str(STORE_VERSION)), ("timezone", STORE_TIMEZONE)])
+
+        if self._version() != str(STORE_VERSION):
+            self.connection.close()
+            raise ValueError(f"{self.path} is not a version {STORE_VERSION} timeline store")
+
+    def _version(self) -> Optional[str]:
+        try:
+            version = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.OperationalError:
+            return None  # no meta table
+        return version[0] if version is not None else None
+
+    def add_events(self, events: Iterable[Dict], play: Optional[str] = None) -> int:
+        """
+        Insert events in batched transactions (any iterable, e.g. a
+        TimelineManager stream; it is consumed batch by batch)
+
+        Args:
+            events (Iterable[Dict]): Events with from, to, timestamp and
+                optionally type, duration (seconds), context and play
+            play (Optional[str]): Play of events that carry none
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        for batch in self._batches(events, play):
+            with self.connection:
+                written += self._insert(batch)
+        return written
+
+    def _batches(self, events: Iterable[Dict], play: Optional[str]) -> Iterator[List[Row]]:
+        batch: List[Row] = []
+        for event in events:
+            batch.append(_row(event, play))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _insert(self, batch: List[Row]) -> int:
+        """Insert rows in the current transaction (the caller commits)"""
+        self.connection.executemany(
+            "INSERT INTO events (play, type, ts, duration_ms, sender, recipient, context, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        return len(batch)
+
+    def replace_play(self, play: str, events: Iterable[Dict]) -> int:
+        """
+        Drop a play's events and write the new ones (a rebuild of the play)
+
+        The delete and every insert share one transaction: if writing fails
+        or the process dies part way, the play keeps its previous events.
+
+        Args:
+            play (str): Play to replace
+            events (Iterable[Dict]): Its new events (see add_events)
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        with self.connection:
+            self.connection.execute("DELETE FROM events WHERE play = ?", (play,))
+            for batch in self._batches(events, play):
+                written += self._insert(batch)
+        return written
+
+    @staticmethod
+    def _where(play: Optional[str],
+               participant: Optional[str],
+               start: Optional[datetime],
+               end: Optional[datetime],
+               types: Optional[Sequence[str]]) -> Tuple[str, List]:
+        clauses = []
+        params: List = []
+        if play is not None:
+            clauses.append("play = ?")
+            params.append(play)
+        if participant is not None:
+            clauses.append("(sender = ? OR recipient = ?)")
+            params.extend((participant, participant))
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_ms(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_ms(end))
+        if types:
+            clauses.append(f"type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self,
+              participant: Optional[str] = None,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              types: Optional[Sequence[str]] = None,
+              play: Optional[str] = None,
+              limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Events matching every given filter, in time order
+
+        Args:
+            participant (Optional[str]): Sender or recipient
+            start (Optional[datetime]): First instant to include
+            end (Optional[datetime]): Instant to stop before
+            types (Optional[Sequence[str]]): Event types ("call", "sms")
+            play (Optional[str]): Play
+            limit (Optional[int]): Maximum number of events
+
+        Yields:
+            Dict: Event with ISO timestamp, type, from, to, duration (seconds),
+                context, play and the other fields it was stored with
+        """
+        where, params = self._where(play, participant, start, end, types)
+        sql = ("SELECT play, type, ts, duration_ms, sender, recipient, context, data FROM events"
+               f"{where} ORDER BY ts, id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        for row in self.connection.execute(sql, params):
+            yield _event(row)
+
+    def count(self,
+              participant: Optional[str] = None,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              types: Optional[Sequence[str]] = None,
+              play: Optional[str] = None) -> int:
+        """Number of events matching the filters (see query)"""
+        where, params = self._where(play, participant, start, end, types)
+        return self.connection.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def participants(self, play: Optional[str] = None) -> List[str]:
+        """Everyone who sent or received an event"""
+        where, params = self._where(play, None, None, None, None)
+        sql = f"SELECT sender FROM events{where} UNION SELECT recipient FROM events{where} ORDER BY 1"
+        return [name for name, in self.connection.execute(sql, params + params)]
+
+    def export_answer_key(self, output_file: PathLike, format: str = "csv", **filters) -> int:
+        """
+        Write the events matching the filters (see query) as an answer key
+
+        Args:
+            output_file (PathLike): File to write
+            format (str): "csv" (ANSWER_KEY_FIELDS columns) or "json"
+            **filters: participant, start, end, types, play
+
+        Returns:
+            int: Number of events written
+
+        Raises:
+            ValueError: Unsupported format
+        """
+        if format not in ("csv", "json"):
+            raise ValueError(f"Unsupported answer key format: {format}")
+        written = 0
+        with open(output_file, "w", newline="", encoding="utf-8") as f:
+            if format == "csv":
+                writer = csv.DictWriter(f, fieldnames=ANSWER_KEY_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for event in self.query(**filters):
+                    writer.writerow(event)
+                    written += 1
+            else:
+                # Streamed one event at a time, so keys of any size fit
+                f.write("[")
+                for event in self.query(**filters):
+                    f.write(",\n    " if written else "\n    ")
+                    f.write(json.dumps(event, ensure_ascii=False))
+                    written += 1
+                f.write("\n]\n" if written else "]\n")
+        logging.getLogger(__name__).info(f"Answer key with {written} events written to {output_file}")
+        return written
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "TimelineStore":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+
+def main(argv=None):
+    """Query a timeline store or export an answer key from it"""
+    parser = argparse.ArgumentParser(description="Query the ground-truth timeline of generated plays.")
+    parser.add_argument("store", help=f"Timeline store ({TIMELINE_FILENAME} in a play's data directory)")
+    parser.add_argument("--participant", help="Sender or recipient")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First ISO date/time to include (UTC unless it has an offset)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="ISO date/time to stop before (UTC unless it has an offset)")
+    parser.add_argument("--type", action="append", dest="types", choices=("call", "sms"),
+                        help="Event type (repeatable)")
+    parser.add_argument("--play", help="Play (for stores holding several)")
+    parser.add_argument("--export", help="Write an answer key (.csv or .json) instead of printing")
+    args = parser.parse_args(argv)
+
+    filters = {"participant": args.participant, "start": args.start, "end": args.end,
+               "types": args.types, "play": args.play}
+    with TimelineStore(args.store, read_only=True) as store:
+        if args.export:
+            format = "json" if args.export.endswith(".json") else "csv"
+            count = store.export_answer_key(args.export, format, **filters)
+            print(f"{count} events written to {args.export}")
+            return
+        for event in store.query(**filters):
+            print(f"{event['timestamp']}  {event['type']:<4}  {event['from']} -> {event['to']}"
+                  + (f"  {event['duration']}s" if event["type"] == "call" else ""))
+        print(f"{store.count(**filters)} events")
+
+if __name__ == "__main__":
+    main()
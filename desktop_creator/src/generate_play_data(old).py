@@ -9,19 +9,29 @@ Generates character data, call data, and contacts for a specific play, and scrap
 
 import json
 import os
-import requests
-from bs4 import BeautifulSoup
 import re
 import random
 from datetime import datetime, timedelta
 import argparse  # Import the argparse module
+from pathlib import Path
+
+from core.play_fetcher import FetchError, PlayFetcher
+
+CHARACTERS_BASE_URL = "https://raw.githubusercontent.com/TheMITTech/shakespeare/master/characters/"
+
+_fetcher = None
+
+def get_fetcher():
+    """Shared fetcher (created on first use unless configured in main)"""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PlayFetcher()
+    return _fetcher
 
 def get_all_plays():
     """Get a list of all play names from the GitHub repository."""
-    base_url = "https://raw.githubusercontent.com/TheMITTech/shakespeare/master/characters/"
     try:
-        response = requests.get(base_url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        response = get_fetcher().fetch(CHARACTERS_BASE_URL)
         
         # Extract all JSON files
         pattern = re.compile(r'href="([^"]+\.json)"')
@@ -29,25 +39,26 @@ def get_all_plays():
         
         play_names = [match.replace(".json", "") for match in matches]
         return play_names
-    except requests.exceptions.RequestException as e:
+    except FetchError as e:
         print(f"Request error: {e}")
         return []
     except Exception as e:
         print(f"Error getting play list: {e}")
         return []
 
-def scrape_character_names(play_name):
-    """Scrape character names from a JSON file in the GitHub repository."""
-    base_url = "https://raw.githubusercontent.com/TheMITTech/shakespeare/master/characters/"
-    url = f"{base_url}{play_name}.json"
+def character_list_url(play_name):
+    """URL of a play's character list"""
+    return f"{CHARACTERS_BASE_URL}{play_name}.json"
 
+def scrape_character_names(play_name, response=None):
+    """Scrape character names from a JSON file in the GitHub repository."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        if response is None:
+            response = get_fetcher().fetch(character_list_url(play_name))
         data = response.json()
         character_names = list(data.keys())
         return character_names
-    except requests.exceptions.RequestException as e:
+    except FetchError as e:
         print(f"Request error: {e}")
         return []
     except json.JSONDecodeError as e:
@@ -107,12 +118,24 @@ def generate_contact_data(characters, city_data):
 
 def main():
     """Main function to generate data for all plays"""
+    global _fetcher
+    parser = argparse.ArgumentParser(description="Generate data for every play listed in the character repository.")
+    parser.add_argument("--offline", action="store_true", help="Serve character lists from the mirror/cache only.")
+    parser.add_argument("--mirror", type=Path, help="Local mirror directory (filled online, served offline).")
+    parser.add_argument("--jobs", "-j", type=int, default=8, help="Concurrent downloads.")
+    args = parser.parse_args()
+
+    _fetcher = PlayFetcher(mirror_dir=args.mirror, offline=args.offline, max_workers=args.jobs)
+
     # Load City Information
     with open('desktop_creator/data/static/modern_mappings/locations/cities.json', 'r') as f:
         city_data_list = json.load(f)
         
     # Get all play names from the GitHub repository
     all_plays = get_all_plays()
+
+    # Download all character lists concurrently
+    responses = get_fetcher().fetch_many(character_list_url(play_name) for play_name in all_plays)
     
     # Process each play
     for play_name in all_plays:
@@ -120,7 +143,8 @@ def main():
         directory = f"desktop_creator/data/static/plays/{play_name}"
         
         # Create character list
-        characters = scrape_character_names(play_name)
+        response = responses[character_list_url(play_name)]
+        characters = scrape_character_names(play_name, response) if response else []
         
         if characters:
             print(f"Successfully scraped characters from {play_name}")
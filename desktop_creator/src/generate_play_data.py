@@ -5,17 +5,55 @@ Date: 3/12/2025
 Location: shakespeare_forensics_project/desktop_creator/src/generate_play_data.py
 """
 
+import argparse
 import json
 import os
-from bs4 import BeautifulSoup
 import re
 import random
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
+from core.character_classifier import CharacterClassifier
+from core.character_index import CharacterIndex
+from core.graph_analytics import analyze_relationship_graph
+from core.interaction_matrices import compute_interactions
+from core.location_catalog import CATALOG_DOCUMENTS, get_catalog
+from core.play_parser import parse_play_file
+from core.relationship_graph import address_tone, derive_relationships
+from core.story_timeline import get_story_timeline
+from core.timeline_store import STORE_VERSION, TIMELINE_FILENAME, TimelineStore
+from utils.alias_table import AliasTable
+from utils.build_manifest import BuildManifest
+from utils.data_validator import repair_records
+from utils.mapping_pack import EXPANSION_FILENAME
+from utils.phone_allocator import PhoneNumberAllocator, parse_number
+from utils.seeded_rng import SeededRNG
+from utils.timestamp_engine import TimestampEngine, character_profile, ms_to_datetime, pair_weights
+
 # Get the project root directory
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Static data root (mapping pack) and keyword rules for get_character_type
+STATIC_PATH = os.path.join(PROJECT_ROOT, "data", "static")
+TYPE_RULES_PATH = os.path.join(STATIC_PATH, "modern_mappings", "characters", "type_rules.json")
+
+# Bump whenever a change here alters the generated data.json contents
+GENERATOR_VERSION = "13.0"
+
+# Manifest entry name for the data.json build step
+MANIFEST_KEY = "data.json"
+
+# Phone numbers in use across every play's data.json, kept in the plays directory
+PHONE_STATE_FILENAME = "phone_numbers.json"
+
+# Calls generated per named character when no target is given
+CALLS_PER_CHARACTER = 3
+
+# Calls fall in the days just before the reference time
+CALL_WINDOW_DAYS = 8
+
 # Industry definitions
 INDUSTRIES = {
     "ROYAL": {
@@ -182,143 +220,445 @@ INDUSTRIES = {
     }
 }
 
+_classifier = None
+
+def get_classifier():
+    """Compiled character type rules (loaded once per process)"""
+    global _classifier
+    if _classifier is None:
+        _classifier = CharacterClassifier(TYPE_RULES_PATH)
+    return _classifier
+
 def get_character_type(character_name, character_lines):
     """Determine character type based on name and context"""
-    name_upper = character_name.upper()
-    
-    # Royal characters
-    if any(title in name_upper for title in ["KING", "QUEEN", "PRINCE", "DUKE", "PRINCESS"]):
-        return "ROYAL"
-    
-    # Military characters
-    if any(title in name_upper for title in ["CAPTAIN", "GENERAL", "SOLDIER", "LIEUTENANT", "COMMANDER"]):
-        return "MILITARY"
-        
-    # Noble characters
-    if any(title in name_upper for title in ["LORD", "LADY", "COUNT", "BARON", "SIR", "DUCHESS"]):
-        return "NOBLE"
-    
-    # Religious characters
-    if any(word in name_upper for word in ["PRIEST", "FRIAR", "MONK", "NUN", "CARDINAL"]):
-        return "RELIGIOUS"
-    
-    # Academic characters
-    if any(word in name_upper for word in ["SCHOLAR", "STUDENT", "TEACHER", "TUTOR"]):
-        return "ACADEMIC"
-    
-    # Artistic characters
-    if any(word in name_upper for word in ["PLAYER", "MUSICIAN", "ARTIST", "FOOL", "CLOWN"]):
-        return "ARTISTIC"
-    
-    # Advisors/counselors
-    if any(word in name_upper for word in ["POLONIUS", "COUNSELLOR", "ADVISOR"]):
-        return "ADVISORY"
-    
-    # Diplomatic characters
-    if "AMBASSADOR" in name_upper or "MESSENGER" in name_upper:
-        return "DIPLOMATIC"
-    
-    # Default to merchant/civilian
-    return "MERCHANT"
+    return get_classifier().classify(character_name).type
 
-def scrape_character_names(play_name, full_path):
-    """Extract character names from the play's HTML file."""
+def character_names(play_data):
+    """Named characters of a parsed play (numbered and group speakers dropped)"""
+    characters = []
+    for name in play_data["characters"]:
+        if (name and 
+            not name.startswith('First') and 
+            not name.startswith('Second') and
+            not name in ['All', 'Both', 'Ghost']):
+            characters.append(name)
+    return characters
+
+def parse_play(play_name, full_path):
+    """Parse the play's HTML file ({} if it cannot be read)"""
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        characters = set()
-        for speaker in soup.find_all('b'):
-            name = speaker.text.strip()
-            if (name and 
-                not name.startswith('First') and 
-                not name.startswith('Second') and
-                not name in ['All', 'Both', 'Ghost']):
-                characters.add(name)
-
-        return list(characters)
+        return parse_play_file(full_path, title=play_name)
     except FileNotFoundError:
         print(f"Play text file not found: {full_path}")
-        return []
+        return {}
     except Exception as e:
         print(f"Error scraping play text: {e}")
-        return []
+        return {}
 
-def modernize_character(character_name, city_data):
-    """Modernize character information with more varied companies"""
+def scrape_character_names(play_name, full_path):
+    """Extract character names from the play's HTML file."""
+    play_data = parse_play(play_name, full_path)
+    return character_names(play_data) if play_data else []
+
+def analyze_play(play_name, play_data):
+    """Relationship graph analytics of a parsed play (centrality, communities)"""
+    index = CharacterIndex.from_play_data(play_data)
+    interactions = compute_interactions(play_name, index.speakers, index.line_speaker, index.scene_line_offsets)
+    texts = [line["text"] for scene in play_data.get("dialogue", []) for line in scene["lines"]]
+    tone = address_tone(index.speakers, index.line_speaker, index.scene_line_offsets, texts.__getitem__)
+    return analyze_relationship_graph(derive_relationships(interactions, tone))
+
+def modernize_character(character_name, city_data, rng=random, char_type=None, phones=None, catalog=None):
+    """
+    Modernize character information with more varied companies
+
+    With a LocationCatalog the persona also gets a business address in its
+    city, matching the city of its phone number's area code.
+    """
+    if phones is None:
+        phones = PhoneNumberAllocator()
     # Determine character type
-    char_type = get_character_type(character_name, [])
+    if char_type is None:
+        char_type = get_character_type(character_name, [])
     
     # Get industry data
     industry = INDUSTRIES[char_type]
     
     # Select company and title
-    company_info = random.choice(industry["companies"])
-    title = random.choice(industry["titles"])
+    company_info = rng.choice(industry["companies"])
+    title = rng.choice(industry["titles"])
     
     # Clean the character name for email
     clean_name = re.sub(r'[^\w\s-]', '', character_name.lower())
     email_name = clean_name.replace(' ', '.')
     
-    area_code = random.choice(city_data["area_codes"])
+    area_code = rng.choice(city_data["area_codes"])
     
     modern_details = {
         "title": title,
         "company": company_info["name"],
         "industry": char_type.lower().capitalize(),
         "location": city_data["city"],
-        "phone": f"{area_code}-{random.randint(100, 999)}-{random.randint(1000, 9999)}",
+        "phone": phones.allocate(area_code, rng),
         "email": f"{email_name}@{company_info['domain']}"
     }
+    if catalog is not None:
+        modern_details["address"] = catalog.address(city_data["city"], rng)
     return modern_details
 
-def generate_call_data(characters):
-    """Generate call data between characters"""
+def call_pair_sampler(characters, analytics=None):
+    """
+    Draw function returning a (caller, callee) pair in O(1)
+
+    With graph analytics, pairs tied in the play are drawn from an alias
+    table weighted by tie strength and centrality, so characters who never
+    interact never call each other. Without analytics (or ties) any two
+    distinct characters are equally likely. None if there is no pair.
+    """
+    pairs = []
+    weights = []
+    if analytics is not None:
+        included = set(characters)
+        rows, cols, pair_weights = analytics.communication_weights()
+        for i, j, weight in zip(rows, cols, pair_weights):
+            character1, character2 = analytics.speakers[i], analytics.speakers[j]
+            if character1 in included and character2 in included:
+                pairs.append((character1, character2))
+                weights.append(float(weight))
+
+    if pairs:
+        table = AliasTable(weights)
+
+        def draw(rng):
+            character1, character2 = pairs[table.sample(rng)]
+            return (character1, character2) if rng.random() < 0.5 else (character2, character1)
+        return draw
+
+    if len(characters) < 2:
+        return None
+
+    def draw(rng):
+        character1, character2 = rng.sample(characters, 2)
+        return character1, character2
+    return draw
+
+def generate_call_data(characters, rng=None, reference_time=None, play_name=None, analytics=None, num_calls=None,
+                       story=None):
+    """
+    Generate call data between characters
+
+    num_calls calls (default CALLS_PER_CHARACTER per character) are drawn
+    from call_pair_sampler, each from its own keyed stream, so the cost is
+    O(calls). Call times are then drawn in bulk per pair by TimestampEngine
+    over the CALL_WINDOW_DAYS before reference_time, following both
+    characters' waking-hour and weekday profiles. With a StoryTimeline the
+    window is the story instead (ending at reference_time), and each pair's
+    calls also follow the scenes the two speak in. Finally, calls that would
+    overlap for a character are moved later (or dropped past reference_time).
+    """
+    if rng is None:
+        rng = SeededRNG()
+    if reference_time is None:
+        reference_time = datetime.now()
+    if num_calls is None:
+        num_calls = CALLS_PER_CHARACTER * len(characters)
+
+    draw = call_pair_sampler(characters, analytics)
+    if draw is None:
+        return []
+
     call_data = []
-    for i in range(len(characters)):
-        for j in range(i + 1, len(characters)):
-            character1 = characters[i]
-            character2 = characters[j]
-            num_calls = random.randint(1, 3)
-            for _ in range(num_calls):
-                days_ago = random.randint(0, 7)
-                hours_ago = random.randint(0, 23)
-                minutes_ago = random.randint(0, 59)
-                call_time = datetime.now() - timedelta(days=days_ago, hours=hours_ago, minutes=minutes_ago)
-                
-                call = {
-                    "from": character1,
-                    "to": character2,
-                    "timestamp": call_time.isoformat(),
-                    "duration": random.randint(60, 300)
-                }
-                call_data.append(call)
+    by_pair = {}
+    for index in range(num_calls):
+        call_rng = rng.stream(play_name, None, "call", index)
+        caller, callee = draw(call_rng)
+        call_data.append({
+            "from": caller,
+            "to": callee,
+            "timestamp": None,
+            "duration": call_rng.randint(60, 300)
+        })
+        by_pair.setdefault(tuple(sorted((caller, callee))), []).append(index)
+
+    window = timedelta(hours=story.span_hours) if story is not None else timedelta(days=CALL_WINDOW_DAYS)
+    engine = TimestampEngine(reference_time - window, reference_time, rng)
+    profiles = {}
+    for pair, indices in by_pair.items():
+        for name in pair:
+            if name not in profiles:
+                profiles[name] = character_profile(rng, play_name, name)
+        weights = pair_weights(profiles[pair[0]], profiles[pair[1]])
+        if story is not None:
+            weights = engine.bin_table(engine.span_weights(weights) * story.pair_bins(*pair))
+        times = engine.sample(len(indices), weights, play_name, pair, "call_times")
+        for index, ms in zip(indices, times.tolist()):
+            call_data[index]["timestamp"] = ms_to_datetime(ms - ms % 1000).isoformat()
+
+    call_data, _ = repair_records(call_data, end=reference_time)
     return call_data
 
-def generate_contact_data(characters, city_data):
-    """Generate contact data for each character"""
+def generate_contact_data(characters, city_data, rng=None, character_types=None, play_name=None, phones=None,
+                          personas=None):
+    """
+    Generate contact data for each character (one keyed stream per character)
+
+    A character with a modernized persona gets that persona's phone, email
+    and employer, so the contact list agrees with the character data; the
+    others get new details in city_data.
+    """
+    if rng is None:
+        rng = SeededRNG()
+    if phones is None:
+        phones = PhoneNumberAllocator()
+    if character_types is None:
+        character_types = {name: get_character_type(name, []) for name in characters}
+
     contacts = {}
     for character in characters:
-        char_type = get_character_type(character, [])
+        persona = personas.get(character) if personas else None
+        if persona is not None:
+            contacts[character] = {field: persona[field] for field in ("phone", "email", "title", "company", "industry")}
+            continue
+
+        contact_rng = rng.stream(play_name, character, "contact")
+        char_type = character_types[character]
         industry = INDUSTRIES[char_type]
-        company_info = random.choice(industry["companies"])
+        company_info = contact_rng.choice(industry["companies"])
         
         clean_name = re.sub(r'[^\w\s-]', '', character.lower())
         email_name = clean_name.replace(' ', '.')
         
-        phone = f"{random.choice(city_data['area_codes'])}-{random.randint(200, 999)}-{random.randint(1000, 9999)}"
+        phone = phones.allocate(contact_rng.choice(city_data['area_codes']), contact_rng)
         contacts[character] = {
             "phone": phone,
             "email": f"{email_name}@{company_info['domain']}",
-            "title": random.choice(industry["titles"]),
+            "title": contact_rng.choice(industry["titles"]),
             "company": company_info["name"],
             "industry": char_type.lower().capitalize()
         }
     return contacts
 
-def main():
+def build_params(seed, reference_time):
+    """Non-file inputs recorded in the build manifest"""
+    return {
+        "generator_version": GENERATOR_VERSION,
+        "store_version": STORE_VERSION,
+        "seed": seed,
+        "reference_date": reference_time.isoformat()
+    }
+
+def build_inputs(play_path, cities_json_path):
+    """Input files recorded in the build manifest"""
+    inputs = {
+        "full.html": os.path.join(play_path, "full.html"),
+        "cities.json": cities_json_path,
+        "type_rules.json": TYPE_RULES_PATH,
+        **{
+            f"{name}.json": os.path.join(STATIC_PATH, f"{name}.json")
+            for name in CATALOG_DOCUMENTS
+        }
+    }
+    expansion_path = os.path.join(STATIC_PATH, EXPANSION_FILENAME)
+    if os.path.exists(expansion_path):
+        inputs[EXPANSION_FILENAME] = expansion_path
+    return inputs
+
+def play_phone_numbers(data_file):
+    """Valid phone numbers held by the characters of a generated data.json"""
+    try:
+        with open(data_file, encoding='utf-8') as f:
+            characters = json.load(f).get("characters", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    numbers = []
+    for details in characters.values():
+        try:
+            parse_number(details.get("phone"))
+        except (TypeError, ValueError):
+            continue
+        numbers.append(details["phone"])
+    return numbers
+
+def build_play(play_name, plays_directory, city_data_list, seed, reference_time, cities_json_path=None,
+               phones=None):
+    """
+    Generate data/data.json for a single play.
+
+    Every value is drawn from a stream keyed by (seed, play, character,
+    artifact), so the output does not depend on which process builds it,
+    in what order, or on which other characters are in the cast. Phone
+    numbers come from phones: a shared PhoneNumberAllocator, or the path of
+    its saved state (loaded here, for worker processes); None gives the play
+    an allocator of its own.
+    Returns a summary dict used for the timing report, including the phone
+    numbers the play took.
+    """
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    play_path = os.path.join(plays_directory, play_name)
+    full_html_path = os.path.join(play_path, "full.html")
+    result = {
+        "play": play_name,
+        "status": "skipped",
+        "characters": 0,
+        "calls": 0,
+        "output_file": None,
+        "seconds": 0.0,
+        "cpu_seconds": 0.0
+    }
+
+    if not os.path.exists(full_html_path):
+        result["status"] = "no_html"
+        return result
+
+    rng = SeededRNG(seed)
+    catalog = get_catalog(STATIC_PATH)
+    if phones is None:
+        phones = PhoneNumberAllocator()
+    elif not isinstance(phones, PhoneNumberAllocator):
+        phones = PhoneNumberAllocator.load(phones)
+    parsed = parse_play(play_name, full_html_path)
+    characters = character_names(parsed) if parsed else []
+
+    if characters:
+        analytics = analyze_play(play_name, parsed)
+
+        # Classify the whole cast once; both passes below reuse the types
+        character_types = {
+            name: result.type
+            for name, result in get_classifier().classify_many(characters).items()
+        }
+
+        modernized_characters = {}
+        for character in characters:
+            persona_rng = rng.stream(play_name, character, "persona")
+            city_data = persona_rng.choice(city_data_list)
+            modernized_characters[character] = modernize_character(
+                character, city_data, persona_rng, character_types[character], phones, catalog)
+
+        story = get_story_timeline(play_name, Path(play_path), parsed)
+        call_data = generate_call_data(characters, rng, reference_time, play_name, analytics, story=story)
+        # City for any character without a persona (keyed, so it never shifts other draws)
+        contact_city = rng.stream(play_name, None, "contact_city").choice(city_data_list)
+        contact_data = generate_contact_data(characters, contact_city, rng, character_types, play_name, phones,
+                                             modernized_characters)
+
+        play_data = {
+            "characters": modernized_characters,
+            "call_data": call_data,
+            "contact_data": contact_data,
+            "group_chats": analytics.group_chats(characters=characters)
+        }
+
+        output_directory = os.path.join(play_path, "data")
+        os.makedirs(output_directory, exist_ok=True)
+        output_file = os.path.join(output_directory, "data.json")
+        
+        with open(output_file, "w", encoding='utf-8') as f:
+            json.dump(play_data, f, indent=4, ensure_ascii=False)
+
+        # Ground truth for instructor queries and answer keys
+        store_file = os.path.join(output_directory, TIMELINE_FILENAME)
+        with TimelineStore(store_file) as store:
+            store.replace_play(play_name, call_data)
+
+        if cities_json_path:
+            manifest = BuildManifest(os.path.join(output_directory, "manifest.json"))
+            manifest.record(MANIFEST_KEY,
+                            build_inputs(play_path, cities_json_path),
+                            build_params(seed, reference_time),
+                            [output_file, store_file])
+            manifest.save()
+
+        result.update({
+            "status": "built",
+            "characters": len(characters),
+            "calls": len(call_data),
+            "output_file": output_file,
+            "phones": [modernized_characters[character]["phone"] for character in characters]
+        })
+    else:
+        result["status"] = "no_characters"
+
+    result["seconds"] = time.perf_counter() - started
+    result["cpu_seconds"] = time.process_time() - cpu_started
+    return result
+
+def plan_play(play_name, plays_directory, cities_json_path, seed, reference_time, force=False):
+    """
+    Decide whether a play needs rebuilding.
+
+    A seed or reference date that was not given on the command line is taken
+    from the play's previous manifest, so re-running without arguments keeps
+    the existing dataset and only rebuilds plays whose inputs changed.
+
+    Returns:
+        tuple: (fresh, seed, reference_time) for the play
+    """
+    play_path = os.path.join(plays_directory, play_name)
+    output_directory = os.path.join(play_path, "data")
+    manifest = BuildManifest(os.path.join(output_directory, "manifest.json"))
+    previous = manifest.get_params(MANIFEST_KEY)
+
+    if seed is None:
+        seed = previous.get("seed")
+    if reference_time is None and previous.get("reference_date"):
+        reference_time = datetime.fromisoformat(previous["reference_date"])
+    if seed is None or reference_time is None or force:
+        return False, seed, reference_time
+
+    fresh = manifest.is_fresh(MANIFEST_KEY,
+                              build_inputs(play_path, cities_json_path),
+                              build_params(seed, reference_time),
+                              [os.path.join(output_directory, "data.json"),
+                               os.path.join(output_directory, TIMELINE_FILENAME)])
+    return fresh, seed, reference_time
+
+def print_play_result(result):
+    """Print the per-play report lines"""
+    play_name = result["play"]
+    if result["status"] == "no_html":
+        print(f"Skipping {play_name}: No full.html found")
+        return
+    if result["status"] == "no_characters":
+        print(f"Could not extract characters from {play_name}")
+        print("----------------------------------------")
+        return
+
+    print(f"Successfully generated data for {play_name} and saved to {result['output_file']}")
+    print(f"Generated data for {result['characters']} characters")
+    print(f"Generated {result['calls']} call records")
+    print("----------------------------------------")
+
+def print_timing_summary(results, wall_seconds, jobs):
+    """Print per-play build times, slowest first"""
+    print("\nTiming summary")
+    print("----------------------------------------")
+    for result in sorted(results, key=lambda r: r["seconds"], reverse=True):
+        print(f"{result['play']:<32} {result['seconds']:8.3f}s  {result['status']}")
+    print("----------------------------------------")
+    play_seconds = sum(result["seconds"] for result in results)
+    cpu_seconds = sum(result["cpu_seconds"] for result in results)
+    print(f"Plays: {len(results)}  Workers: {jobs}  Summed play time: {play_seconds:.3f}s  "
+          f"CPU time: {cpu_seconds:.3f}s  Wall time: {wall_seconds:.3f}s")
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Generate modernized character, call and contact data for every play.")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of worker processes (1 = serial, 0 = one per CPU)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Scenario seed; the same seed always produces the same files (default: reuse the last build's seed)")
+    parser.add_argument("--reference-date", default=None,
+                        help="ISO date/time call timestamps are counted back from (default: last build's date, else today 00:00)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every play even if its inputs are unchanged")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to generate data for all plays"""
+    args = parse_args(argv)
     
     # Define paths relative to project root
     cities_json_path = os.path.join(PROJECT_ROOT, "data", "static", "modern_mappings", "locations", "cities.json")
@@ -341,64 +681,102 @@ def main():
         print(f"Error: Plays directory not found at {plays_directory}")
         return
 
-    for play_name in os.listdir(plays_directory):
-        play_path = os.path.join(plays_directory, play_name)
-        
-        if os.path.isdir(play_path):
-            full_html_path = os.path.join(play_path, "full.html")
-            if not os.path.exists(full_html_path):
-                print(f"Skipping {play_name}: No full.html found")
-                continue
-                
-            print(f"Processing play: {play_name}")
-            output_directory = os.path.join(play_path, "data")
-            characters = scrape_character_names(play_name, full_html_path)
-
-            if characters:
-                print(f"Successfully loaded {len(characters)} characters from {play_name}")
+    new_seed = random.randrange(2 ** 32)
+    reference_time = datetime.fromisoformat(args.reference_date) if args.reference_date else None
+    today = datetime.combine(date.today(), datetime.min.time())
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
 
-                modernized_characters = {}
-                for character in characters:
-                    city_data = random.choice(city_data_list)
-                    modernized_characters[character] = modernize_character(character, city_data)
+    seed_label = args.seed if args.seed is not None else f"previous build (new plays: {new_seed})"
+    print(f"Seed: {seed_label}  Workers: {jobs}")
 
-                call_data = generate_call_data(characters)
-                city_data = random.choice(city_data_list)
-                contact_data = generate_contact_data(characters, city_data)
+    play_names = sorted(
+        name for name in os.listdir(plays_directory)
+        if os.path.isdir(os.path.join(plays_directory, name))
+    )
 
-                play_data = {
-                    "characters": modernized_characters,
-                    "call_data": call_data,
-                    "contact_data": contact_data
-                }
+    started = time.perf_counter()
+    results = []
 
-                os.makedirs(output_directory, exist_ok=True)
-                output_file = os.path.join(output_directory, "data.json")
-                
-                with open(output_file, "w", encoding='utf-8') as f:
-                    json.dump(play_data, f, indent=4, ensure_ascii=False)
+    # Skip plays whose manifest shows nothing changed
+    pending = []
+    for play_name in play_names:
+        fresh, play_seed, play_reference = plan_play(
+            play_name, plays_directory, cities_json_path,
+            args.seed, reference_time, args.force
+        )
+        if fresh:
+            results.append({"play": play_name, "status": "cached", "seconds": 0.0, "cpu_seconds": 0.0})
+            continue
+        pending.append((
+            play_name,
+            play_seed if play_seed is not None else new_seed,
+            play_reference or today
+        ))
 
-            print(f"Successfully generated data for {play_name} and saved to {output_file}")
-            print(f"Generated data for {len(characters)} characters")
-            print(f"Generated {len(call_data)} call records")
-            print("----------------------------------------")
+    # Numbers stay unique across plays and runs: plays being rebuilt give
+    # theirs back, cached plays keep (and re-record) theirs. The state lives
+    # in plays/phone_numbers.json, committed with the data.json files
+    phone_state = os.path.join(plays_directory, PHONE_STATE_FILENAME)
+    phones = PhoneNumberAllocator.load(phone_state)
+    pending_names = {job[0] for job in pending}
+    for play_name in pending_names:
+        for number in play_phone_numbers(os.path.join(plays_directory, play_name, "data", "data.json")):
+            phones.release(number)
+    for play_name in play_names:
+        if play_name not in pending_names:
+            phones.mark_used(play_phone_numbers(os.path.join(plays_directory, play_name, "data", "data.json")))
 
+    if jobs == 1 or len(pending) <= 1:
+        for play_name, play_seed, play_reference in pending:
+            print(f"Processing play: {play_name}")
+            result = build_play(play_name, plays_directory, city_data_list,
+                                play_seed, play_reference, cities_json_path, phones)
+            print_play_result(result)
+            results.append(result)
     else:
-                print(f"Could not extract characters from {play_name}")
-                print("----------------------------------------")
+        # Largest plays first so the slowest one starts immediately
+        def html_size(job):
+            html_path = os.path.join(plays_directory, job[0], "full.html")
+            return os.path.getsize(html_path) if os.path.exists(html_path) else 0
 
-    if __name__ == "__main__":
-            main()
-    else:
-                print(f"Could not extract characters from {play_name}")
-                print("----------------------------------------")
-
-    if __name__ == "__main__":
-            main()
-            print(f"Could not extract characters from {play_name}")
-            print("----------------------------------------")
-            print(f"Could not extract characters from {play_name}")
-            print("----------------------------------------")
+        # Workers start from the same saved numbers; see the merge below
+        snapshot = phone_state + ".snapshot"
+        phones.save(snapshot)
+        built = []
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(build_play, play_name, plays_directory, city_data_list,
+                                    play_seed, play_reference, cities_json_path, snapshot): play_name
+                    for play_name, play_seed, play_reference in sorted(pending, key=html_size, reverse=True)
+                }
+                for future in as_completed(futures):
+                    built.append(future.result())
+        finally:
+            os.remove(snapshot)
+
+        # Merge in play order. A play whose numbers clash with one merged
+        # before it is rebuilt against the merged numbers, which gives
+        # exactly what a serial build would have produced.
+        jobs_by_play = {job[0]: job for job in pending}
+        built.sort(key=lambda r: r["play"])
+        for i, result in enumerate(built):
+            numbers = result.get("phones", [])
+            if any(phones.is_allocated(number) for number in numbers):
+                play_name, play_seed, play_reference = jobs_by_play[result["play"]]
+                built[i] = build_play(play_name, plays_directory, city_data_list,
+                                      play_seed, play_reference, cities_json_path, phones)
+            else:
+                phones.mark_used(numbers)
+
+        for result in built:
+            print(f"Processing play: {result['play']}")
+            print_play_result(result)
+        results.extend(built)
+
+    phones.save(phone_state)
+    results.sort(key=lambda r: r["play"])
+    print_timing_summary(results, time.perf_counter() - started, jobs)
 
 if __name__ == "__main__":
     main()
@@ -8,20 +8,30 @@ Advanced call log generation with detailed CSV, duration patterns, and timeline
 import random
 import csv
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 import logging
 from pathlib import Path
 import json
 
+from utils.mapping_pack import load_static_json
+from utils.seeded_rng import SeededRNG
+
 class CallGenerator:
     """
     Generates realistic call logs for forensic training scenarios.
     """
 
-    def __init__(self):
-        """Initialize CallGenerator."""
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize CallGenerator.
+
+        Args:
+            seed (Optional[int]): Scenario seed; call details are drawn from
+                streams keyed by (seed, play, caller/callee, "call", index).
+        """
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)  # Set logging level
+        self.rng = SeededRNG(seed)
 
         # Load call duration patterns
         self.duration_patterns: Dict[str, Dict[str, int]] = self._load_duration_patterns()
@@ -34,7 +44,7 @@ class CallGenerator:
 
     def _load_duration_patterns(self) -> Dict[str, Dict[str, int]]:
         """
-        Load call duration patterns from JSON file.
+        Load call duration patterns from the shared mapping pack.
 
         Returns:
             Dict[str, Dict[str, int]]: Duration patterns.
@@ -42,8 +52,7 @@ class CallGenerator:
         pattern_file = Path("desktop_creator/data/static/templates/calls/durations.json")
 
         try:
-            with open(pattern_file) as f:
-                return json.load(f)
+            return load_static_json(pattern_file)
         except FileNotFoundError as e:
             self.logger.error(f"Duration patterns file not found: {e}")
             return {}
@@ -55,14 +64,18 @@ class CallGenerator:
             return {}
 
     def generate_call_logs(self,
-                         timeline: List[Dict],
-                         characters: Dict) -> List[Dict]:
+                         timeline: Iterable[Dict],
+                         characters: Dict,
+                         start_index: int = 0) -> List[Dict]:
         """
         Generate call logs based on timeline events.
 
         Args:
-            timeline (List[Dict]): List of timeline events.
+            timeline (Iterable[Dict]): Timeline events, e.g. a list or
+                the stream of TimelineManager.events().
             characters (Dict): Character information.
+            start_index (int): Index of the first call in this timeline slice,
+                so a shard reproduces exactly the calls of a full run.
 
         Returns:
             List[Dict]: List of call log entries.
@@ -71,32 +84,36 @@ class CallGenerator:
 
         for event in timeline:
             if event['type'] == 'call':
-                call_log = self._create_call_log(event, characters)
+                call_log = self._create_call_log(event, characters, start_index + len(call_logs))
                 call_logs.append(call_log)
 
         return call_logs
 
     def _create_call_log(self,
                         event: Dict,
-                        characters: Dict) -> Dict:
+                        characters: Dict,
+                        index: int = 0) -> Dict:
         """
         Create a single call log entry.
 
         Args:
             event (Dict): Timeline event.
             characters (Dict): Character information.
+            index (int): Ordinal of the call in the scenario.
 
         Returns:
             Dict: Call log entry.
         """
+        rng = self.rng.stream(event.get('play'), (event['from'], event['to']), "call", index)
+
         # Extract data from event
         from_number = self._get_character_phone(event['from'], characters)
         to_number = self._get_character_phone(event['to'], characters)
 
         # Generate call details
-        call_type = random.choice(self.call_types)
-        call_result = random.choice(self.call_results)
-        duration = self._generate_call_duration(event['context'])
+        call_type = rng.choice(self.call_types)
+        call_result = rng.choice(self.call_results)
+        duration = self._generate_call_duration(event['context'], rng)
 
         call_log: Dict = {
             'from_number': from_number,
@@ -131,16 +148,17 @@ class CallGenerator:
             if 'modern_details' in character_data and 'phone' in character_data['modern_details']:
                 return character_data['modern_details']['phone']
             # Fallback to direct phone number
-            elif 'phone' in character_:
+            elif 'phone' in character_data:
                 return character_data['phone']
         return '555-1234'  # Default number
 
-    def _generate_call_duration(self, context: str) -> int:
+    def _generate_call_duration(self, context: str, rng: random.Random = random) -> int:
         """
         Generate call duration based on context.
 
         Args:
             context (str): Context of the call.
+            rng (random.Random): Random stream of the call.
 
         Returns:
             int: Call duration in seconds.
@@ -150,11 +168,11 @@ class CallGenerator:
 
         # Adjust duration based on call type (longer for business, shorter for emergency)
         if context == "business":
-            duration = random.randint(duration_range['min'], duration_range['max'] * 2)
+            duration = rng.randint(duration_range['min'], duration_range['max'] * 2)
         elif context == "emergency":
-            duration = random.randint(10, duration_range['max'] // 2)
+            duration = rng.randint(10, duration_range['max'] // 2)
         else:
-            duration = random.randint(duration_range['min'], duration_range['max'])
+            duration = rng.randint(duration_range['min'], duration_range['max'])
 
         return duration
 
@@ -5,29 +5,38 @@ Created by RSGrizz
 Generates realistic contact information and exports VCF files.
 """
 
-import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 from pathlib import Path
 import json
 from datetime import datetime
 
+from utils.mapping_pack import load_static_json
+from utils.seeded_rng import SeededRNG
+
 class ContactGenerator:
     """
     Generates realistic contact information and exports VCF files.
     """
 
-    def __init__(self):
-        """Initialize ContactGenerator."""
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize ContactGenerator.
+
+        Args:
+            seed (Optional[int]): Scenario seed; generated contact details are
+                drawn from streams keyed by (seed, play, character, "contact").
+        """
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)  # Set logging level
+        self.rng = SeededRNG(seed)
 
         # Load configuration data
         self.config = self._load_config()
 
     def _load_config(self) -> Dict:
         """
-        Load configuration data from JSON file.
+        Load configuration data from the shared mapping pack.
 
         Returns:
             Dict: Configuration data.
@@ -35,8 +44,7 @@ class ContactGenerator:
         config_file = Path("desktop_creator/data/static/templates/contacts/config.json")
 
         try:
-            with open(config_file) as f:
-                return json.load(f)
+            return load_static_json(config_file)
         except FileNotFoundError as e:
             self.logger.error(f"Config file not found: {e}")
             return {}
@@ -100,8 +108,10 @@ class ContactGenerator:
     def _generate_address(self, character: Dict) -> str:
         """Generate address for a character."""
         if 'location' in character:
+            rng = self.rng.stream(character.get('metadata', {}).get('play'),
+                                  character.get('original_name'), "contact")
             city = character['location']
-            street = f"{random.randint(100, 9999)} Main St"
+            street = f"{rng.randint(100, 9999)} Main St"
             return f"{street}, {city}, {character['context'].upper()}"
         return "123 Example St, Anytown, USA"  # Default address
 
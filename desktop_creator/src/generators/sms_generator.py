@@ -7,11 +7,15 @@ Generates realistic SMS messages based on timeline data.
 
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import logging
 from pathlib import Path
 import json
 
+from utils.mapping_pack import DEFAULT_STATIC_PATH, load_static_json
+from utils.seeded_rng import SeededRNG
+from utils.timestamp_engine import to_ms
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
@@ -43,26 +47,30 @@ class SMSGenerator:
     Generates realistic SMS messages based on timeline data.
     """
 
-    def __init__(self):
-        """Initialize SMSGenerator."""
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Initialize SMSGenerator.
+
+        Args:
+            seed (Optional[int]): Scenario seed; message text is drawn from
+                streams keyed by (seed, play, sender/recipient, "sms", index).
+        """
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
+        self.rng = SeededRNG(seed)
         self.templates: Dict = self._load_templates()
         self.thread_counter = 1
 
     def _load_templates(self) -> Dict:
-        """Load SMS templates from JSON file."""
-        # Get the current file's directory
-        current_dir = Path(__file__).parent.parent
-        template_file = current_dir / "data" / "static" / "templates" / "sms" / "patterns.json"
+        """Load SMS templates from the shared mapping pack."""
+        template_file = DEFAULT_STATIC_PATH / "templates" / "sms" / "patterns.json"
         
         try:
             if not template_file.exists():
                 self.logger.warning(f"Template file not found at {template_file}")
                 return {}
                 
-            with open(template_file) as f:
-                return json.load(f)
+            return load_static_json(template_file)
         except Exception as e:
             self.logger.exception(f"Error loading SMS templates: {e}")
             return {}
@@ -81,7 +89,8 @@ class SMSGenerator:
         sender_data = characters.get(sender_name, {})
         
         # Generate timestamp in milliseconds
-        timestamp = int(event['timestamp'].timestamp() * 1000)
+        timestamp = to_ms(event['timestamp'])
+        rng = self.rng.stream(event.get('play'), (sender_name, event.get('to')), "sms", self.thread_counter - 1)
         
         # Create message in required format
         sms = {
@@ -93,7 +102,7 @@ class SMSGenerator:
             "read": "1",
             "status": "-1",
             "type": "2",  # 2 for received message
-            "body": self._generate_sms_text(event['context']),
+            "body": self._generate_sms_text(event['context'], rng),
             "locked": "0",
             "error_code": "-1",
             "sub_id": "0",
@@ -122,10 +131,16 @@ class SMSGenerator:
         self.thread_counter += 1
         return sms
 
-    def generate_sms_messages(self, timeline: List[Dict], characters: Dict) -> List[Dict]:
-        """Generate SMS messages based on timeline events."""
+    def generate_sms_messages(self, timeline: Iterable[Dict], characters: Dict, start_index: int = 0) -> List[Dict]:
+        """
+        Generate SMS messages based on timeline events (a list or the
+        stream of TimelineManager.events()).
+
+        start_index is the index of the first message in this timeline slice,
+        so a shard reproduces exactly the messages (and IDs) of a full run.
+        """
         sms_messages = []
-        self.thread_counter = 1  # Reset counter
+        self.thread_counter = start_index + 1  # Reset counter
         
         for event in timeline:
             if event['type'] == 'sms':
@@ -134,10 +149,10 @@ class SMSGenerator:
         
         return sms_messages
 
-    def _generate_sms_text(self, context: str) -> str:
+    def _generate_sms_text(self, context: str, rng: random.Random = random) -> str:
         """Generate SMS text based on context."""
         if context in self.templates:
-            return random.choice(self.templates[context])
+            return rng.choice(self.templates[context])
         return "Default message."
 
     def export_sms_messages(self, sms_messages: List[Dict], output_file: str) -> None:
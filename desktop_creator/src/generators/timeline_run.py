@@ -0,0 +1,235 @@
+"""
+timeline_run.py
+Created by RSGrizz
+
+Checkpointed, resumable generation of a play's communication history.
+The timeline is cut into shards of shard_days; for each shard the events
+are drawn from TimelineManager (any window of it matches the same window
+of a full run) and turned into call logs and SMS messages, with the
+generators' start_index continuing from the earlier shards. Every finished
+shard is saved with a progress marker (utils.run_checkpoint), so after a
+crash or Ctrl-C a rerun with the same scenario seed resumes after the last
+finished shard. The merged calls.json, sms.json and timeline store are
+identical to those of an uninterrupted run.
+
+Command line (after generate_play_data.py has built the play's data.json):
+    python -m generators.timeline_run Julius_Caesar --seed 7 --days 365
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from utils.build_manifest import data_sha256
+from utils.run_checkpoint import RunCheckpoint
+
+from .call_generator import CallGenerator
+from .sms_generator import SMSGenerator
+
+PathLike = Union[str, Path]
+
+# Bump whenever a change here alters the shard contents
+RUN_VERSION = "1"
+DEFAULT_SHARD_DAYS = 7
+RUN_DIRNAME = "run"
+
+
+class TimelineRun:
+    """
+    One resumable run: a timeline window turned into call logs and messages.
+
+    Usage:
+        run = TimelineRun(timeline, characters, run_dir, end=timeline.start + timedelta(days=365))
+        run.run()                     # resumes if run_dir holds finished shards
+        run.write_outputs(output_dir)
+    """
+
+    def __init__(self,
+                 timeline,
+                 characters: Dict,
+                 run_dir: PathLike,
+                 end: datetime,
+                 shard_days: float = DEFAULT_SHARD_DAYS):
+        """
+        Initialize TimelineRun
+
+        Args:
+            timeline (TimelineManager): Event source; its seed also seeds the generators
+            characters (Dict): Character information (phone, location) for the generators
+            run_dir (PathLike): Directory for shards and the progress marker
+            end (datetime): Instant the run stops before
+            shard_days (float): Length of one shard
+
+        Raises:
+            ValueError: end not after the timeline start, or shard_days not positive
+        """
+        if end <= timeline.start or shard_days <= 0:
+            raise ValueError(f"Invalid run window {timeline.start} .. {end} in shards of {shard_days} days")
+        self.logger = logging.getLogger(__name__)
+        self.timeline = timeline
+        self.characters = characters
+        self.end = end
+        self.shard_length = timedelta(days=shard_days)
+        self.call_generator = CallGenerator(timeline.rng.seed)
+        self.sms_generator = SMSGenerator(timeline.rng.seed)
+
+        span = end - timeline.start
+        self.shard_count = -(-span // self.shard_length)
+        self.checkpoint = RunCheckpoint(run_dir, self.params(shard_days))
+
+    def params(self, shard_days: float) -> Dict:
+        """Everything the run's output depends on"""
+        timeline = self.timeline
+        names = sorted({name for pair in timeline.pairs for name in (pair.first, pair.second)})
+        return {
+            "version": RUN_VERSION,
+            "play": timeline.play_name,
+            "seed": timeline.rng.seed,
+            "start": timeline.start.isoformat(),
+            "end": self.end.isoformat(),
+            "shard_days": shard_days,
+            "pairs": [list(pair) for pair in timeline.pairs],
+            "profiles": {name: list(timeline.profile(name)) for name in names},
+            "story": timeline.story.fingerprint if timeline.story is not None else None,
+            "characters": data_sha256(self.characters),
+            "durations": data_sha256(self.call_generator.duration_patterns),
+            "templates": data_sha256(self.sms_generator.templates)
+        }
+
+    @property
+    def finished(self) -> bool:
+        return self.checkpoint.finished
+
+    def shard_window(self, index: int):
+        start = self.timeline.start + index * self.shard_length
+        return start, min(start + self.shard_length, self.end)
+
+    def _shard(self, index: int) -> Dict:
+        """Events, call logs and messages of one shard"""
+        start, end = self.shard_window(index)
+        events = list(self.timeline.events(start, end))
+        calls = self.call_generator.generate_call_logs(events, self.characters, self.checkpoint.total("calls"))
+        sms = self.sms_generator.generate_sms_messages(events, self.characters, self.checkpoint.total("sms"))
+
+        # Ground truth: the events, calls with the duration their log got
+        durations = iter(call["duration"] for call in calls)
+        truth = []
+        for event in events:
+            record = dict(event, timestamp=event["timestamp"].isoformat())
+            if event["type"] == "call":
+                record["duration"] = next(durations)
+            truth.append(record)
+        return {"start": start.isoformat(), "end": end.isoformat(), "events": truth, "calls": calls, "sms": sms}
+
+    def run(self) -> int:
+        """
+        Generate the shards not finished yet
+
+        Returns:
+            int: Number of shards generated by this call
+        """
+        first = self.checkpoint.completed
+        for index in range(first, self.shard_count):
+            shard = self._shard(index)
+            self.checkpoint.write_shard(index, shard, {
+                "events": len(shard["events"]),
+                "calls": len(shard["calls"]),
+                "sms": len(shard["sms"])
+            })
+            self.logger.info(f"{self.timeline.play_name}: shard {index + 1}/{self.shard_count} "
+                             f"({len(shard['events'])} events)")
+        if not self.checkpoint.finished:
+            self.checkpoint.finish()
+        return self.shard_count - first
+
+    def _records(self, key: str) -> Iterator[Dict]:
+        return chain.from_iterable(shard[key] for shard in self.checkpoint.iter_shards())
+
+    def write_outputs(self, output_dir: PathLike, store_path: Optional[PathLike] = None) -> Dict[str, int]:
+        """
+        Merge the shards into calls.json and sms.json (and a timeline store)
+
+        Records are streamed one shard at a time; each file is written to a
+        temp file and moved into place.
+
+        Args:
+            output_dir (PathLike): Directory for calls.json and sms.json
+            store_path (Optional[PathLike]): TimelineStore file for the ground truth
+
+        Returns:
+            Dict[str, int]: Number of calls, messages and events written
+
+        Raises:
+            RuntimeError: The run has not finished
+        """
+        if not self.finished:
+            raise RuntimeError(f"Run in {self.checkpoint.run_dir} has unfinished shards")
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        counts = {
+            "calls": _write_json_array(output_dir / "calls.json", self._records("calls")),
+            "sms": _write_json_array(output_dir / "sms.json", self._records("sms"))
+        }
+        if store_path is not None:
+            from core.timeline_store import TimelineStore
+
+            with TimelineStore(store_path) as store:
+                counts["events"] = store.replace_play(self.timeline.play_name, self._records("events"))
+        return counts
+
+
+def _write_json_array(path: Path, records: Iterator[Dict]) -> int:
+    """Stream records into a JSON array file (atomically)"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            f.write(",\n    " if written else "\n    ")
+            f.write(json.dumps(record, ensure_ascii=False))
+            written += 1
+        f.write("\n]\n" if written else "]\n")
+    os.replace(tmp_path, path)
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    """Generate (or resume) a play's communication history"""
+    from core.play_parser import parse_play_file
+    from core.timeline_manager import TimelineManager
+    from core.timeline_store import TIMELINE_FILENAME
+    from generate_play_data import analyze_play
+
+    parser = argparse.ArgumentParser(description="Checkpointed generation of a play's calls and messages.")
+    parser.add_argument("play", help="Play directory name")
+    parser.add_argument("--plays", default="desktop_creator/data/static/plays", help="Plays directory")
+    parser.add_argument("--seed", type=int, required=True, help="Scenario seed (same seed = same output)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2025, 1, 1),
+                        help="ISO date the history starts at")
+    parser.add_argument("--days", type=float, default=365, help="Length of the history")
+    parser.add_argument("--shard-days", type=float, default=DEFAULT_SHARD_DAYS, help="Days per checkpointed shard")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    play_dir = Path(args.plays) / args.play
+    with open(play_dir / "data" / "data.json", encoding="utf-8") as f:
+        characters = json.load(f)["characters"]
+    analytics = analyze_play(args.play, parse_play_file(play_dir / "full.html", title=args.play))
+
+    timeline = TimelineManager.from_analytics(args.play, analytics, args.seed, args.start,
+                                             characters=characters)
+    output_dir = play_dir / "data" / "history"
+    run = TimelineRun(timeline, characters, output_dir / RUN_DIRNAME,
+                      args.start + timedelta(days=args.days), args.shard_days)
+    generated = run.run()
+    counts = run.write_outputs(output_dir, output_dir / TIMELINE_FILENAME)
+    print(f"{args.play}: {generated} of {run.shard_count} shards generated this run; "
+          f"{counts['calls']} calls, {counts['sms']} messages in {output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,30 @@
 """
-desktop_creator/src/generators/__init__.py
+desktop_creator/src/utils/__init__.py
 Created by RSGrizz
 
-Data generation module initialization
+Shared utilities module initialization
 """
 
 __all__ = [
-    "ContactGenerator",
-    "SMSGenerator",
-    "CallGenerator"
+    "BuildManifest",
+    "file_sha256",
+    "data_sha256",
+    "SeededRNG",
+    "CounterRandom",
+    "stream_key",
+    "PhoneNumberAllocator",
+    "AliasTable",
+    "MappingPack",
+    "get_pack",
+    "load_static_json"
 ]
 
-from .contact_generator import ContactGenerator
-from .sms_generator import SMSGenerator
-from .call_generator import CallGenerator
+from .build_manifest import BuildManifest, file_sha256, data_sha256
+from .seeded_rng import SeededRNG, CounterRandom, stream_key
+from .phone_allocator import PhoneNumberAllocator
+from .alias_table import AliasTable
+from .mapping_pack import MappingPack, get_pack, load_static_json
 
 import logging
 logger = logging.getLogger(__name__)
-logger.info("generators package initialized")
-
+logger.info("utils package initialized")
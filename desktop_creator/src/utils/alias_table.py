@@ -0,0 +1,64 @@
+"""
+desktop_creator/src/utils/alias_table.py
+Created by RSGrizz
+
+Walker/Vose alias tables: after an O(n) build, every draw from a discrete
+weighted distribution costs O(1) (one uniform number), so sampling k
+events is O(k) however many outcomes there are.
+"""
+
+import random
+from typing import List, Sequence
+
+
+class AliasTable:
+    """
+    Weighted sampler over outcomes 0..n-1.
+
+    Usage:
+        table = AliasTable([5.0, 1.0, 1.0])
+        outcome = table.sample(rng)
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        Build the table
+
+        Args:
+            weights (Sequence[float]): Non-negative weight per outcome
+
+        Raises:
+            ValueError: No weights, a negative weight, or all weights zero
+        """
+        size = len(weights)
+        total = float(sum(weights))
+        if size == 0 or total <= 0 or min(weights) < 0:
+            raise ValueError("AliasTable needs non-negative weights with a positive sum")
+
+        self.size = size
+        self.probability: List[float] = [0.0] * size
+        self.alias: List[int] = list(range(size))
+
+        scaled = [w * size / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.probability[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Leftovers are 1 up to rounding error
+        for i in large + small:
+            self.probability[i] = 1.0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def sample(self, rng: random.Random = random) -> int:
+        """Draw one outcome using a single uniform number"""
+        u = rng.random() * self.size
+        column = int(u)
+        if column >= self.size:  # u == size after float rounding
+            column = self.size - 1
+        return column if u - column < self.probability[column] else self.alias[column]
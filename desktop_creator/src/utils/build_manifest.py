@@ -0,0 +1,160 @@
+"""
+build_manifest.py
+Created by RSGrizz
+
+Content-hash build manifest used to skip regenerating artifacts whose
+inputs have not changed
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+PathLike = Union[str, Path]
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: PathLike, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_sha256(data) -> str:
+    """Hash a JSON-serializable value independent of key order"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the inputs and outputs of one build step.
+
+    Every file is stored with its size, mtime and sha256. When size and
+    mtime are unchanged the recorded hash is trusted, so checking a warm
+    build only costs a stat() per file; a touched-but-identical file is
+    re-hashed and still counts as fresh.
+    """
+
+    def __init__(self, manifest_path: PathLike):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(manifest_path)
+        self.entries: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        """Load an existing manifest (missing or corrupt files start empty)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("manifest_version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def save(self):
+        """Write the manifest next to the outputs it describes"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "manifest_version": MANIFEST_VERSION,
+                "entries": self.entries
+            }, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------
+    # File fingerprints
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _fingerprint(path: PathLike, previous: Optional[Dict] = None) -> Optional[Dict]:
+        """Fingerprint a file, reusing the previous hash when stat matches"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if (previous and previous.get("size") == stat.st_size
+                and previous.get("mtime_ns") == stat.st_mtime_ns):
+            return previous
+
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(path)
+        }
+
+    def _files_match(self, recorded: Dict, files: Dict[str, PathLike]) -> bool:
+        if set(recorded) != set(files):
+            return False
+        for name, path in files.items():
+            current = self._fingerprint(path, recorded[name])
+            if current is None or current["sha256"] != recorded[name].get("sha256"):
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_params(self, key: str) -> Dict:
+        """Parameters recorded for a build step on its last run"""
+        return self.entries.get(key, {}).get("params", {})
+
+    def is_fresh(self,
+                 key: str,
+                 inputs: Dict[str, PathLike],
+                 params: Dict,
+                 outputs: Iterable[PathLike]) -> bool:
+        """
+        Check whether a build step can be skipped
+
+        Args:
+            key (str): Build step name
+            inputs (Dict[str, PathLike]): Input files by logical name
+            params (Dict): Non-file inputs (generator version, seed, ...)
+            outputs (Iterable[PathLike]): Files the step writes
+
+        Returns:
+            bool: True when inputs, params and outputs all match the record
+        """
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        if entry.get("params_sha256") != data_sha256(params):
+            return False
+
+        output_files = {str(Path(path).name): path for path in outputs}
+        return (self._files_match(entry.get("inputs", {}), inputs)
+                and self._files_match(entry.get("outputs", {}), output_files))
+
+    def record(self,
+               key: str,
+               inputs: Dict[str, PathLike],
+               params: Dict,
+               outputs: Iterable[PathLike]):
+        """Record a completed build step (call save() afterwards)"""
+        previous = self.entries.get(key, {})
+        self.entries[key] = {
+            "params": params,
+            "params_sha256": data_sha256(params),
+            "inputs": {
+                name: self._fingerprint(path, previous.get("inputs", {}).get(name))
+                for name, path in inputs.items()
+            },
+            "outputs": {
+                str(Path(path).name): self._fingerprint(path)
+                for path in outputs
+            }
+        }
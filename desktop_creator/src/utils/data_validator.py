@@ -1 +1,406 @@
+"""
+desktop_creator/src/utils/data_validator.py
+Created by RSGrizz
 
+Consistency stage for generated communication events. Calls and texts are
+drawn independently per pair, so a character can end up on two calls at
+once, or sending a text while on a call. Here every event is a row of
+int64 arrays, and each participant's busy intervals are checked with one
+sort-and-sweep (O(n log n)):
+
+    call    both parties busy from start to start + duration + CALL_GAP_MS
+    text    the sender busy for SMS_LATENCY_MS (typing), the recipient free
+
+Repairs push conflicting events later. Per participant, the earliest
+non-overlapping schedule is a single segmented cumulative max, so a whole
+chain of overlaps is fixed in one pass. Passes repeat only because moving a
+call for one party can move it into the other party's next event. Events
+still in conflict after MAX_PASSES, or pushed past the end of the window,
+are dropped. A sender's location may only change between events at least
+TRAVEL_MS apart; otherwise the earlier location is kept.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .timestamp_engine import ms_to_datetime, to_ms
+
+CALL, SMS = 0, 1
+
+# Minimum pause between a call ending and the next event of either party
+CALL_GAP_MS = 5_000
+# Time a text keeps its sender busy
+SMS_LATENCY_MS = 2_000
+# Minimum time between events of one sender at different locations
+TRAVEL_MS = 30 * 60 * 1000
+
+MAX_PASSES = 32
+
+logger = logging.getLogger(__name__)
+
+
+class ConflictReport(NamedTuple):
+    """What resolve_conflicts found and changed"""
+    events: int
+    call_conflicts: int      # call rows overlapping an earlier event of the participant
+    sms_conflicts: int       # texts sent during a call or too soon after another text
+    shifted: np.ndarray      # indices of events moved later
+    total_shift_ms: int
+    max_shift_ms: int
+    dropped: np.ndarray      # indices of events removed
+    relocated: np.ndarray    # indices of events whose location was rewritten
+    passes: int
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.shifted.size or self.dropped.size or self.relocated.size)
+
+    def summary(self) -> Dict:
+        """JSON-friendly counts"""
+        return {
+            "events": self.events,
+            "call_conflicts": self.call_conflicts,
+            "sms_conflicts": self.sms_conflicts,
+            "shifted": int(self.shifted.size),
+            "total_shift_ms": self.total_shift_ms,
+            "max_shift_ms": self.max_shift_ms,
+            "dropped": int(self.dropped.size),
+            "relocated": int(self.relocated.size),
+            "passes": self.passes
+        }
+
+
+class EventTable:
+    """
+    Columnar events: one entry per call or text.
+
+    Participants and locations are integer IDs (see from_records for
+    name tables); location -1 means unknown.
+    """
+
+    def __init__(self,
+                 start_ms: Sequence[int],
+                 duration_ms: Sequence[int],
+                 sender: Sequence[int],
+                 recipient: Sequence[int],
+                 kind: Sequence[int],
+                 location: Optional[Sequence[int]] = None):
+        """
+        Initialize EventTable
+
+        Args:
+            start_ms (Sequence[int]): Epoch milliseconds of each event
+            duration_ms (Sequence[int]): Call length (ignored for texts)
+            sender (Sequence[int]): Caller / sender ID
+            recipient (Sequence[int]): Callee / recipient ID
+            kind (Sequence[int]): CALL or SMS
+            location (Optional[Sequence[int]]): Sender location ID (-1 unknown)
+
+        Raises:
+            ValueError: Columns of different lengths or negative participant IDs
+        """
+        self.start_ms = np.array(start_ms, dtype=np.int64)
+        self.duration_ms = np.array(duration_ms, dtype=np.int64)
+        self.sender = np.array(sender, dtype=np.int64)
+        self.recipient = np.array(recipient, dtype=np.int64)
+        self.kind = np.array(kind, dtype=np.int8)
+        size = self.start_ms.size
+        if location is None:
+            self.location = np.full(size, -1, dtype=np.int64)
+        else:
+            self.location = np.array(location, dtype=np.int64)
+        columns = (self.duration_ms, self.sender, self.recipient, self.kind, self.location)
+        if any(column.shape != (size,) for column in columns):
+            raise ValueError("EventTable columns must all have one entry per event")
+        if size and (self.sender.min() < 0 or self.recipient.min() < 0):
+            raise ValueError("Participant IDs must be non-negative")
+        self.names: List[str] = []
+        self.locations: List[str] = []
+
+    def __len__(self) -> int:
+        return int(self.start_ms.size)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "EventTable":
+        """
+        Table of dict events: from, to, timestamp (datetime, ISO string or
+        epoch ms), optional type ("call"/"sms", default "call"), duration
+        (seconds) and location
+
+        Returns:
+            EventTable: Table with .names and .locations holding the ID tables
+        """
+        names: Dict[str, int] = {}
+        locations: Dict[str, int] = {}
+        columns: Tuple[List[int], ...] = ([], [], [], [], [], [])
+        for record in records:
+            start, duration, sender, recipient, kind, location = columns
+            start.append(to_ms(record["timestamp"]))
+            duration.append(int(record.get("duration", 0) * 1000))
+            sender.append(names.setdefault(record["from"], len(names)))
+            recipient.append(names.setdefault(record["to"], len(names)))
+            kind.append(SMS if record.get("type") == "sms" else CALL)
+            place = record.get("location")
+            location.append(locations.setdefault(place, len(locations)) if place else -1)
+        table = cls(*columns)
+        table.names = list(names)
+        table.locations = list(locations)
+        return table
+
+    def occupancy_ms(self, call_gap_ms: int = CALL_GAP_MS, sms_latency_ms: int = SMS_LATENCY_MS) -> np.ndarray:
+        """How long each event keeps its participants busy"""
+        return np.where(self.kind == SMS, sms_latency_ms, np.maximum(self.duration_ms, 0) + call_gap_ms)
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(participant, event index) of every busy interval: senders, then call recipients"""
+        calls = np.flatnonzero(self.kind == CALL)
+        participant = np.concatenate((self.sender, self.recipient[calls]))
+        event = np.concatenate((np.arange(len(self), dtype=np.int64), calls))
+        return participant, event
+
+    def take(self, keep: np.ndarray) -> "EventTable":
+        """Table of the selected events (names and locations are shared)"""
+        table = EventTable(self.start_ms[keep], self.duration_ms[keep], self.sender[keep],
+                           self.recipient[keep], self.kind[keep], self.location[keep])
+        table.names = self.names
+        table.locations = self.locations
+        return table
+
+
+def _segment_offsets(group: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Offsets that make values of later groups larger than any of earlier ones,
+    so one sort or cumulative max handles all groups at once
+
+    Raises:
+        ValueError: group x value range does not fit in int64
+    """
+    low = int(values.min())
+    span = int(values.max()) - low + 1
+    if int(group.max()) + 1 > np.iinfo(np.int64).max // span:
+        raise ValueError("Too many participants for the time span of the events")
+    return group * span - low
+
+
+def _row_order(group: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """Order of rows by (group, start)"""
+    return np.argsort(start + _segment_offsets(group, start))
+
+
+def _sweep(group: np.ndarray, start: np.ndarray, occupancy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Earliest non-overlapping starts of rows sorted by (group, start)
+
+    With D the occupancy before a row in its group, the pushed start is
+    max(start, previous pushed end) = D + cummax(start - D) within the group.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (pushed starts, rows that overlapped
+            an earlier row of their group as given)
+    """
+    first = np.ones(group.size, dtype=bool)
+    first[1:] = group[1:] != group[:-1]
+    starts_at = np.flatnonzero(first)
+    totals = np.cumsum(occupancy)
+    before = totals - occupancy
+    before -= np.repeat(before[starts_at], np.diff(np.append(starts_at, group.size)))
+
+    slack = start - before
+    offset = _segment_offsets(group, slack)
+    pushed = np.maximum.accumulate(slack + offset) - offset + before
+
+    # Overlaps as given: start before the latest end of earlier rows of the group
+    end = start + occupancy
+    end_offset = _segment_offsets(group, end)
+    latest = np.maximum.accumulate(end + end_offset) - end_offset
+    overlap = np.zeros(group.size, dtype=bool)
+    overlap[1:] = ~first[1:] & (start[1:] < latest[:-1])
+    return pushed, overlap
+
+
+def resolve_conflicts(table: EventTable,
+                      end_ms: Optional[int] = None,
+                      call_gap_ms: int = CALL_GAP_MS,
+                      sms_latency_ms: int = SMS_LATENCY_MS,
+                      travel_ms: int = TRAVEL_MS) -> Tuple[EventTable, ConflictReport]:
+    """
+    Detect and repair overlaps for every participant
+
+    Args:
+        table (EventTable): Events to check
+        end_ms (Optional[int]): Events pushed to or past this instant are dropped
+        call_gap_ms (int): Pause after a call before either party is free
+        sms_latency_ms (int): Time a text keeps its sender busy
+        travel_ms (int): Minimum time between two locations of one sender
+
+    Returns:
+        Tuple[EventTable, ConflictReport]: Repaired events (same order, dropped
+            ones removed) and the report; report indices refer to the input table
+    """
+    size = len(table)
+    empty = np.empty(0, dtype=np.int64)
+    if size == 0:
+        return table.take(empty), ConflictReport(0, 0, 0, empty, 0, 0, empty, empty, 0)
+
+    # Busy-interval rows, kept sorted by (participant, start) across passes
+    participant, event = table.rows()
+    order = _row_order(participant, table.start_ms[event])
+    participant, event = participant[order], event[order]
+    is_sender = order < size
+    occupancy = table.occupancy_ms(call_gap_ms, sms_latency_ms)[event]
+
+    start = table.start_ms.copy()
+    call_conflicts = sms_conflicts = 0
+    converged = False
+    passes = 0
+    while passes < MAX_PASSES and not converged:
+        passes += 1
+        row_start = start[event]
+        if passes > 1:
+            # Repairs only move starts later, so the rows are nearly sorted
+            # and a stable (run-aware) sort restores the order in close to linear time
+            key = row_start + _segment_offsets(participant, row_start)
+            if not (key[1:] >= key[:-1]).all():
+                order = np.argsort(key, kind="stable")
+                participant, event, is_sender = participant[order], event[order], is_sender[order]
+                occupancy, row_start = occupancy[order], row_start[order]
+
+        pushed, overlap = _sweep(participant, row_start, occupancy)
+        if passes == 1:
+            overlapping = event[overlap]
+            sms_conflicts = int(np.count_nonzero(table.kind[overlapping] == SMS))
+            call_conflicts = int(overlapping.size) - sms_conflicts
+
+        # An event moves to the latest start any of its participants needs
+        new_start = np.empty_like(start)
+        new_start[event[is_sender]] = pushed[is_sender]
+        recipient_rows = ~is_sender
+        calls = event[recipient_rows]
+        new_start[calls] = np.maximum(new_start[calls], pushed[recipient_rows])
+        converged = np.array_equal(new_start, start)
+        start = new_start
+
+    keep = np.ones(size, dtype=bool)
+    if not converged:
+        # Whatever still overlaps after the last pass is dropped
+        row_start = start[event]
+        order = _row_order(participant, row_start)
+        _, overlap = _sweep(participant[order], row_start[order], occupancy[order])
+        keep[event[order][overlap]] = False
+    if end_ms is not None:
+        keep &= start < end_ms
+
+    shifts = start - table.start_ms
+    shifted = np.flatnonzero((shifts > 0) & keep)
+    dropped = np.flatnonzero(~keep)
+
+    # Sender rows are still in (sender, start) order unless the last pass moved something
+    ordered = event[is_sender]
+    if not converged:
+        ordered = ordered[_row_order(table.sender[ordered], start[ordered])]
+    ordered = ordered[keep[ordered] & (table.location[ordered] >= 0)]
+    location, relocated = _settle_locations(table.sender, start, table.location, ordered, travel_ms)
+
+    repaired = table.take(keep)
+    repaired.start_ms = start[keep]
+    repaired.location = location[keep]
+
+    report = ConflictReport(
+        events=size,
+        call_conflicts=call_conflicts,
+        sms_conflicts=sms_conflicts,
+        shifted=shifted,
+        total_shift_ms=int(shifts[shifted].sum()),
+        max_shift_ms=int(shifts[shifted].max()) if shifted.size else 0,
+        dropped=dropped,
+        relocated=relocated,
+        passes=passes
+    )
+    if report.changed:
+        logger.debug(f"Consistency repair: {report.summary()}")
+    return repaired, report
+
+
+def _settle_locations(sender: np.ndarray,
+                      start: np.ndarray,
+                      location: np.ndarray,
+                      ordered: np.ndarray,
+                      travel_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Keep each sender at its location until travel_ms have passed
+
+    Args:
+        sender, start, location (np.ndarray): Event columns
+        ordered (np.ndarray): Events with a known location, by (sender, start)
+        travel_ms (int): Minimum time between two locations of one sender
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (new location column, indices of
+            rewritten events)
+    """
+    location = location.copy()
+    if ordered.size < 2:
+        return location, np.empty(0, dtype=np.int64)
+    sender = sender[ordered]
+    start = start[ordered]
+    # A new stay begins with each sender, and after every long enough pause
+    begins = np.ones(ordered.size, dtype=bool)
+    begins[1:] = (sender[1:] != sender[:-1]) | (start[1:] - start[:-1] >= travel_ms)
+    stay = np.cumsum(begins) - 1
+    settled = location[ordered][np.flatnonzero(begins)][stay]
+
+    changed = settled != location[ordered]
+    location[ordered] = settled
+    return location, np.sort(ordered[changed])
+
+
+def repair_records(records: List[Dict],
+                   end: Optional[datetime] = None,
+                   **options) -> Tuple[List[Dict], ConflictReport]:
+    """
+    Resolve conflicts in dict events (see EventTable.from_records)
+
+    Moved events get their new timestamp in the format they came in
+    (datetime, ISO string or epoch ms); rewritten locations are replaced.
+
+    Args:
+        records (List[Dict]): Events
+        end (Optional[datetime]): End of the window; events pushed past it are dropped
+        **options: call_gap_ms, sms_latency_ms, travel_ms for resolve_conflicts
+
+    Returns:
+        Tuple[List[Dict], ConflictReport]: Repaired copies of the kept
+            records in input order, and the report
+    """
+    table = EventTable.from_records(records)
+    end_ms = to_ms(end) if end is not None else None
+    repaired, report = resolve_conflicts(table, end_ms, **options)
+
+    changed = {int(i) for i in report.shifted}
+    changed.update(int(i) for i in report.relocated)
+    dropped = set(report.dropped.tolist())
+    result = []
+    position = 0
+    for index, record in enumerate(records):
+        if index in dropped:
+            continue
+        if index in changed:
+            record = dict(record)
+            ms = int(repaired.start_ms[position])
+            timestamp = record["timestamp"]
+            if isinstance(timestamp, datetime):
+                record["timestamp"] = ms_to_datetime(ms)
+            elif isinstance(timestamp, str):
+                # Round up: an earlier second could reopen the overlap
+                record["timestamp"] = ms_to_datetime(-(-ms // 1000) * 1000).isoformat()
+            else:
+                record["timestamp"] = ms
+            location = int(repaired.location[position])
+            if location >= 0:
+                record["location"] = repaired.locations[location]
+        result.append(record)
+        position += 1
+    return result, report
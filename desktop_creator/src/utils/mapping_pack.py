@@ -0,0 +1,419 @@
+"""
+desktop_creator/src/utils/mapping_pack.py
+Created by RSGrizz
+
+Compiled "mapping pack": every modern_mappings and templates JSON file in
+one indexed, read-only SQLite file. Generators read their static data from
+the pack instead of opening and parsing JSON on each instantiation; the pack
+is opened once per process and memory-mapped, so worker processes share its
+pages through the OS page cache.
+
+Layout:
+    meta       key -> value (pack version, source fingerprint)
+    documents  "modern_mappings/cities/major_cities" -> compact JSON body
+    records    every named entity (a dict with a "name" field) flattened out
+               of the nested trees, keyed by document and slash path, e.g.
+               "regions/northeast/major_cities/new_york" (paths start below
+               the metadata/data wrapper written by Generate_Static_data)
+
+The pack is rebuilt automatically when a source file changes (checked once
+per process with a stat() per file), or explicitly with
+    python -m utils.mapping_pack
+
+PackWriter writes packs of the same layout directly, e.g. the procedurally
+expanded catalog of Scripts/Generate_Static_data.py --expand.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+PACK_VERSION = 1
+DEFAULT_STATIC_PATH = Path("desktop_creator/data/static")
+PACK_FILENAME = "mapping_pack.db"
+EXPANSION_FILENAME = "mapping_pack.expanded.db"  # procedural scale-test data
+PACK_SOURCES = ("modern_mappings", "templates")
+PACK_EXCLUDE = {"manifest.json"}  # build bookkeeping, not static data
+MMAP_SIZE = 64 * 1024 * 1024
+
+_RAISE = object()
+_MISSING = object()
+
+
+def _source_files(static_path: Path) -> List[Path]:
+    files = []
+    for source in PACK_SOURCES:
+        files.extend(sorted(path for path in (static_path / source).rglob("*.json")
+                            if path.name not in PACK_EXCLUDE))
+    return files
+
+
+def document_name(static_path: Path, path: Path) -> str:
+    """Pack name of a source file: path below the static root without .json"""
+    return path.relative_to(static_path).with_suffix("").as_posix()
+
+
+def source_fingerprint(static_path: PathLike = DEFAULT_STATIC_PATH) -> str:
+    """Fingerprint of the source files from their size and mtime (no reads)"""
+    static_path = Path(static_path)
+    digest = hashlib.sha256(str(PACK_VERSION).encode("utf-8"))
+    for path in _source_files(static_path):
+        stat = path.stat()
+        digest.update(f"{document_name(static_path, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _iter_records(value: Any, path: Tuple[str, ...] = ()) -> Iterator[Tuple[str, Dict]]:
+    """Named entities of a nested document, with their slash paths"""
+    if not path and isinstance(value, dict) and set(value) == {"metadata", "data"}:
+        value = value["data"]  # Generate_Static_data wrapper
+    if isinstance(value, dict):
+        if path and isinstance(value.get("name"), str):
+            yield "/".join(path), value
+            return
+        for key, child in value.items():
+            if not path and key == "metadata":
+                continue
+            yield from _iter_records(child, path + (str(key),))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from _iter_records(child, path + (str(index),))
+
+
+def _create_tables(connection: sqlite3.Connection):
+    connection.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE documents (name TEXT PRIMARY KEY, body TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE records (
+            document TEXT NOT NULL,
+            path TEXT NOT NULL,
+            name TEXT NOT NULL,
+            body TEXT NOT NULL,
+            PRIMARY KEY (document, path)
+        ) WITHOUT ROWID;
+        CREATE INDEX records_name ON records (name);
+    """)
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _build(connection: sqlite3.Connection, static_path: Path, fingerprint: str) -> Dict[str, int]:
+    """Fill an empty database with the compiled pack"""
+    _create_tables(connection)
+    counts = {"documents": 0, "records": 0, "skipped": 0}
+    for path in _source_files(static_path):
+        name = document_name(static_path, path)
+        try:
+            with open(path, encoding="utf-8-sig") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.getLogger(__name__).warning(f"Mapping pack skips {name}: {e}")
+            counts["skipped"] += 1
+            continue
+
+        connection.execute("INSERT INTO documents VALUES (?, ?)", (name, _compact(data)))
+        rows = [(name, record_path, record["name"], _compact(record)) for record_path, record in _iter_records(data)]
+        connection.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", rows)
+        counts["documents"] += 1
+        counts["records"] += len(rows)
+
+    connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("version", str(PACK_VERSION)),
+        ("fingerprint", fingerprint),
+    ])
+    connection.commit()
+    return counts
+
+
+def compile_pack(static_path: PathLike = DEFAULT_STATIC_PATH,
+                 pack_path: Optional[PathLike] = None) -> Dict[str, int]:
+    """
+    Compile every source JSON file into the pack
+
+    The pack is written to a temporary file and moved into place, so
+    readers never see a partial pack.
+
+    Args:
+        static_path (PathLike): Static data root holding modern_mappings/ and templates/
+        pack_path (Optional[PathLike]): Pack file to write (default: mapping_pack.db
+            in the static root)
+
+    Returns:
+        Dict[str, int]: Number of documents, records and skipped (unreadable) files
+    """
+    static_path = Path(static_path)
+    pack_path = Path(pack_path) if pack_path is not None else static_path / PACK_FILENAME
+    tmp_path = pack_path.with_name(f"{pack_path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        counts = _build(connection, static_path, source_fingerprint(static_path))
+    finally:
+        connection.close()
+    os.replace(tmp_path, pack_path)
+    return counts
+
+
+class PackWriter:
+    """
+    Streams records into a new pack file in fixed-size batches, so packs far
+    larger than memory can be written. The file only appears at pack_path
+    (atomically) when the writer is closed without error.
+
+    Usage:
+        with PackWriter(path, {"seed": 7}) as writer:
+            writer.add_records("modern_mappings/business/companies", records)
+    """
+
+    def __init__(self, pack_path: PathLike, meta: Optional[Dict[str, Any]] = None, batch_size: int = 5000):
+        self.pack_path = Path(pack_path)
+        self.batch_size = batch_size
+        self.counts: Dict[str, int] = {}
+        self._tmp_path = self.pack_path.with_name(f"{self.pack_path.name}.{os.getpid()}.tmp")
+        self._tmp_path.unlink(missing_ok=True)
+        self.connection = sqlite3.connect(self._tmp_path)
+        _create_tables(self.connection)
+        rows = [("version", str(PACK_VERSION))]
+        rows.extend((key, str(value)) for key, value in (meta or {}).items() if key != "version")
+        self.connection.executemany("INSERT INTO meta VALUES (?, ?)", rows)
+
+    def add_document(self, name: str, data: Any):
+        self.connection.execute("INSERT INTO documents VALUES (?, ?)", (name, _compact(data)))
+
+    def add_records(self, document: str, records: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Insert (path, record) pairs; every record needs a string "name"
+
+        Returns:
+            int: Number of records written
+        """
+        batch = []
+        written = 0
+        for path, record in records:
+            batch.append((document, path, record["name"], _compact(record)))
+            if len(batch) >= self.batch_size:
+                self.connection.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", batch)
+                written += len(batch)
+                batch = []
+        self.connection.executemany("INSERT INTO records VALUES (?, ?, ?, ?)", batch)
+        written += len(batch)
+        self.counts[document] = self.counts.get(document, 0) + written
+        return written
+
+    def close(self):
+        """Commit and move the pack into place"""
+        self.connection.commit()
+        self.connection.close()
+        os.replace(self._tmp_path, self.pack_path)
+
+    def abort(self):
+        self.connection.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class MappingPack:
+    """
+    Read-only view of a compiled pack.
+
+    Usage:
+        pack = get_pack()
+        durations = pack.document("templates/calls/durations")
+        for path, city in pack.records("modern_mappings/cities/major_cities"): ...
+    """
+
+    def __init__(self, connection: sqlite3.Connection, static_path: Path, pack_path: Optional[Path] = None):
+        self.connection = connection
+        self.static_path = static_path
+        self.pack_path = pack_path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls,
+             static_path: PathLike = DEFAULT_STATIC_PATH,
+             pack_path: Optional[PathLike] = None) -> "MappingPack":
+        """
+        Open a pack, compiling it first if it is missing or out of date
+
+        If the pack cannot be written (read-only checkout), it is compiled
+        in memory for this process instead.
+
+        Args:
+            static_path (PathLike): Static data root the pack is compiled from
+            pack_path (Optional[PathLike]): Pack file (default: mapping_pack.db
+                in the static root)
+
+        Returns:
+            MappingPack: Open pack
+        """
+        logger = logging.getLogger(__name__)
+        static_path = Path(static_path)
+        pack_path = Path(pack_path) if pack_path is not None else static_path / PACK_FILENAME
+        fingerprint = source_fingerprint(static_path)
+
+        if cls._stored_fingerprint(pack_path) != fingerprint:
+            try:
+                counts = compile_pack(static_path, pack_path)
+                logger.info(f"Compiled mapping pack {pack_path}: {counts['documents']} documents, "
+                            f"{counts['records']} records")
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not write mapping pack {pack_path} ({e}); compiling in memory")
+                connection = sqlite3.connect(":memory:", check_same_thread=False)
+                _build(connection, static_path, fingerprint)
+                return cls(connection, static_path)
+
+        return cls.open_file(pack_path, static_path)
+
+    @classmethod
+    def open_file(cls, pack_path: PathLike, static_path: PathLike = DEFAULT_STATIC_PATH) -> "MappingPack":
+        """Open an existing pack file as is (no freshness check or compile)"""
+        pack_path = Path(pack_path)
+        connection = sqlite3.connect(f"{pack_path.resolve().as_uri()}?mode=ro&immutable=1",
+                                     uri=True, check_same_thread=False)
+        connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        return cls(connection, Path(static_path), pack_path)
+
+    @staticmethod
+    def _stored_fingerprint(pack_path: Path) -> Optional[str]:
+        if not pack_path.exists():
+            return None
+        try:
+            connection = sqlite3.connect(f"{pack_path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return None
+        if meta.get("version") != str(PACK_VERSION):
+            return None
+        return meta.get("fingerprint")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self._query("SELECT key, value FROM meta"))
+
+    def names(self) -> List[str]:
+        """Names of all documents in the pack"""
+        return [name for name, in self._query("SELECT name FROM documents ORDER BY name")]
+
+    def document(self, name: str, default: Any = _RAISE) -> Any:
+        """
+        Parsed content of one source file
+
+        Args:
+            name (str): Document name, e.g. "templates/sms/patterns"
+            default (Any): Returned when the document is not in the pack
+
+        Returns:
+            Any: The decoded JSON (a fresh copy on every call)
+
+        Raises:
+            KeyError: Document not in the pack and no default given
+        """
+        rows = self._query("SELECT body FROM documents WHERE name = ?", (name,))
+        if not rows:
+            if default is _RAISE:
+                raise KeyError(name)
+            return default
+        return json.loads(rows[0][0])
+
+    def records(self, document: str) -> List[Tuple[str, Dict]]:
+        """
+        Named entities of a document, flattened out of its nested tree
+
+        Args:
+            document (str): Document name, e.g. "modern_mappings/cities/major_cities"
+
+        Returns:
+            List[Tuple[str, Dict]]: (slash path, record) in document order of paths
+        """
+        rows = self._query("SELECT path, body FROM records WHERE document = ? ORDER BY path", (document,))
+        return [(path, json.loads(body)) for path, body in rows]
+
+    def find(self, name: str) -> List[Tuple[str, str, Dict]]:
+        """Every record with this exact name as (document, path, record)"""
+        rows = self._query("SELECT document, path, body FROM records WHERE name = ? ORDER BY document, path",
+                           (name,))
+        return [(document, path, json.loads(body)) for document, path, body in rows]
+
+    def close(self):
+        self.connection.close()
+
+
+_packs: Dict[Tuple[int, Path], MappingPack] = {}
+_packs_lock = threading.Lock()
+
+
+def get_pack(static_path: PathLike = DEFAULT_STATIC_PATH) -> MappingPack:
+    """Shared pack for this process, opened (and compiled if needed) on first use"""
+    key = (os.getpid(), Path(static_path).resolve())
+    with _packs_lock:
+        pack = _packs.get(key)
+        if pack is None:
+            pack = _packs[key] = MappingPack.open(static_path)
+        return pack
+
+
+def load_static_json(path: PathLike, static_path: PathLike = DEFAULT_STATIC_PATH) -> Any:
+    """
+    Read a static JSON file through the shared pack
+
+    Files outside the pack sources (or left out of the pack because they
+    could not be parsed) are read directly, so missing or invalid files
+    raise the same FileNotFoundError / json.JSONDecodeError as json.load.
+
+    Args:
+        path (PathLike): Source JSON file
+        static_path (PathLike): Static data root
+
+    Returns:
+        Any: The decoded JSON
+    """
+    path, static_path = Path(path), Path(static_path)
+    try:
+        name = document_name(static_path.resolve(), path.resolve())
+    except ValueError:
+        name = None
+
+    if name is not None and name.split("/", 1)[0] in PACK_SOURCES and static_path.is_dir():
+        data = get_pack(static_path).document(name, _MISSING)
+        if data is not _MISSING:
+            return data
+
+    with open(path, encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def main():
+    """Compile the mapping pack from the static data"""
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    counts = compile_pack()
+    print(f"{DEFAULT_STATIC_PATH / PACK_FILENAME}: {counts['documents']} documents, {counts['records']} records, "
+          f"{counts['skipped']} skipped in {time.perf_counter() - started:.3f}s")
+
+if __name__ == "__main__":
+    main()
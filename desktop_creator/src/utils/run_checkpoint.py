@@ -0,0 +1,165 @@
+"""
+desktop_creator/src/utils/run_checkpoint.py
+Created by RSGrizz
+
+Checkpoints for long generation runs. A run is split into numbered shards
+that are generated in order; each finished shard is written to its own
+file, and then progress.json (the progress marker) is updated. Both writes
+are atomic (temp file + os.replace), so after a crash or Ctrl-C the run
+directory holds only complete shards, and a rerun with the same
+parameters resumes after the last one.
+
+Shards must be reproducible on their own (keyed random streams, running
+counters taken from the summaries of earlier shards), so a resumed run
+ends up with exactly the files of an uninterrupted one.
+
+Layout of a run directory:
+    progress.json      version, parameter fingerprint, summary per finished shard
+    shard-00000.json   output of shard 0
+    ...
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Union
+
+from .build_manifest import data_sha256
+
+PathLike = Union[str, Path]
+
+CHECKPOINT_VERSION = 1
+PROGRESS_FILENAME = "progress.json"
+SHARD_PATTERN = "shard-{:05d}.json"
+
+
+def write_json_atomic(path: Path, data: Any):
+    """Write JSON to a temp file and move it into place"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class RunCheckpoint:
+    """
+    Progress marker and shard files of one resumable run.
+
+    Usage:
+        checkpoint = RunCheckpoint(run_dir, {"seed": 7, "play": "Hamlet", ...})
+        for index in range(checkpoint.completed, shard_count):
+            data, summary = make_shard(index, checkpoint.total("calls"))
+            checkpoint.write_shard(index, data, summary)
+        checkpoint.finish()
+    """
+
+    def __init__(self, run_dir: PathLike, params: Dict):
+        """
+        Open a run directory, keeping the finished shards of a run with the same params
+
+        Args:
+            run_dir (PathLike): Directory of the run (created if missing)
+            params (Dict): Everything the output depends on (JSON-serializable);
+                a run with other params starts over
+        """
+        self.logger = logging.getLogger(__name__)
+        self.run_dir = Path(run_dir)
+        self.params = params
+        self.fingerprint = data_sha256(params)
+        self.shards: List[Dict] = []
+        self.finished = False
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @property
+    def progress_path(self) -> Path:
+        return self.run_dir / PROGRESS_FILENAME
+
+    def shard_path(self, index: int) -> Path:
+        return self.run_dir / SHARD_PATTERN.format(index)
+
+    def _load(self):
+        """Resume from progress.json, or clear a run made with other params"""
+        try:
+            with open(self.progress_path, encoding="utf-8") as f:
+                progress = json.load(f)
+        except FileNotFoundError:
+            progress = None
+        except (json.JSONDecodeError, OSError) as e:
+            self.logger.warning(f"Ignoring unreadable progress marker {self.progress_path}: {e}")
+            progress = None
+
+        if (progress is None or progress.get("version") != CHECKPOINT_VERSION
+                or progress.get("fingerprint") != self.fingerprint):
+            if progress is not None:
+                self.logger.info(f"Parameters of {self.run_dir} changed; starting the run over")
+            self.reset()
+            return
+
+        # Trust shards up to the first missing file
+        for index, summary in enumerate(progress.get("shards", [])):
+            if not self.shard_path(index).exists():
+                break
+            self.shards.append(summary)
+        self.finished = bool(progress.get("finished")) and len(self.shards) == len(progress.get("shards", []))
+        if self.shards:
+            self.logger.info(f"Resuming {self.run_dir} after shard {len(self.shards) - 1}")
+
+    def reset(self):
+        """Forget all progress and delete the shard files"""
+        for path in self.run_dir.glob("shard-*.json"):
+            path.unlink()
+        self.shards = []
+        self.finished = False
+        self._save()
+
+    def _save(self):
+        write_json_atomic(self.progress_path, {
+            "version": CHECKPOINT_VERSION,
+            "fingerprint": self.fingerprint,
+            "params": self.params,
+            "shards": self.shards,
+            "finished": self.finished
+        })
+
+    @property
+    def completed(self) -> int:
+        """Number of finished shards (the index of the next one)"""
+        return len(self.shards)
+
+    def total(self, key: str) -> int:
+        """Sum of one summary counter over the finished shards"""
+        return sum(summary.get(key, 0) for summary in self.shards)
+
+    def write_shard(self, index: int, data: Any, summary: Dict):
+        """
+        Store a finished shard, then advance the progress marker
+
+        Args:
+            index (int): Shard number; must be the next one
+            data (Any): Shard output (JSON-serializable)
+            summary (Dict): Counters later shards depend on (e.g. records written)
+
+        Raises:
+            ValueError: Shard out of order
+        """
+        if index != self.completed:
+            raise ValueError(f"Shard {index} written out of order (next is {self.completed})")
+        write_json_atomic(self.shard_path(index), data)
+        self.shards.append(summary)
+        self._save()
+
+    def read_shard(self, index: int) -> Any:
+        with open(self.shard_path(index), encoding="utf-8") as f:
+            return json.load(f)
+
+    def iter_shards(self) -> Iterator[Any]:
+        """Finished shards in order, one in memory at a time"""
+        for index in range(self.completed):
+            yield self.read_shard(index)
+
+    def finish(self):
+        """Mark the run complete"""
+        self.finished = True
+        self._save()
@@ -0,0 +1,304 @@
+"""
+desktop_creator/src/utils/timestamp_engine.py
+Created by RSGrizz
+
+Vectorized timestamp synthesis. Activity follows per-character waking-hour
+and weekday profiles. A profile is 168 hour-of-week weights, turned once
+into a CDF table (IntensityTable). Event times are then drawn in bulk with
+NumPy: exponential inter-arrival gaps in "activity time", mapped back to
+wall-clock time through the CDF with np.interp. The result is int64
+epoch-millisecond arrays, so a year of traffic for a cast takes
+milliseconds instead of a datetime loop per message.
+
+Story times are naive datetimes and are converted as if they were UTC
+(to_ms / ms_to_datetime), so the output does not depend on the host's time
+zone and no DST change shifts the hour-of-week phase.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .seeded_rng import KeyPart, SeededRNG
+
+HOURS_PER_WEEK = 168
+MS_PER_HOUR = 3_600_000
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+# Relative activity while asleep (night calls are rare, not impossible)
+NIGHT_WEIGHT = 0.02
+
+
+class ActivityProfile(NamedTuple):
+    """Relative activity by hour of day (midnight first) and weekday (Monday first)"""
+    hourly: Tuple[float, ...]
+    weekly: Tuple[float, ...]
+
+    def weights(self) -> np.ndarray:
+        """168 hour-of-week weights, Monday 00:00 first"""
+        return np.outer(np.asarray(self.weekly, dtype=np.float64),
+                        np.asarray(self.hourly, dtype=np.float64)).ravel()
+
+    @classmethod
+    def flat(cls) -> "ActivityProfile":
+        return cls((1.0,) * 24, (1.0,) * 7)
+
+    @classmethod
+    def waking(cls, wake: int = 7, sleep: int = 23, weekend: float = 0.6) -> "ActivityProfile":
+        """
+        Awake from wake to sleep (sleep may pass midnight, e.g. 25 = 1am)
+        with a lunchtime and an evening peak
+
+        Args:
+            wake (int): First waking hour
+            sleep (int): First sleeping hour
+            weekend (float): Saturday/Sunday activity relative to weekdays
+
+        Returns:
+            ActivityProfile: Profile
+        """
+        hourly = []
+        for hour in range(24):
+            awake = wake <= hour < sleep or wake <= hour + 24 < sleep
+            weight = 1.0 if awake else NIGHT_WEIGHT
+            if awake and hour in (12, 13):
+                weight = 1.3
+            elif awake and 18 <= hour <= 21:
+                weight = 1.6
+            hourly.append(weight)
+        return cls(tuple(hourly), (1.0,) * 5 + (weekend,) * 2)
+
+
+DEFAULT_PROFILE = ActivityProfile.waking()
+
+
+def character_profile(rng: SeededRNG, play: KeyPart, character: KeyPart) -> ActivityProfile:
+    """Stable per-character profile: own wake and sleep hours and weekend habit"""
+    stream = rng.stream(play, character, "activity")
+    return ActivityProfile.waking(stream.randint(5, 9), stream.randint(21, 25), stream.uniform(0.4, 1.0))
+
+
+def pair_weights(first: ActivityProfile, second: ActivityProfile) -> np.ndarray:
+    """Hour-of-week weights of contact between two characters (both must be up)"""
+    return np.sqrt(first.weights() * second.weights())
+
+
+class IntensityTable:
+    """
+    Piecewise-constant event intensity over consecutive one-hour bins, kept
+    as a CDF so positions can be drawn by inverse transform in bulk.
+    """
+
+    def __init__(self, bin_weights: np.ndarray, span_hours: Optional[float] = None):
+        """
+        Build the CDF table
+
+        Args:
+            bin_weights (np.ndarray): Non-negative weight per hour bin
+            span_hours (Optional[float]): Length of the span when the last bin
+                is partial (its weight should already be scaled down)
+
+        Raises:
+            ValueError: Negative weights or no positive weight
+        """
+        weights = np.asarray(bin_weights, dtype=np.float64)
+        if weights.size == 0 or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("IntensityTable needs non-negative weights with a positive sum")
+        self.cdf = np.concatenate(([0.0], np.cumsum(weights)))
+        self.cdf /= self.cdf[-1]
+        self.edges = np.arange(weights.size + 1, dtype=np.float64)
+        if span_hours is not None:
+            self.edges[-1] = span_hours
+        self.mean_weight = float(weights.mean())
+
+    @property
+    def span_hours(self) -> float:
+        return float(self.edges[-1])
+
+    def positions(self, u: np.ndarray) -> np.ndarray:
+        """Hours from the table start for quantiles u in [0, 1)"""
+        return np.interp(u, self.cdf, self.edges)
+
+    def sample(self, generator: np.random.Generator, count: int) -> np.ndarray:
+        """count independent positions (hours), sorted"""
+        return self.positions(np.sort(generator.random(count)))
+
+    def arrivals(self, generator: np.random.Generator, expected: float) -> np.ndarray:
+        """
+        Positions (hours, sorted) of a Poisson process with this many expected events
+
+        Unit-rate exponential gaps are drawn in bulk in activity time and
+        mapped to wall-clock hours through the CDF.
+        """
+        if expected <= 0:
+            return np.empty(0, dtype=np.float64)
+        gaps = generator.exponential(1.0, size=int(expected + 6.0 * math.sqrt(expected) + 16))
+        times = np.cumsum(gaps)
+        while times[-1] < expected:
+            more = np.cumsum(generator.exponential(1.0, size=times.size)) + times[-1]
+            times = np.concatenate((times, more))
+        times = times[:np.searchsorted(times, expected)]
+        return self.positions(times / expected)
+
+
+def week_table(weights: np.ndarray, start: datetime) -> IntensityTable:
+    """One week of hour bins starting at start, from hour-of-week weights"""
+    phase = start.weekday() * 24 + start.hour
+    return IntensityTable(np.roll(np.asarray(weights, dtype=np.float64), -phase))
+
+
+class TimestampEngine:
+    """
+    Draws event timestamps in [start, end) as int64 epoch milliseconds.
+
+    Usage:
+        engine = TimestampEngine(start, end, SeededRNG(7))
+        ms = engine.events(4.0, character_profile(rng, "Hamlet", "HAMLET"), "Hamlet", "HAMLET", "sms")
+    """
+
+    def __init__(self, start: datetime, end: datetime, rng: Optional[SeededRNG] = None):
+        """
+        Initialize TimestampEngine
+
+        Args:
+            start (datetime): First instant of the span (its wall clock sets the weekday/hour phase)
+            end (datetime): Instant the span ends before
+            rng (Optional[SeededRNG]): Scenario streams (default: random seed)
+
+        Raises:
+            ValueError: end not after start
+        """
+        if end <= start:
+            raise ValueError(f"Empty span {start} .. {end}")
+        self.start = start
+        self.end = end
+        self.rng = rng or SeededRNG()
+        self.start_ms = to_ms(start)
+        self.span_hours = (end - start) / timedelta(hours=1)
+        self.days = self.span_hours / 24.0
+
+        bins = math.ceil(self.span_hours)
+        phase = start.weekday() * 24 + start.hour
+        self._bin_hour_of_week = (phase + np.arange(bins)) % HOURS_PER_WEEK
+        self._last_bin_share = self.span_hours - (bins - 1)
+        self._tables: Dict[bytes, IntensityTable] = {}
+
+    @property
+    def bins(self) -> int:
+        """Number of hour bins in the span (the last may be partial)"""
+        return self._bin_hour_of_week.size
+
+    def span_weights(self, weights: np.ndarray) -> np.ndarray:
+        """Hour-of-week weights laid over the hour bins of the span"""
+        return np.asarray(weights, dtype=np.float64)[self._bin_hour_of_week]
+
+    def bin_table(self, bin_weights: np.ndarray) -> IntensityTable:
+        """
+        CDF table of the span for one weight per hour bin
+
+        Raises:
+            ValueError: Not one weight per bin
+        """
+        span_weights = np.array(bin_weights, dtype=np.float64)
+        if span_weights.shape != (self.bins,):
+            raise ValueError(f"Expected {self.bins} bin weights, got {span_weights.shape}")
+        span_weights[-1] *= self._last_bin_share
+        return IntensityTable(span_weights, self.span_hours)
+
+    def table(self, weights: np.ndarray) -> IntensityTable:
+        """CDF table of the span for hour-of-week weights (cached per weights)"""
+        weights = np.asarray(weights, dtype=np.float64)
+        key = weights.tobytes()
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = self.bin_table(self.span_weights(weights))
+        return table
+
+    def _table_for(self, profile) -> IntensityTable:
+        if isinstance(profile, IntensityTable):
+            return profile
+        if isinstance(profile, ActivityProfile):
+            return self.table(profile.weights())
+        return self.table(profile)
+
+    def _to_ms(self, hours: np.ndarray) -> np.ndarray:
+        return self.start_ms + (hours * MS_PER_HOUR).astype(np.int64)
+
+    def events(self,
+               rate_per_day: float,
+               profile,
+               play: KeyPart = None,
+               character: KeyPart = None,
+               artifact: KeyPart = None,
+               index: int = 0) -> np.ndarray:
+        """
+        Timestamps of a Poisson process averaging rate_per_day, shaped by a profile
+
+        Args:
+            rate_per_day (float): Mean events per day over the span
+            profile (ActivityProfile, np.ndarray or IntensityTable): Profile,
+                hour-of-week weights, or a table from bin_table
+            play, character, artifact, index: Stream key of the draw
+
+        Returns:
+            np.ndarray: Sorted int64 epoch milliseconds
+        """
+        generator = self.rng.numpy_stream(play, character, artifact, index)
+        return self._to_ms(self._table_for(profile).arrivals(generator, rate_per_day * self.days))
+
+    def sample(self,
+               count: int,
+               profile,
+               play: KeyPart = None,
+               character: KeyPart = None,
+               artifact: KeyPart = None,
+               index: int = 0) -> np.ndarray:
+        """
+        Exactly count timestamps distributed like the profile
+
+        Returns:
+            np.ndarray: Sorted int64 epoch milliseconds
+        """
+        generator = self.rng.numpy_stream(play, character, artifact, index)
+        return self._to_ms(self._table_for(profile).sample(generator, count))
+
+    def cast_events(self,
+                    rates: Sequence[float],
+                    profiles: Sequence[ActivityProfile],
+                    play: KeyPart,
+                    characters: Sequence[str],
+                    artifact: KeyPart = "activity_events") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Events of a whole cast in one time-ordered array
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (int64 epoch ms, index of the character
+                in characters), sorted by time
+        """
+        times = [self.events(rate, profile, play, character, artifact)
+                 for rate, profile, character in zip(rates, profiles, characters)]
+        owners = np.repeat(np.arange(len(times)), [t.size for t in times])
+        if not times:
+            return np.empty(0, dtype=np.int64), owners
+        times = np.concatenate(times)
+        order = np.argsort(times, kind="stable")
+        return times[order], owners[order]
+
+
+def ms_to_datetime(ms: int) -> datetime:
+    """Naive UTC datetime of an epoch-millisecond value (the inverse of to_ms)"""
+    return EPOCH + int(ms) * MILLISECOND
+
+
+def to_ms(timestamp) -> int:
+    """Epoch milliseconds of a datetime, an ISO string or a number (already ms); naive times are UTC"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return (timestamp - EPOCH) // MILLISECOND
+    return int(timestamp)